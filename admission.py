@@ -0,0 +1,256 @@
+import asyncio
+import contextlib
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from fastapi import HTTPException
+
+import metrics
+
+
+def identity_key(authorization: Optional[str]) -> Optional[str]:
+    """Return the identity a request is limited as, None without Authorization.
+
+    The header value is hashed, so credentials are neither kept nor reported.
+    """
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()[:16]
+
+
+class _Waiter:
+    """A queued request, woken by an event from threads or a future on an event loop."""
+
+    __slots__ = ("identity", "granted", "event", "future", "loop")
+
+    def __init__(self, identity: Optional[str], loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.identity = identity
+        self.granted = False
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class AdmissionController:
+    """Limit the conversions and validations a worker runs at the same time.
+
+    At most max_in_flight jobs run, and at most max_per_identity of them for
+    the same Authorization header; requests without one are only limited by
+    max_in_flight. Requests beyond the limits wait in a FIFO queue, where a
+    request whose identity is at its limit lets the requests of other
+    identities pass. Once queue_depth requests wait, or a request waited
+    queue_timeout seconds, it is answered with 429 and a Retry-After estimated
+    from the mean job duration. The same controller admits requests from the
+    event loop and from threads.
+    """
+
+    def __init__(self, max_in_flight: int, max_per_identity: int, queue_depth: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_per_identity = max_per_identity
+        self.queue_depth = queue_depth
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._by_identity = {}
+        self._queue = deque()
+        self._mean_run_seconds = None
+        self._counts = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected": 0,
+            "timed_out": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "run_seconds": 0.0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_in_flight > 0
+
+    def _fits(self, identity: Optional[str]) -> bool:
+        if self._in_flight >= self.max_in_flight:
+            return False
+        if identity is None or self.max_per_identity <= 0:
+            return True
+        return self._by_identity.get(identity, 0) < self.max_per_identity
+
+    def _take(self, identity: Optional[str]) -> None:
+        self._in_flight += 1
+        metrics.add_conversions("running", 1)
+        if identity is not None:
+            self._by_identity[identity] = self._by_identity.get(identity, 0) + 1
+
+    def _dispatch(self) -> None:
+        """Grant free slots to the queued requests that fit, oldest first."""
+        for waiter in list(self._queue):
+            if self._in_flight >= self.max_in_flight:
+                break
+            if self._fits(waiter.identity):
+                self._queue.remove(waiter)
+                metrics.add_conversions("queued", -1)
+                self._take(waiter.identity)
+                waiter.granted = True
+                waiter.wake()
+
+    def _retry_after(self) -> int:
+        """Estimate the seconds until the queue in front of a new request has drained."""
+        if not self._mean_run_seconds:
+            return 1
+        rounds = (len(self._queue) + 1) / self.max_in_flight
+        return max(1, math.ceil(rounds * self._mean_run_seconds))
+
+    def _overloaded(self, reason: str) -> HTTPException:
+        return HTTPException(
+            status_code=429,
+            detail=f"Too many conversions in progress ({reason}), retry later",
+            headers={"Retry-After": str(self._retry_after())},
+        )
+
+    def _enter(self, identity: Optional[str], loop=None) -> Optional[_Waiter]:
+        """Admit a request or queue it, returning its waiter while it is queued.
+
+        Raises:
+            HTTPException: 429 if the queue is full
+        """
+        with self._lock:
+            if self._fits(identity):
+                self._take(identity)
+                self._counts["admitted"] += 1
+                return None
+            if len(self._queue) >= self.queue_depth:
+                self._counts["rejected"] += 1
+                raise self._overloaded("queue full")
+            waiter = _Waiter(identity, loop)
+            self._queue.append(waiter)
+            metrics.add_conversions("queued", 1)
+            self._counts["queued"] += 1
+            return waiter
+
+    def _granted(self, waiter: _Waiter, queued_at: float) -> None:
+        waited = time.monotonic() - queued_at
+        with self._lock:
+            self._counts["admitted"] += 1
+            self._counts["wait_seconds"] += waited
+            self._counts["max_wait_seconds"] = max(self._counts["max_wait_seconds"], waited)
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Leave the queue after a timeout or cancellation, True if a slot was granted meanwhile."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._queue.remove(waiter)
+            metrics.add_conversions("queued", -1)
+            return False
+
+    def _release(self, identity: Optional[str], started_at: Optional[float]) -> None:
+        """Free a slot, started_at is None for a slot granted to a request that went away."""
+        with self._lock:
+            self._in_flight -= 1
+            metrics.add_conversions("running", -1)
+            if identity is not None:
+                self._by_identity[identity] -= 1
+                if not self._by_identity[identity]:
+                    del self._by_identity[identity]
+            if started_at is not None:
+                run = time.monotonic() - started_at
+                self._counts["run_seconds"] += run
+                if self._mean_run_seconds is None:
+                    self._mean_run_seconds = run
+                else:
+                    self._mean_run_seconds = 0.8 * self._mean_run_seconds + 0.2 * run
+            self._dispatch()
+
+    def _timed_out(self) -> HTTPException:
+        with self._lock:
+            self._counts["timed_out"] += 1
+            self._counts["wait_seconds"] += self.queue_timeout
+            self._counts["max_wait_seconds"] = max(self._counts["max_wait_seconds"], self.queue_timeout)
+            logging.warning(f"Request waited {self.queue_timeout}s for admission - rejecting")
+            return self._overloaded("queue timeout")
+
+    @contextlib.contextmanager
+    def admit(self, authorization: Optional[str] = None):
+        """Hold one slot for the duration of the block, waiting for it blocking.
+
+        Raises:
+            HTTPException: 429 if the queue is full or the wait timed out
+        """
+        if not self.enabled:
+            yield
+            return
+        identity = identity_key(authorization)
+        queued_at = time.monotonic()
+        waiter = self._enter(identity)
+        if waiter is not None:
+            waiter.event.wait(self.queue_timeout)
+            if not self._abandon(waiter):
+                raise self._timed_out()
+            self._granted(waiter, queued_at)
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(identity, started_at)
+
+    @contextlib.asynccontextmanager
+    async def admit_async(self, authorization: Optional[str] = None):
+        """Hold one slot for the duration of the block, waiting for it on the event loop.
+
+        Raises:
+            HTTPException: 429 if the queue is full or the wait timed out
+        """
+        if not self.enabled:
+            yield
+            return
+        identity = identity_key(authorization)
+        queued_at = time.monotonic()
+        waiter = self._enter(identity, asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+            except asyncio.TimeoutError:
+                if not self._abandon(waiter):
+                    raise self._timed_out()
+            except asyncio.CancelledError:
+                # the client went away, hand a slot granted meanwhile to the next request
+                if self._abandon(waiter):
+                    self._release(identity, None)
+                raise
+            self._granted(waiter, queued_at)
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(identity, started_at)
+
+    def stats(self) -> dict:
+        """Return the current queue depth and counters of admitted, queued and rejected requests."""
+        with self._lock:
+            stats = {
+                "max_in_flight": self.max_in_flight,
+                "max_per_identity": self.max_per_identity,
+                "queue_depth_limit": self.queue_depth,
+                "in_flight": self._in_flight,
+                "identities_in_flight": len(self._by_identity),
+                "queue_depth": len(self._queue),
+                **self._counts,
+            }
+        queued = stats["queued"]
+        stats["mean_wait_seconds"] = stats["wait_seconds"] / queued if queued else 0.0
+        return stats
@@ -1,46 +1,144 @@
+import asyncio
 import base64
+import contextlib
+import contextvars
+import copy
+import functools
+import json
 import logging
 import os
+import queue
 import re
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from io import BytesIO
-from typing import Any, List, Optional, Tuple, Annotated
+from typing import Any, Dict, List, Optional, Tuple, Annotated
 from urllib.parse import unquote, urlparse
 from xmlrpc.client import Boolean
 
+import httpx
 import requests
 import uvicorn
 import yaml
 from fastapi import Body, FastAPI, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse, JSONResponse
 from fastapi.encoders import jsonable_encoder
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import AnyUrl, BaseModel, Field
 from pyshacl import validate
-from rdflib import Graph, Namespace, URIRef, BNode, Literal
-from rdflib.namespace import CSVW, RDF, RDFS, PROV, XSD
+from rdflib import Graph, Namespace
+from rdflib.namespace import CSVW, RDF
 from rdflib.util import guess_format
 from starlette.middleware import Middleware
 from starlette.middleware.sessions import SessionMiddleware
 from starlette_wtf import StarletteForm
 from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
 from wtforms import BooleanField, URLField
 from wtforms.validators import Optional as WTFOptional
 
-from rmlmapper import count_rules_str, replace_data_source, replace_all_data_sources, strip_namespace
+from rmlmapper import (
+    RuleTemplate, TripleTemplate, count_rules_str, replace_data_source, tag_rule_graphs,
+)
+from rml_engine import RMLPlan, UnsupportedMappingError
+from rdf_writer import LINE_FORMATS, iter_lines
+from graph_stages import (
+    BASE_FORMATS,
+    GraphJob,
+    GraphPool,
+    base_uri_rewriter,
+    graph_name,
+    serialize_graph,
+)
+from source_split import deskolemize, iter_source_batches
+from cache import LRUCache, cache_stats, content_key
+import json_codec
+from pipeline import IOCall, run_steps, run_steps_async
+from admission import AdmissionController
+import metrics
+import timing
+from timing import ServerTimingMiddleware
+from metrics import RequestMetricsMiddleware
+from http_client import (
+    SSL_VERIFY,
+    async_cached_get,
+    cached_get,
+    close_async_client,
+    close_session,
+    download_to,
+    get_session,
+    host_slot,
+    pool_stats,
+    response_cache_stats,
+)
 from enum import Enum
 
 YARRRML_URL = os.environ.get("YARRRML_URL")
 MAPPER_URL = os.environ.get("MAPPER_URL")
+# "remote" runs the rules with the rmlmapper web api, "native" in process
+RML_ENGINE = os.environ.get("RML_ENGINE", "remote")
 
-SSL_VERIFY = os.getenv("SSL_VERIFY", "True").lower() in ("true", "1", "t")
 if not SSL_VERIFY:
     requests.packages.urllib3.disable_warnings()
 
 TEMPLATE_NAMESPACE = "http://template_base/"
 
+# YARRRML -> RML conversion cache, keyed by the hash of the YARRRML content
+RML_CACHE_BYTES = int(os.environ.get("RML_CACHE_BYTES", 32 * 1024 * 1024))
+RML_CACHE_DIR = os.environ.get("RML_CACHE_DIR") or None
+rml_cache = LRUCache("yarrrml_to_rml", RML_CACHE_BYTES, directory=RML_CACHE_DIR)
+# RML rules prepared for placeholder substitution, keyed by the hash of the RML text
+rule_template_cache = LRUCache(
+    "rule_templates", RML_CACHE_BYTES, sizeof=lambda template: template.size
+)
+# compiled plans of the native RML engine, keyed by the hash of the RML text
+rml_plan_cache = LRUCache("rml_plans", RML_CACHE_BYTES, sizeof=lambda plan: plan.size)
+
+# downloads of data sources and templates run concurrently, bounded per worker
+DOWNLOAD_CONCURRENCY = int(os.environ.get("DOWNLOAD_CONCURRENCY", 8))
+download_executor = ThreadPoolExecutor(
+    max_workers=DOWNLOAD_CONCURRENCY, thread_name_prefix="download"
+)
+# items of /api/createrdf/batch requests are mapped concurrently, bounded per worker
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", 4))
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY, thread_name_prefix="batch")
+# rdflib stages of the async endpoints, bounded per worker so that requests
+# waiting for I/O do not hold a thread and the others queue for the CPU
+CPU_CONCURRENCY = int(os.environ.get("CPU_CONCURRENCY", 4))
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_CONCURRENCY, thread_name_prefix="cpu")
+# graph stages of JSON responses run in this many processes per worker, 0 runs
+# them in the worker; processes are replaced after GRAPH_TASKS_PER_CHILD jobs
+GRAPH_PROCESSES = int(os.environ.get("GRAPH_PROCESSES", 0))
+GRAPH_TASKS_PER_CHILD = int(os.environ.get("GRAPH_TASKS_PER_CHILD", 50))
+graph_pool = GraphPool(GRAPH_PROCESSES, GRAPH_TASKS_PER_CHILD)
+# conversions and validations running per worker, in total and per Authorization
+# header; more wait in a queue of ADMISSION_QUEUE_DEPTH, beyond that 429 is answered
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", 8))
+ADMISSION_MAX_PER_IDENTITY = int(os.environ.get("ADMISSION_MAX_PER_IDENTITY", 4))
+ADMISSION_QUEUE_DEPTH = int(os.environ.get("ADMISSION_QUEUE_DEPTH", 32))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", 60))
+admission = AdmissionController(
+    ADMISSION_MAX_IN_FLIGHT, ADMISSION_MAX_PER_IDENTITY, ADMISSION_QUEUE_DEPTH,
+    ADMISSION_QUEUE_TIMEOUT,
+)
+
+
+async def run_cpu(function, *args, **kwargs):
+    """Run a CPU-bound function on the cpu executor without blocking the event loop.
+
+    The function runs in a copy of the caller's context, so its spans count
+    for the request, see timing.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        cpu_executor, functools.partial(contextvars.copy_context().run, function, *args, **kwargs)
+    )
+
 import settings
 
 setting = settings.Setting()
@@ -61,6 +159,10 @@ middleware = [
     Middleware(
         uvicorn.middleware.proxy_headers.ProxyHeadersMiddleware, trusted_hosts="*"
     ),
+    # request counts and durations per route for /metrics
+    Middleware(RequestMetricsMiddleware),
+    # stage timings of each request, sent as Server-Timing header
+    Middleware(ServerTimingMiddleware),
 ]
 
 tags_metadata = [
@@ -174,6 +276,15 @@ async def startup_validation():
     logging.info("=" * 80)
 
 
+@app.on_event("shutdown")
+async def shutdown_http_session():
+    """Close the pooled HTTP connections of this worker."""
+    close_session()
+    await close_async_client()
+    graph_pool.shutdown()
+    metrics.shutdown()
+
+
 app.mount("/static/", StaticFiles(directory="static", html=True), name="static")
 templates = Jinja2Templates(directory="templates")
 
@@ -208,7 +319,7 @@ IOF = Namespace("https://spec.industrialontologies.org/ontology/core/Core/")
 class ReturnType(str, Enum):
     jsonld = "json-ld"
     n3 = "n3"
-    # nquads="nquads" #only makes sense for context-aware stores
+    nquads = "nquads"
     nt = "nt"
     hext = "hext"
     # prettyxml="pretty-xml" #only makes sense for context-aware stores
@@ -233,15 +344,22 @@ RETURN_TYPE_EXT = {
     "xml": ".rdf",
     "n3": ".n3",
     "nt": ".nt",
+    "nquads": ".nq",
     "trig": ".trig",
     "hext": ".hext",
 }
 
 
+class MappingEngine(str, Enum):
+    remote = "remote"
+    native = "native"
+
+
 class RDFMimeType(str, Enum):
     xml = "application/rdf+xml"
     turtle = "text/turtle"
     n3 = "application/n-triples"
+    nt = "application/n-triples"
     nquads = "application/n-quads"
     jsonld = "application/ld+json"
 
@@ -260,15 +378,202 @@ class RDFStreamingResponse(StreamingResponse):
         filename: str,
         status_code: int = 200,
         background: Optional[BackgroundTask] = None,
+        headers: Optional[dict] = None,
     ):
+        extra_headers = headers or {}
         headers = {
             "Content-Disposition": "attachment; filename={}".format(filename),
-            "Access-Control-Expose-Headers": "Content-Disposition",
+            "Access-Control-Expose-Headers": ", ".join(["Content-Disposition", *extra_headers]),
+            **extra_headers,
         }
         media_type = RDFMimeType[ReturnType.get(guess_format(filename)).name].value
         super(RDFStreamingResponse, self).__init__(
-            content, status_code, headers, media_type
+            content, status_code, headers, media_type, background
+        )
+        self.content = content
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # content is not iterated if sending the response start failed,
+            # e.g. after the client disconnected, see ReleasingIterator
+            close = getattr(self.content, "close", None)
+            if close is not None:
+                await run_in_threadpool(close)
+
+
+class ReleasingIterator:
+    """Iterator over chunks that closes release once they are exhausted, fail or the iterator is closed.
+
+    The finally of a generator does not run if the generator is closed
+    before it started, so what a streamed response holds, e.g. an admission
+    slot, is released by this iterator instead, which RDFStreamingResponse
+    closes in any case.
+    """
+
+    def __init__(self, chunks, release: contextlib.ExitStack):
+        self.chunks = chunks
+        self.release = release
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        try:
+            self.chunks.close()
+        finally:
+            self.release.close()
+
+
+# media types /api/createrdf can stream instead of answering with JSON
+STREAM_MEDIA_TYPES = {
+    RDFMimeType.turtle.value: ReturnType.turtle,
+    RDFMimeType.nt.value: ReturnType.nt,
+    RDFMimeType.nquads.value: ReturnType.nquads,
+}
+# formats written with a relative @base, like the turtle output always was
+STREAM_CHUNK_BYTES = int(os.environ.get("STREAM_CHUNK_BYTES", 64 * 1024))
+
+
+def negotiate_stream_format(
+    accept: Optional[str], stream: bool, return_type: ReturnType
+) -> Optional[ReturnType]:
+    """Decide whether a graph is streamed and in which format.
+
+    The most preferred of application/json and the streamable RDF media types
+    in the Accept header wins, media types with q=0 are skipped. Without an
+    acceptable RDF media type, the stream flag streams in return_type.
+
+    Returns:
+        ReturnType to stream, None to answer with JSON
+
+    Raises:
+        HTTPException: If streaming is requested in a format that cannot be streamed
+    """
+    preferences = []
+    for position, entry in enumerate((accept or "").split(",")):
+        media_type, _, params = entry.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    pass
+        if quality <= 0:
+            # q=0 marks a media type as not acceptable
+            continue
+        preferences.append((-quality, position, media_type.strip().lower()))
+    for _, _, media_type in sorted(preferences):
+        if media_type in STREAM_MEDIA_TYPES:
+            return STREAM_MEDIA_TYPES[media_type]
+        if media_type == "application/json":
+            break
+    if not stream:
+        return None
+    if return_type not in STREAM_MEDIA_TYPES.values():
+        raise HTTPException(
+            status_code=422,
+            detail=f"Streaming supports return_type {', '.join(t.value for t in STREAM_MEDIA_TYPES.values())}",
         )
+    return return_type
+
+
+class SerializationCancelled(Exception):
+    pass
+
+
+class _ChunkWriter:
+    """Binary stream handing written data to a bounded queue in chunks."""
+
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event, chunk_size: int):
+        self.chunks = chunks
+        self.cancelled = cancelled
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self.buffer += data
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.put(bytes(self.buffer))
+            self.buffer.clear()
+
+    def put(self, item) -> None:
+        # block while the consumer is behind, give up once it went away
+        while True:
+            if self.cancelled.is_set():
+                raise SerializationCancelled()
+            try:
+                self.chunks.put(item, timeout=1)
+                return
+            except queue.Full:
+                pass
+
+
+def iter_serialized(graph: Graph, format: str, chunk_size: int = STREAM_CHUNK_BYTES):
+    """Serialize a graph on a background thread and yield the output in chunks.
+
+    Only a few chunks are buffered at a time, so the serialized document never
+    exists as a whole in memory. Closing the generator stops the serializer.
+    N-Triples and N-Quads lines are generated directly while iterating the graph.
+    """
+    # counts for the request, the response started before, see timing
+    size = 0
+    with timing.span("serialize"):
+        if format in LINE_FORMATS:
+            for chunk in iter_lines(graph, format, graph_name(graph), chunk_size):
+                size += len(chunk)
+                yield chunk
+            metrics.observe_conversion(output_bytes=size)
+            return
+        chunks = queue.Queue(maxsize=4)
+        cancelled = threading.Event()
+        writer = _ChunkWriter(chunks, cancelled, chunk_size)
+        finished = object()
+
+        def produce():
+            try:
+                try:
+                    base = "" if format in BASE_FORMATS else None
+                    graph.serialize(destination=writer, format=format, base=base)
+                    writer.flush()
+                except SerializationCancelled:
+                    raise
+                except Exception as e:
+                    logging.error(f"Serializing graph as {format} failed: {str(e)}", exc_info=True)
+                    writer.put(e)
+                    return
+                writer.put(finished)
+            except SerializationCancelled:
+                logging.info("Client disconnected, stopped serializing graph")
+
+        threading.Thread(target=produce, name="serialize", daemon=True).start()
+        try:
+            while True:
+                item = chunks.get()
+                if item is finished:
+                    metrics.observe_conversion(output_bytes=size)
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                size += len(item)
+                yield item
+        finally:
+            cancelled.set()
 
 
 def replace_between(
@@ -281,269 +586,93 @@ def replace_between(
     )
 
 
-def open_file(uri: AnyUrl, authorization=None) -> Tuple["filedata":str, "filename":str]:
+def parse_uri(uri: AnyUrl):
     try:
-        uri_parsed = urlparse(uri)
-        # print(uri_parsed)
-
+        return urlparse(uri)
     except Exception as e:
         raise HTTPException(
             status_code=400,
             detail=f"{uri} is not a valid URI - if local file add file:// as prefix. Error: {str(e)}",
         ) from e
-    else:
-        if uri_parsed.scheme in ["https", "http"]:
-            # r = urlopen(uri)
-            s = requests.Session()
-            s.verify = SSL_VERIFY
-            s.headers.update({"Authorization": authorization})
-            r = s.get(uri, allow_redirects=True, stream=True)
-
-            # r.raise_for_status()
-            if r.status_code != 200:
-                # logging.debug(r.content)
-                raise HTTPException(
-                    status_code=r.status_code, detail="cant get file at {}".format(uri)
-                )
-            filedata = r.content
-            # Extract filename from the FINAL URL after redirects, not the original URL
-            final_url = r.url
-            final_url_parsed = urlparse(final_url)
-            filename = unquote(final_url_parsed.path).rsplit("/download/upload")[0].split("/")[-1]
-            logging.debug(f"Original URL: {uri}")
-            logging.debug(f"Final URL after redirects: {final_url}")
-            logging.debug(f"Extracted filename: {filename}")
-            # charset=r.info().get_content_charset()
-            # if not charset:
-            #     charset='utf-8'
-            # filedata = r.read().decode(charset)
-        elif uri_parsed.scheme == "file":
-            filedata = open(unquote(uri_parsed.path), "rb").read()
-        else:
-            raise HTTPException(
-                status_code=400, detail="unknown scheme {}".format(uri_parsed.scheme)
-            )
-        return filedata, filename
 
 
-from datetime import datetime
-from jsonpath_ng.ext import parse as jsonpath_parse
-from jsonpath_ng.exceptions import JsonPathParserError
+def downloaded_file(uri: AnyUrl, r) -> Tuple[bytes, str]:
+    """Return the body and filename of a download answered by cached_get."""
+    # r.raise_for_status()
+    if r.status_code != 200:
+        # logging.debug(r.content)
+        raise HTTPException(
+            status_code=r.status_code, detail="cant get file at {}".format(uri)
+        )
+    # Extract filename from the FINAL URL after redirects, not the original URL
+    final_url = r.url
+    final_url_parsed = urlparse(final_url)
+    filename = unquote(final_url_parsed.path).rsplit("/download/upload")[0].split("/")[-1]
+    logging.debug(f"Original URL: {uri}")
+    logging.debug(f"Final URL after redirects: {final_url}")
+    logging.debug(f"Extracted filename: {filename}")
+    return r.content, filename
 
 
-# ============================================================================
-# CONDITION EVALUATION FOR YARRRML MAPPINGS
-# ============================================================================
+def read_local_file(path: str) -> Tuple[bytes, str]:
+    with open(path, "rb") as f:
+        return f.read(), path.split("/")[-1]
 
-def normalize_function_name(function_ref: str, prefixes: dict) -> str:
-    """
-    Normalize function reference to standard name.
-    
-    Handles three formats:
-    - Short name: "equal"
-    - Prefixed: "idlab-fn:equal"
-    - Full IRI: "https://w3id.org/imec/idlab/function#equal"
-    
-    Args:
-        function_ref: Function reference from YARRRML condition
-        prefixes: Dict of prefix -> namespace mappings
-        
-    Returns:
-        Normalized function name (e.g., "equal", "notEqual", etc.)
-    """
-    # If it's already a short name, return it
-    if ":" not in function_ref and "/" not in function_ref:
-        return function_ref
-    
-    # Handle prefixed format (e.g., "idlab-fn:equal")
-    if ":" in function_ref and "/" not in function_ref:
-        prefix, local_name = function_ref.split(":", 1)
-        return local_name
-    
-    # Handle full IRI - extract last part after # or /
-    if "#" in function_ref:
-        return function_ref.split("#")[-1]
-    elif "/" in function_ref:
-        return function_ref.split("/")[-1]
-    
-    return function_ref
 
+def open_file(uri: AnyUrl, authorization=None) -> Tuple["filedata":str, "filename":str]:
+    uri_parsed = parse_uri(uri)
+    if uri_parsed.scheme in ["https", "http"]:
+        # revalidates cached copies with If-None-Match / If-Modified-Since
+        return downloaded_file(uri, cached_get(uri, authorization))
+    elif uri_parsed.scheme == "file":
+        return read_local_file(unquote(uri_parsed.path))
+    raise HTTPException(
+        status_code=400, detail="unknown scheme {}".format(uri_parsed.scheme)
+    )
 
-def extract_jsonpath_value(jsonpath_expr: str, data_item: dict) -> any:
-    """
-    Extract value from data item using JSONPath expression.
-    
-    Args:
-        jsonpath_expr: JSONPath expression like "$(label)" or "$.id"
-        data_item: Dictionary to extract value from
-        
-    Returns:
-        Extracted value or None if not found
-    """
-    # Remove $() wrapper if present - convert $(label) to $.label
-    if jsonpath_expr.startswith("$(") and jsonpath_expr.endswith(")"):
-        field_name = jsonpath_expr[2:-1]
-        jsonpath_expr = f"$.{field_name}"
-    
-    # If it's just a literal value (not starting with $), return as-is
-    if not jsonpath_expr.startswith("$"):
-        return jsonpath_expr
-    
-    try:
-        jsonpath_expression = jsonpath_parse(jsonpath_expr)
-        matches = jsonpath_expression.find(data_item)
-        
-        if matches:
-            # Return first match value
-            return matches[0].value
-        return None
-    except JsonPathParserError as e:
-        logging.warning(f"JSONPath parse error for '{jsonpath_expr}': {e}")
-        return None
-    except Exception as e:
-        logging.warning(f"Error extracting JSONPath value for '{jsonpath_expr}': {e}")
-        return None
 
+def open_source_file(uri: AnyUrl, authorization=None):
+    """Open a data source as binary file without reading it into memory.
 
-def evaluate_fno_function(function_name: str, parameters: dict) -> bool:
+    Downloads bypass the response cache and go to a temporary file, deleted
+    when it is closed.
     """
-    Evaluate an FnO function with given parameters.
-    
-    Args:
-        function_name: Normalized function name (e.g., "equal", "notEqual")
-        parameters: Dict of parameter name -> value
-        
-    Returns:
-        Boolean result of function evaluation
-    """
-    # Get common parameter names
-    str1 = parameters.get("str1") or parameters.get("grel:valueParam") or parameters.get("valueParam")
-    str2 = parameters.get("str2") or parameters.get("grel:valueParam2") or parameters.get("valueParam2")
-    
-    # Convert to strings for comparison (handle None)
-    str1 = str(str1) if str1 is not None else ""
-    str2 = str(str2) if str2 is not None else ""
-    
-    if function_name == "equal":
-        result = str1 == str2
-        logging.debug(f"  equal('{str1}', '{str2}') = {result}")
-        return result
-    
-    elif function_name == "notEqual":
-        result = str1 != str2
-        logging.debug(f"  notEqual('{str1}', '{str2}') = {result}")
-        return result
-    
-    elif function_name == "stringContainsOtherString":
-        other_str = parameters.get("otherStr") or parameters.get("idlab-fn:_otherStr")
-        delimiter = parameters.get("delimiter") or parameters.get("idlab-fn:_delimiter", ",")
-        
-        if not other_str:
-            return False
-        
-        # Split str1 by delimiter and check if other_str is in the list
-        parts = str1.split(delimiter)
-        result = other_str in parts
-        logging.debug(f"  stringContainsOtherString('{str1}', '{other_str}', delimiter='{delimiter}') = {result}")
-        return result
-    
-    elif function_name == "listContainsElement":
-        list_param = parameters.get("list") or parameters.get("idlab-fn:_list")
-        str_param = parameters.get("str") or parameters.get("idlab-fn:_str")
-        
-        if not list_param or not str_param:
-            return False
-        
-        # list_param might be a string representation or actual list
-        if isinstance(list_param, str):
-            # Try to split by common delimiters
-            list_items = list_param.split(",")
-        elif isinstance(list_param, list):
-            list_items = list_param
-        else:
-            return False
-        
-        result = str_param in list_items
-        logging.debug(f"  listContainsElement({list_items}, '{str_param}') = {result}")
-        return result
-    
-    elif function_name == "isNull":
-        str_param = parameters.get("str") or parameters.get("idlab-fn:_str") or str1
-        result = str_param is None or str_param == "" or str_param == "null"
-        logging.debug(f"  isNull('{str_param}') = {result}")
-        return result
-    
-    elif function_name == "inRange":
-        test_val = parameters.get("test") or parameters.get("idlab-fn:_test")
-        from_val = parameters.get("from") or parameters.get("idlab-fn:_from")
-        to_val = parameters.get("to") or parameters.get("idlab-fn:_to")
-        
+    uri_parsed = parse_uri(uri)
+    if uri_parsed.scheme in ["https", "http"]:
+        file = tempfile.TemporaryFile()
         try:
-            test_num = float(test_val) if test_val is not None else None
-            from_num = float(from_val) if from_val is not None else None
-            to_num = float(to_val) if to_val is not None else None
-            
-            if test_num is None or from_num is None or to_num is None:
-                return False
-            
-            result = from_num <= test_num <= to_num
-            logging.debug(f"  inRange({test_num}, {from_num}, {to_num}) = {result}")
-            return result
-        except (ValueError, TypeError):
-            return False
-    
-    else:
-        # Unknown function - log warning and return True (permissive)
-        logging.warning(f"Unknown FnO function '{function_name}' - assuming true")
-        return True
+            with timing.span("download"):
+                downloaded_file(uri, download_to(uri, file, authorization))
+        except Exception:
+            file.close()
+            raise
+        file.seek(0)
+        return file
+    elif uri_parsed.scheme == "file":
+        return open(unquote(uri_parsed.path), "rb")
+    raise HTTPException(
+        status_code=400, detail="unknown scheme {}".format(uri_parsed.scheme)
+    )
 
 
-def evaluate_condition(condition_dict: dict, data_item: dict, prefixes: dict) -> bool:
-    """
-    Evaluate a YARRRML condition against a data item.
-    
-    Args:
-        condition_dict: Condition from YARRRML mapping
-            Example: {
-                "function": "equal",
-                "parameters": [
-                    ["str1", "$(label)"],
-                    ["str2", "aktuelle Probe"]
-                ]
-            }
-        data_item: Single JSON object from iterator
-        prefixes: Dict of prefix -> namespace URL mappings
-        
-    Returns:
-        True if condition evaluates to true, False otherwise
-    """
-    if not condition_dict:
-        # No condition means always applicable
-        return True
-    
-    function_ref = condition_dict.get("function")
-    if not function_ref:
-        logging.warning("Condition missing 'function' field - assuming true")
-        return True
-    
-    # Normalize function name
-    function_name = normalize_function_name(function_ref, prefixes)
-    
-    # Extract parameters
-    param_list = condition_dict.get("parameters", [])
-    parameters = {}
-    
-    for param in param_list:
-        if isinstance(param, list) and len(param) == 2:
-            param_name = param[0]
-            param_value = param[1]
-            
-            # Extract actual value if it's a JSONPath expression
-            actual_value = extract_jsonpath_value(param_value, data_item)
-            parameters[param_name] = actual_value
-    
-    # Evaluate the function
-    return evaluate_fno_function(function_name, parameters)
+async def async_open_file(uri: AnyUrl, authorization=None) -> Tuple[bytes, str]:
+    """Fetch a file like open_file without blocking the event loop."""
+    uri_parsed = parse_uri(uri)
+    if uri_parsed.scheme in ["https", "http"]:
+        return downloaded_file(uri, await async_cached_get(uri, authorization))
+    elif uri_parsed.scheme == "file":
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            download_executor, read_local_file, unquote(uri_parsed.path)
+        )
+    raise HTTPException(
+        status_code=400, detail="unknown scheme {}".format(uri_parsed.scheme)
+    )
+
+
+from jsonpath_ng.exceptions import JsonPathParserError
+from jsonpath_cache import compile_jsonpath, field_reference
+from conditions import compile_condition, evaluate_fno_function
 
 
 # ============================================================================
@@ -681,11 +810,20 @@ def extract_jsonld_namespaces(content: bytes) -> tuple[dict, str | None]:
     """
     import json
     
+    try:
+        json_data = json.loads(content)
+    except Exception as e:
+        logging.warning(f"Could not extract context from JSON-LD: {e}")
+        return {}
+    return jsonld_context_namespaces(json_data)
+
+
+def jsonld_context_namespaces(json_data) -> dict:
+    """Extract namespace bindings from the @context of decoded JSON-LD, see extract_jsonld_namespaces."""
     namespace_dict = {}
     csv_namespace = None
     
     try:
-        json_data = json.loads(content)
         ctx = json_data.get("@context", [])
         
         # Context can be a list or dict
@@ -746,94 +884,137 @@ def detect_data_format(content: bytes, url: str) -> tuple[str | None, bool]:
     )
 
 
+class ParsedSource:
+    """A data source of one request, parsed at most once.
+
+    JSON and JSON-LD are decoded once and handed to the mapper as they are.
+    Other RDF formats are parsed into a graph once, the JSON-LD view for the
+    mapper is serialized from that graph on first use. The graph, the decoded
+    JSON and the namespaces are all derived lazily, so apply_mapping,
+    check_mapping and /api/test can share one instance per source.
+    """
+
+    def __init__(self, content: bytes | str, url: str):
+        self.content = content
+        self.url = url
+        self._json = None
+        self._graph = None
+        self._mapper_content = None
+        self._namespaces = None
+        # the leading bytes tell JSON from other RDF formats, so only documents
+        # that look like JSON are decoded, and only once
+        sniffed = json_codec.sniff(content)
+        if sniffed not in ("xml", "rdf"):
+            # Try to parse as JSON/JSON-LD first (most common case)
+            try:
+                self._json = json_codec.loads(content)
+                self.is_rdf = False
+                self.format = "json"
+                logging.info("Content detected as JSON/JSON-LD - preserving original structure")
+                return
+            except ValueError:
+                pass
+        # Not JSON - must be other RDF format (Turtle, RDF/XML, etc.)
+        logging.info("Content is not JSON - checking for other RDF formats")
+        self.is_rdf = True
+        self.format = guess_format(url) or ("xml" if sniffed == "xml" else None)
+        if not self.format:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Could not determine data format from URL: {url}",
+            )
+
+    @property
+    def graph(self) -> Optional[Graph]:
+        """The parsed graph of non-JSON RDF sources, None for JSON and JSON-LD."""
+        if self.is_rdf and self._graph is None:
+            try:
+                logging.info(f"Loading {self.url} as RDF in {self.format} format")
+                graph = Graph()
+                graph.parse(data=self.content, format=self.format)
+            except Exception as e:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"Could not read source {self.url} - not valid RDF or JSON format: {str(e)}",
+                ) from e
+            self._graph = graph
+        return self._graph
+
+    @property
+    def namespaces(self) -> dict:
+        """Namespaces of the JSON-LD @context, empty for other formats."""
+        if self._namespaces is None:
+            self._namespaces = {} if self.is_rdf else jsonld_context_namespaces(self._json)
+            logging.debug(f"Extracted {len(self._namespaces)} namespaces from JSON-LD @context")
+        return self._namespaces
+
+    @property
+    def mapper_content(self) -> bytes | str:
+        """The source as JSON(-LD) document for the RML mapper, JSON as received."""
+        if self._mapper_content is None:
+            if not self.is_rdf:
+                # Return as-is - NO TRANSFORMATION!
+                self._mapper_content = self.content
+            else:
+                # Convert to JSON-LD with minimal context
+                # We must do this for non-JSON formats, but keep it minimal
+                context = get_standard_jsonld_context()
+                context.update(self.namespaces)
+                try:
+                    self._mapper_content = self.graph.serialize(format="json-ld", context=context)
+                except HTTPException:
+                    raise
+                except Exception as e:
+                    raise HTTPException(
+                        status_code=422,
+                        detail=f"Could not read source {self.url} - not valid RDF or JSON format: {str(e)}",
+                    ) from e
+                logging.info(f"Converted {self.format} to JSON-LD (minimal transformation)")
+        return self._mapper_content
+
+    @property
+    def json(self):
+        """The decoded JSON, for RDF sources the JSON-LD view the mapper gets."""
+        if self._json is None:
+            self._json = json_codec.loads(self.mapper_content)
+        return self._json
+
+
+def parsed_source(
+    parsed_sources: Optional[dict], content: bytes | str, url: str
+) -> ParsedSource:
+    """Return the ParsedSource of url from parsed_sources, parsing content on first use."""
+    if parsed_sources is None:
+        return ParsedSource(content, url)
+    source = parsed_sources.get(url)
+    if source is None:
+        source = parsed_sources[url] = ParsedSource(content, url)
+    return source
+
+
 def process_data_to_jsonld(
     content: bytes, 
     url: str,
     preserve_namespaces: bool = True
 ) -> tuple[str, bool, str | None]:
-    """Process data content to JSON-LD format for RML mapper.
+    """Process data content to JSON-LD format for RML mapper, see ParsedSource.
     
     PRESERVES ORIGINAL STRUCTURE - no normalization/transformation!
     
-    Args:
-        content: Data content as bytes
-        url: Source URL
-        preserve_namespaces: Whether to preserve original namespaces from JSON-LD
-        
     Returns:
-        Tuple of (processed_content, is_rdf_data, csv_namespace)
+        Tuple of (processed_content, is_rdf_data, namespaces)
         - processed_content: Data in JSON-LD format as string (structure preserved!)
         - is_rdf_data: True if source was non-JSON-LD RDF, False if JSON/JSON-LD
-        - csv_namespace: CSV namespace if found in original data, else None
+        - namespaces: Namespaces of the JSON-LD @context if preserve_namespaces
         
     Raises:
         HTTPException: If data processing fails
     """
-    import json
-    
-    # ALWAYS try to extract @context from JSON FIRST, before any RDF parsing
-    namespace_dict = None
-    csv_namespace = None
-    if preserve_namespaces:
-        try:
-            namespace_dict = extract_jsonld_namespaces(content)
-            logging.debug(f"Extracted {len(namespace_dict)} namespaces from JSON-LD @context")
-        except Exception as e:
-            logging.debug(f"No JSON @context found (file may not be JSON or JSON-LD): {e}")
-    
-    # Try to parse as JSON/JSON-LD first (most common case)
-    try:
-        json_data = json.loads(content)
-        logging.info("Content detected as JSON/JSON-LD - preserving original structure")
-        
-        # Check if it's JSON-LD (has @context)
-        has_context = "@context" in json_data if isinstance(json_data, dict) else False
-        
-        # Return as-is - NO TRANSFORMATION!
-        processed_content = content.decode() if isinstance(content, bytes) else content
-        
-        # is_rdf_data = False means "don't add data_graph to final output"
-        # For JSON-LD, RML mapper will handle everything
-        return processed_content, False, namespace_dict
-        
-    except (json.JSONDecodeError, ValueError):
-        # Not JSON - must be other RDF format (Turtle, RDF/XML, etc.)
-        logging.info("Content is not JSON - checking for other RDF formats")
-    
-    # Try as non-JSON RDF format (Turtle, RDF/XML, N-Triples, etc.)
-    data_format = guess_format(url)
-    if not data_format:
-        raise HTTPException(
-            status_code=422,
-            detail=f"Could not determine data format from URL: {url}",
-        )
-    
-    try:
-        logging.info(f"Loading {url} as RDF in {data_format} format")
-        
-        # Parse as RDF
-        temp_graph = Graph()
-        temp_graph.parse(data=content, format=data_format)
-        
-        # Convert to JSON-LD with minimal context
-        # We must do this for non-JSON formats, but keep it minimal
-        context = get_standard_jsonld_context()
-        if namespace_dict:
-            context.update(namespace_dict)
-        
-        processed_content = temp_graph.serialize(format="json-ld", context=context)
-        logging.info(f"Converted {data_format} to JSON-LD (minimal transformation)")
-        
-        # is_rdf_data = True means "this was originally RDF, may need data_graph"
-        return processed_content, True, namespace_dict
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=422,
-            detail=f"Could not read source {url} - not valid RDF or JSON format: {str(e)}",
-        ) from e
+    source = ParsedSource(content, url)
+    return source.mapper_content, source.is_rdf, source.namespaces if preserve_namespaces else None
 
 
+@timing.timed("yarrrml")
 def convert_yarrrml_to_rml(mapping_data: bytes | str) -> str:
     """Convert YARRRML to RML format via web API.
     
@@ -843,14 +1024,65 @@ def convert_yarrrml_to_rml(mapping_data: bytes | str) -> str:
     Returns:
         RML rules as string in Turtle format
         
+    Results are cached by a hash of the YARRRML content, so repeated conversions
+    of the same mapping skip the call to the YARRRML parser service.
+
     Raises:
         requests.RequestException: If conversion fails
     """
-    response = requests.post(YARRRML_URL, data={"yarrrml": mapping_data})
-    response.raise_for_status()
+    if isinstance(mapping_data, str):
+        mapping_data = mapping_data.encode("utf-8")
+    key = content_key(mapping_data)
+    cached = rml_cache.get(key)
+    if cached is not None:
+        logging.debug(f"YARRRML to RML cache hit: {key}")
+        return cached.decode("utf-8")
+    with metrics.remote_call("yarrrml"):
+        response = get_session().post(YARRRML_URL, data={"yarrrml": mapping_data})
+        response.raise_for_status()
+    rml_cache.put(key, response.text.encode("utf-8"))
+    return response.text
+
+
+@timing.timed("yarrrml")
+async def async_convert_yarrrml_to_rml(mapping_data: bytes | str) -> str:
+    """Convert YARRRML to RML like convert_yarrrml_to_rml without blocking the event loop.
+
+    Raises:
+        httpx.HTTPError: If conversion fails
+    """
+    if isinstance(mapping_data, bytes):
+        mapping_data = mapping_data.decode("utf-8")
+    key = content_key(mapping_data.encode("utf-8"))
+    cached = rml_cache.get(key)
+    if cached is not None:
+        logging.debug(f"YARRRML to RML cache hit: {key}")
+        return cached.decode("utf-8")
+    with metrics.remote_call("yarrrml"):
+        async with host_slot(YARRRML_URL) as client:
+            response = await client.post(YARRRML_URL, data={"yarrrml": mapping_data})
+        response.raise_for_status()
+    rml_cache.put(key, response.text.encode("utf-8"))
     return response.text
 
 
+def get_rule_template(rml_rules: str) -> RuleTemplate:
+    """Return the cached rule template for RML rules, building it on first use.
+
+    Args:
+        rml_rules: RML rules in Turtle format
+
+    Returns:
+        RuleTemplate ready to render the rules for a request
+    """
+    key = content_key(rml_rules)
+    rule_template = rule_template_cache.get(key)
+    if rule_template is None:
+        rule_template = RuleTemplate(rml_rules)
+        rule_template_cache.put(key, rule_template)
+    return rule_template
+
+
 def parse_and_replace_rml_source(rml_rules: str, source_placeholder: str) -> str:
     """Parse RML rules and replace data source with placeholder.
     
@@ -870,6 +1102,44 @@ def parse_and_replace_rml_source(rml_rules: str, source_placeholder: str) -> str
     return rml_graph.serialize(format="ttl")
 
 
+def mapper_payload(rml_rules: str, sources: dict, serialization: str) -> dict:
+    return {
+        "rml": rml_rules,
+        # the web API takes every source as JSON string
+        "sources": {
+            name: content.decode("utf-8") if isinstance(content, bytes) else content
+            for name, content in sources.items()
+        },
+        "serialization": serialization,
+    }
+
+
+def mapper_output(response) -> str:
+    """Return the output of an RML mapper response, see execute_rml_mapper."""
+    logging.debug(f"RML Mapper response status: {response.status_code}")
+
+    if response.status_code == 503:
+        # the warm mapper pool is saturated, let the client retry later
+        logging.warning("RML mapper queue is full")
+        raise HTTPException(
+            status_code=503,
+            detail="RML mapper is busy, retry later",
+            headers={"Retry-After": response.headers.get("Retry-After", "1")},
+        )
+    if response.status_code != 200:
+        logging.error(f"RML Mapper error response: {response.text}")
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"RML mapper failed: {response.text}"
+        )
+
+    result = response.json()["output"]
+    logging.debug(f"RML Mapper output length: {len(result)} chars")
+
+    return result
+
+
+@timing.timed("mapper")
 def execute_rml_mapper(
     rml_rules: str,
     sources: dict[str, str],
@@ -879,41 +1149,24 @@ def execute_rml_mapper(
     
     Args:
         rml_rules: RML rules in Turtle format
-        sources: Dict of {placeholder_filename: content_string}
+        sources: Dict of {placeholder_filename: content as str or utf-8 bytes}
         serialization: Output format (default: 'turtle')
         
     Returns:
         Mapping output as string
         
     Raises:
-        HTTPException: If mapper fails
+        HTTPException: If mapper fails, 503 with Retry-After if the mapper
+            worker pool has no queue capacity left
     """
-    payload = {
-        "rml": rml_rules,
-        "sources": sources,
-        "serialization": serialization,
-    }
+    payload = mapper_payload(rml_rules, sources, serialization)
     
     logging.debug(f"Calling RML mapper at: {MAPPER_URL}/execute")
     logging.debug(f"Number of sources: {len(sources)}")
     
     try:
-        response = requests.post(MAPPER_URL + "/execute", json=payload)
-        
-        logging.debug(f"RML Mapper response status: {response.status_code}")
-        
-        if response.status_code != 200:
-            logging.error(f"RML Mapper error response: {response.text}")
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"RML mapper failed: {response.text}"
-            )
-        
-        result = response.json()["output"]
-        logging.debug(f"RML Mapper output length: {len(result)} chars")
-        
-        return result
-        
+        with metrics.remote_call("mapper"):
+            return mapper_output(get_session().post(MAPPER_URL + "/execute", json=payload))
     except requests.RequestException as e:
         logging.error(f"Exception calling RML mapper: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -922,37 +1175,110 @@ def execute_rml_mapper(
         ) from e
 
 
-def download_sources(
+@timing.timed("mapper")
+async def async_execute_rml_mapper(
+    rml_rules: str,
+    sources: dict[str, str],
+    serialization: str = "turtle"
+) -> str:
+    """Execute RML mapper web API like execute_rml_mapper without blocking the event loop."""
+    payload = mapper_payload(rml_rules, sources, serialization)
+    logging.debug(f"Calling RML mapper at: {MAPPER_URL}/execute")
+    try:
+        with metrics.remote_call("mapper"):
+            async with host_slot(MAPPER_URL) as client:
+                response = await client.post(MAPPER_URL + "/execute", json=payload)
+            return mapper_output(response)
+    except (httpx.HTTPError, ValueError) as e:
+        logging.error(f"Exception calling RML mapper: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Could not generate mapping results with rmlmapper: {str(e)}",
+        ) from e
+
+
+def timed_open_file(uri: AnyUrl, authorization=None) -> Tuple[bytes, str, float]:
+    """Fetch a file like open_file and measure how long the fetch took.
+
+    Returns:
+        Tuple of (filedata, filename, seconds)
+    """
+    start = time.perf_counter()
+    filedata, filename = open_file(uri, authorization)
+    elapsed = time.perf_counter() - start
+    logging.info(f"Fetched {uri} ({len(filedata)} bytes) in {elapsed:.3f}s")
+    return filedata, filename, elapsed
+
+
+def submit_download(uri: AnyUrl, authorization=None) -> Future:
+    """Start fetching a file on the shared download executor.
+
+    The future resolves to the result of timed_open_file.
+    """
+    return download_executor.submit(timed_open_file, uri, authorization)
+
+
+async def async_timed_open_file(uri: AnyUrl, authorization=None) -> Tuple[bytes, str, float]:
+    """Fetch a file like async_open_file and measure how long the fetch took, see timed_open_file."""
+    start = time.perf_counter()
+    filedata, filename = await async_open_file(uri, authorization)
+    elapsed = time.perf_counter() - start
+    logging.info(f"Fetched {uri} ({len(filedata)} bytes) in {elapsed:.3f}s")
+    return filedata, filename, elapsed
+
+
+@timing.timed("mapper")
+def execute_native_mapping(
+    rml_rules: str,
+    sources: dict[str, str],
+    base_uri: str = "",
+    rule_triples: Optional[dict] = None,
+) -> Graph:
+    """Execute RML rules in process and return the generated graph.
+
+    Args:
+        rml_rules: RML rules in Turtle format
+        sources: Dict of {placeholder_filename: JSON content or decoded document}
+        base_uri: Base IRI for relative IRIs generated by the rules
+        rule_triples: Dict filled with {rule name: generated triples}
+
+    Returns:
+        Graph with the mapping output
+
+    Raises:
+        UnsupportedMappingError: If the rules use features the native engine lacks
+    """
+    key = content_key(rml_rules)
+    plan = rml_plan_cache.get(key)
+    if plan is None:
+        plan = RMLPlan(rml_rules)
+        rml_plan_cache.put(key, plan)
+    logging.debug(f"Executing {len(plan.triples_maps)} triples maps with the native RML engine")
+    return plan.execute(sources, base_uri, evaluate_fno_function, rule_triples=rule_triples)
+
+
+def plan_sources(
     sources: dict,
     opt_data_url: str | None = None,
-    authorization: str | None = None,
     injected_content: Optional[bytes] = None,
-) -> tuple[dict, str, str]:
-    """Download all sources from mapping and build URL mapping.
-    
-    Args:
-        sources: Sources dict from YARRRML mapping
-        opt_data_url: Optional override URL for first source
-        authorization: Authorization header value
-        
+) -> tuple[list, str, list]:
+    """Decide where each source of a mapping is read from, see download_sources.
+
     Returns:
-        Tuple of (url_mapping, primary_data_url, filename)
-        - url_mapping: Dict mapping original_url -> {placeholder, content, actual_url, original_url}
+        Tuple of (planned, primary_data_url, urls)
+        - planned: (original_url, actual_url, placeholder, use_injected) per source
         - primary_data_url: The primary data URL (first source)
-        - filename: Suggested output filename
-        
-    Raises:
-        HTTPException: If download fails
+        - urls: Distinct URLs to download
     """
     if not sources:
         raise HTTPException(
             status_code=422, detail="No sources found in mapping file"
         )
-    
-    url_mapping = {}
+
     counter = 1
     primary_data_url = None
-    filename = "data-joined.ttl"
+    urls = []
+    planned = []
     
     for source_name, source_def in sources.items():
         # Strip trailing slash only for downloading - preserve for namespace matching later
@@ -967,40 +1293,124 @@ def download_sources(
             else:
                 actual_url = original_url_for_download
                 primary_data_url = original_url
+            primary_actual_url = actual_url
         else:
             actual_url = original_url_for_download
         
         placeholder = f"source_{counter}.json"
 
-        # Use injected content for any source whose URL resolves to opt_data_url.
-        # This covers mappings where multiple sources reference the same file
-        # (all replaced by Phase 0) so none of them need to be fetched.
-        use_injected = (
-            injected_content is not None
-            and opt_data_url is not None
-            and actual_url == opt_data_url.strip("/")
-        )
+        # Use injected content for any source whose URL resolves to the primary
+        # data URL (opt_data_url if given). This covers mappings where multiple
+        # sources reference the same file (all replaced by Phase 0) so none of
+        # them need to be fetched.
+        use_injected = injected_content is not None and actual_url == primary_actual_url
         if use_injected:
             logging.debug(f"Using injected content for source {source_name} (url: {actual_url})")
+        elif actual_url not in urls:
+            logging.debug(f"Downloading source {source_name} from {actual_url}")
+            urls.append(actual_url)
+        planned.append((original_url, actual_url, placeholder, use_injected))
+        counter += 1
+    return planned, primary_data_url, urls
+
+
+def collect_sources(
+    planned: list, downloads: dict, injected_content: Optional[bytes] = None
+) -> tuple[dict, str]:
+    """Build the URL mapping from downloaded sources, see download_sources.
+
+    Args:
+        planned: Sources planned by plan_sources
+        downloads: Dict of URL -> result of timed_open_file
+
+    Returns:
+        Tuple of (url_mapping, filename)
+    """
+    url_mapping = {}
+    filename = "data-joined.ttl"
+    for counter, (original_url, actual_url, placeholder, use_injected) in enumerate(planned, 1):
+        if use_injected:
             data_content = injected_content
             data_filename = actual_url.rstrip("/").split("/")[-1]
+            fetch_seconds = 0.0
         else:
-            logging.debug(f"Downloading source {source_name} from {actual_url}")
-            data_content, data_filename = open_file(actual_url, authorization)
-        
+            data_content, data_filename, fetch_seconds = downloads[actual_url]
+
         url_mapping[original_url] = {
             "placeholder": placeholder,
             "content": data_content,
             "original_url": original_url,
-            "actual_url": actual_url
+            "actual_url": actual_url,
+            "fetch_seconds": fetch_seconds,
         }
-        
+
         # Store filename from first source
         if counter == 1:
             filename = data_filename.rsplit(".", 1)[0].rsplit("-", 1)[0] + "-joined.ttl"
-        
-        counter += 1
+
+    logging.info(
+        f"Downloaded {len(downloads)} distinct source(s) for {len(planned)} source definition(s)"
+    )
+    return url_mapping, filename
+
+
+@timing.timed("download")
+def download_sources(
+    sources: dict,
+    opt_data_url: str | None = None,
+    authorization: str | None = None,
+    injected_content: Optional[bytes] = None,
+) -> tuple[dict, str, str]:
+    """Download all sources from mapping and build URL mapping.
+
+    Sources are fetched concurrently on the shared download executor; a URL
+    referenced by several sources is only fetched once.
     
+    Args:
+        sources: Sources dict from YARRRML mapping
+        opt_data_url: Optional override URL for first source
+        authorization: Authorization header value
+        injected_content: Content of the primary data source, used instead of
+            downloading it for every source reading the same URL
+        
+    Returns:
+        Tuple of (url_mapping, primary_data_url, filename)
+        - url_mapping: Dict mapping original_url -> {placeholder, content, actual_url, original_url, fetch_seconds}
+        - primary_data_url: The primary data URL (first source)
+        - filename: Suggested output filename
+        
+    Raises:
+        HTTPException: If download fails
+    """
+    planned, primary_data_url, urls = plan_sources(sources, opt_data_url, injected_content)
+    futures = {url: submit_download(url, authorization) for url in urls}
+    try:
+        downloads = {url: future.result() for url, future in futures.items()}
+    except Exception:
+        for future in futures.values():
+            future.cancel()
+        raise
+    url_mapping, filename = collect_sources(planned, downloads, injected_content)
+    return url_mapping, primary_data_url, filename
+
+
+@timing.timed("download")
+async def async_download_sources(
+    sources: dict,
+    opt_data_url: str | None = None,
+    authorization: str | None = None,
+    injected_content: Optional[bytes] = None,
+) -> tuple[dict, str, str]:
+    """Download all sources like download_sources, concurrently on the event loop."""
+    planned, primary_data_url, urls = plan_sources(sources, opt_data_url, injected_content)
+    tasks = [asyncio.ensure_future(async_timed_open_file(url, authorization)) for url in urls]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    url_mapping, filename = collect_sources(planned, dict(zip(urls, results)), injected_content)
     return url_mapping, primary_data_url, filename
 
 
@@ -1012,66 +1422,14 @@ def replace_base_uris(graph: Graph, base_uri: str) -> Graph:
         base_uri: Base URI to use (e.g., 'http://example.org/' or '#' for relative)
         
     Returns:
-        Modified graph with replaced URIs
+        New graph with replaced URIs, the given graph if base_uri is empty
     """
-    if not base_uri:
+    rewriter = base_uri_rewriter(base_uri)
+    if rewriter is None:
         return graph
-    
-    # Handle different base formats
-    # - Full URI: "http://purl.matolab.org/mseo/mappings/" 
-    # - Relative: "#"
-    # Ensure trailing separator if not "#" and doesn't already have one
-    if base_uri != "#":
-        if not base_uri.endswith(("/", "#")):
-            base_uri += "/"
-    
-    logging.info(f"Replacing http://example.com URIs with base: {base_uri}")
-    
-    triples_to_replace = []
-    for s, p, o in graph:
-        new_s, new_p, new_o = s, p, o
-        changed = False
-        
-        # Replace subjects starting with http://example.com
-        if isinstance(s, URIRef) and str(s).startswith("http://example.com"):
-            local_part = str(s).replace("http://example.com", "")
-            if base_uri == "#":
-                new_s = URIRef("#" + local_part)
-            else:
-                new_s = URIRef(base_uri + local_part)
-            changed = True
-            logging.debug(f"  Subject: {s} -> {new_s}")
-        
-        # Replace predicates starting with http://example.com (rare but possible)
-        if isinstance(p, URIRef) and str(p).startswith("http://example.com"):
-            local_part = str(p).replace("http://example.com", "")
-            if base_uri == "#":
-                new_p = URIRef("#" + local_part)
-            else:
-                new_p = URIRef(base_uri + local_part)
-            changed = True
-            logging.debug(f"  Predicate: {p} -> {new_p}")
-        
-        # Replace objects starting with http://example.com
-        if isinstance(o, URIRef) and str(o).startswith("http://example.com"):
-            local_part = str(o).replace("http://example.com", "")
-            if base_uri == "#":
-                new_o = URIRef("#" + local_part)
-            else:
-                new_o = URIRef(base_uri + local_part)
-            changed = True
-            logging.debug(f"  Object: {o} -> {new_o}")
-        
-        if changed:
-            triples_to_replace.append(((s, p, o), (new_s, new_p, new_o)))
-    
-    # Apply replacements
-    for old_triple, new_triple in triples_to_replace:
-        graph.remove(old_triple)
-        graph.add(new_triple)
-    
-    if triples_to_replace:
-        logging.info(f"✓ Replaced {len(triples_to_replace)} triples with base URI: {base_uri}")
+    graph = rewriter.rewrite_graph(graph)
+    if rewriter.rewritten_terms:
+        logging.info(f"✓ Replaced {rewriter.rewritten_terms} terms with base URI: {base_uri}")
     else:
         logging.info("No http://example.com URIs found to replace")
     
@@ -1083,161 +1441,343 @@ def replace_base_uris(graph: Graph, base_uri: str) -> Graph:
 # ============================================================================
 
 
-def apply_all_namespaces(
-    graph: Graph,
-    accumulated_namespaces: dict,
-    data_namespace: str | None,
-    method_namespace: str | None
-) -> Graph:
-    """Centralized namespace binding routine - call ONCE before serialization.
-    
-    Args:
-        graph: The RDF graph to bind namespaces to
-        accumulated_namespaces: Dict of {prefix: namespace_url} from template/mapping
-        csv_namespace: CSV namespace from JSON-LD @context (highest priority)
-        data_namespace: Data namespace from primary data URL
-        method_namespace: Method namespace from YARRRML mapping prefixes
-        
-    Returns:
-        The graph with all namespaces properly bound
+class PreparedMapping:
+    """A YARRRML mapping fetched, validated and converted once.
+
+    Holds everything about a mapping that does not depend on the data it is
+    applied to, so /api/createrdf/batch can reuse it for many data items. The
+    RML conversion and the template graph are loaded on first use and shared
+    between threads.
     """
-    logging.info("=" * 80)
-    logging.info("APPLYING ALL NAMESPACES (CENTRALIZED)")
-    logging.info("=" * 80)
-    
-    # 1. Bind empty prefix for relative IRIs (e.g., :SpecimenID)
-    graph.namespace_manager.bind("", Namespace(""), override=True, replace=True)
-    logging.info("✓ Bound empty prefix '' to empty namespace")
-    
-    # 2. Bind 'base' prefix to empty namespace
-    graph.namespace_manager.bind("base", Namespace(""), override=True, replace=True)
-    logging.info("✓ Bound 'base' prefix to empty namespace")
-    logging.debug(accumulated_namespaces)
-    # 3. Bind all accumulated namespaces from template/mapping graphs
-    logging.info(f"Binding {len(accumulated_namespaces)} accumulated namespaces:")
-    for prefix, namespace_str in accumulated_namespaces.items():
-        graph.namespace_manager.bind(prefix, Namespace(namespace_str), override=True)
-        logging.info(f"  ✓ {prefix}: {namespace_str}")
-    
-    
-    # 6. Log final namespace bindings
-    logging.info("=" * 80)
-    logging.info("FINAL NAMESPACE BINDINGS IN GRAPH:")
-    for prefix, namespace in graph.namespaces():
-        logging.info(f"  {prefix or '(empty)'}: {namespace}")
-    logging.info("=" * 80)
-    
-    return graph
 
+    def __init__(
+        self, mapping_url: AnyUrl, authorization=None,
+        mapping_file: Optional[Tuple[bytes, str]] = None, submit=submit_download,
+    ):
+        """Fetch and validate a mapping and start the download of its template graph.
+
+        Args:
+            mapping_url: URL to YARRRML mapping file
+            authorization: Authorization header value
+            mapping_file: Mapping content and filename if already fetched
+            submit: Function starting a download like submit_download
+        """
+        self.mapping_url = mapping_url
+        self.authorization = authorization
+        if mapping_file is None:
+            with timing.span("download"):
+                mapping_file = open_file(mapping_url, authorization)
+        self.mapping_data, self.mapping_filename = mapping_file
+        try:
+            self.mapping_dict = yaml.safe_load(self.mapping_data)
+        except yaml.YAMLError as e:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Could not read mapping file - is it valid YAML format? {str(e)}"
+            ) from e
 
-def add_prov(graph: Graph, api_url: str, data_url: str, used: list = []) -> Graph:
-    """Add prov-o information to output graph
+        # VALIDATE: Check for unsupported iterators before processing
+        is_valid, error_msg, num_rules = validate_mapping_sources(self.mapping_dict)
+        if not is_valid:
+            logging.error(f"Iterator validation failed: {error_msg}")
+            raise HTTPException(
+                status_code=422,
+                detail=error_msg
+            )
+        logging.info(f"✓ Iterator validation passed - all iterators are supported")
 
-    Args:
-        graph (Graph): Graph to add prov information to
-        api_url (str): the api url
-        data_url (str): the url to the rdf file that was used
+        # Check if template prefix exists (optional feature), the template graph
+        # is fetched concurrently with the data sources
+        self.template_url = self.mapping_dict.get("prefixes", {}).get("template", None)
+        self.template_download = (
+            submit(self.template_url, authorization) if self.template_url else None
+        )
+        self._rml_rules = None
+        self._template = None
+        self._row_template = None
+        self._lock = threading.Lock()
 
-    Returns:
-        Graph: Input Graph with prov metadata of the api call
-    """
-    graph.bind("prov", PROV)
-
-    root = BNode()
-    api_node = URIRef(api_url)
-    graph.add((root, PROV.wasGeneratedBy, api_node))
-    graph.add((api_node, RDF.type, PROV.Activity))
-    software_node = URIRef(setting.source + "/releases/tag/" + setting.version)
-    graph.add((api_node, PROV.wasAssociatedWith, software_node))
-    graph.add((software_node, RDF.type, PROV.SoftwareAgent))
-    graph.add((software_node, RDFS.label, Literal(setting.name + setting.version)))
-    graph.add((software_node, PROV.hadPrimarySource, URIRef(setting.source)))
-    graph.add(
-        (
-            root,
-            PROV.generatedAtTime,
-            Literal(str(datetime.now().isoformat()), datatype=XSD.dateTime),
+    @classmethod
+    async def create_async(cls, mapping_url: AnyUrl, authorization=None) -> "PreparedMapping":
+        """Prepare a mapping without blocking the event loop.
+
+        The mapping and the template graph are downloaded on the running event
+        loop, the template download resolves while the loop keeps running.
+        """
+        loop = asyncio.get_running_loop()
+
+        def submit(uri, authorization):
+            return asyncio.run_coroutine_threadsafe(async_timed_open_file(uri, authorization), loop)
+
+        with timing.span("download"):
+            mapping_file = await async_open_file(mapping_url, authorization)
+        return cls(mapping_url, authorization, mapping_file, submit)
+
+    @property
+    def mapping_text(self) -> str:
+        if isinstance(self.mapping_data, bytes):
+            return self.mapping_data.decode("utf-8")
+        return self.mapping_data
+
+    @property
+    def rml_rules(self) -> str:
+        """RML rules converted from the unmodified mapping."""
+        if self._rml_rules is None:
+            with self._lock:
+                if self._rml_rules is None:
+                    self._rml_rules = convert_yarrrml_to_rml(self.mapping_data)
+        return self._rml_rules
+
+    async def rml_rules_async(self) -> str:
+        """RML rules like rml_rules, converted without blocking the event loop."""
+        if self._rml_rules is None:
+            rml_rules = await async_convert_yarrrml_to_rml(self.mapping_data)
+            with self._lock:
+                if self._rml_rules is None:
+                    self._rml_rules = rml_rules
+        return self._rml_rules
+
+    def cancel(self) -> None:
+        if self.template_download:
+            self.template_download.cancel()
+
+    async def template_ready(self) -> None:
+        """Wait until the template graph is downloaded without blocking the event loop."""
+        if self.template_download:
+            await asyncio.wait([asyncio.wrap_future(self.template_download)])
+
+    def bind_data_url(self, opt_data_url: str | None) -> Tuple[dict, Optional[str]]:
+        """Return the mapping dict and data URL replaced in it for one request.
+
+        PHASE 0: if opt_data_url is given, all occurrences of the data URL of
+        the first source are replaced by it in the YARRRML.
+
+        Returns:
+            Tuple of (mapping_dict, replaced original data URL or None)
+        """
+        sources = self.mapping_dict.get("sources", {})
+        if not (opt_data_url and sources):
+            return copy.deepcopy(self.mapping_dict), None
+        first_source_name = next(iter(sources))
+        original_data_url = sources[first_source_name]["access"].strip("/")
+        mapping_dict = yaml.safe_load(
+            self.mapping_text.replace(original_data_url, opt_data_url.strip("/"))
         )
-    )
-    entity = URIRef(str(data_url))
-    graph.add((entity, RDF.type, PROV.Entity))
-    derivation = BNode()
-    graph.add((derivation, RDF.type, PROV.Derivation))
-    graph.add((derivation, PROV.entity, entity))
-    graph.add((derivation, PROV.hadActivity, api_node))
-    graph.add((root, PROV.qualifiedDerivation, derivation))
-    graph.add((root, PROV.wasDerivedFrom, entity))
-    if used:
-        [graph.add((api_node, PROV.wasInformedBy, URIRef(entry))) for entry in used]
-    return graph
+        logging.info(f"Replaced data source URL in YARRRML: {original_data_url} -> {opt_data_url}")
+        return mapping_dict, original_data_url
 
+    def rule_template(
+        self, mapping_dict: dict, original_data_url: str | None, opt_data_url: str | None
+    ):
+        """Step generator returning the RML rule template for a mapping dict from bind_data_url.
+
+        If the replaced data URL only occurs in source literals of the rules
+        converted from the unmodified mapping, those rules are reused and the
+        returned aliases map each rewritten source URL back to the URL in the
+        rules. Otherwise the rewritten YARRRML is converted on its own. The
+        conversions are yielded as IOCall, see pipeline.
+
+        Returns:
+            Tuple of (rule_template, source_aliases)
+        """
+        rml_rules = yield IOCall(lambda: self.rml_rules, self.rml_rules_async)
+        rule_template = get_rule_template(rml_rules)
+        if original_data_url is None:
+            return rule_template, {}
+        if rule_template.mentions(original_data_url):
+            # the URL is also used outside the sources, e.g. in subject templates
+            mapping_data = self.mapping_text.replace(original_data_url, opt_data_url.strip("/"))
+            rml_rules = yield IOCall(
+                convert_yarrrml_to_rml, async_convert_yarrrml_to_rml, mapping_data
+            )
+            return get_rule_template(rml_rules), {}
+        original_sources = self.mapping_dict.get("sources", {})
+        source_aliases = {
+            source_def["access"]: original_sources[name]["access"]
+            for name, source_def in mapping_dict.get("sources", {}).items()
+        }
+        return rule_template, source_aliases
+
+    def template(self) -> Tuple[Optional[Graph], Optional[str]]:
+        """Return the template graph and its serialization, loading them once.
+
+        The template base namespace is replaced by the template URL.
+        """
+        if not self.template_url:
+            return None, None
+        with self._lock:
+            if self._template is None:
+                self._template = self._load_template()
+        return self._template
+
+    def row_template(self) -> TripleTemplate:
+        """Return the template graph compiled for instantiation per table row, once."""
+        template_graph, _ = self.template()
+        with self._lock:
+            if self._row_template is None:
+                template_url = self.template_url
+                if not template_url.endswith("/"):
+                    template_url += "/"
+                self._row_template = TripleTemplate(template_graph, template_url)
+        return self._row_template
+
+    def _load_template(self) -> Tuple[Graph, str]:
+        template_url = self.template_url
+        logging.info(f"📄 Template prefix found - loading template graph from: {template_url}")
+        try:
+            templatedata, template_filename, _ = self.template_download.result()
+            template_graph = Graph()
+            template_graph.parse(data=templatedata, format="ttl")
+            
+            # STEP 1: Replace template namespace if it has base namespace
+            base_namespace = None
+            for ns_prefix, namespace in template_graph.namespaces():
+                if ns_prefix in ["base", ""]:
+                    base_namespace = namespace
+            
+            # Ensure template_url ends with /
+            if not template_url.endswith("/"):
+                template_url += "/"
+            
+            if base_namespace:
+                logging.info(f"Replacing template base namespace {base_namespace} with {template_url}")
+                template_content = template_graph.serialize().replace(
+                    base_namespace, template_url
+                )
+                template_graph = Graph()
+                template_graph.parse(data=template_content)
+            else:
+                template_content = template_graph.serialize()
+            
+            logging.info(f"✓ Template graph loaded successfully ({len(template_graph)} triples)")
+        except Exception as e:
+            logging.error(f"Failed to load template graph: {str(e)}")
+            raise HTTPException(
+                status_code=422,
+                detail=f"Could not load template graph from {self.template_url}: {str(e)}",
+            ) from e
+        return template_graph, template_content
 
-def apply_mapping(
+
+def map_to_graph(
     mapping_url: AnyUrl, opt_data_url: AnyUrl = None, authorization=None, api_url: str = None,
-    data_content: Optional[str] = None,
-) -> Tuple[str, int, int]:
-    """Apply YARRRML mapping to data sources.
+    data_content: Optional[str] = None, engine: Optional[str] = None,
+    prepared: Optional[PreparedMapping] = None, provenance: bool = True,
+    parsed_sources: Optional[dict] = None, rule_statistics: Optional[list] = None,
+) -> Tuple[str, Graph, int, int]:
+    """Apply YARRRML mapping to data sources and return the joined graph.
 
     Args:
         mapping_url: URL to YARRRML mapping file
         opt_data_url: Optional override URL for first data source
         authorization: Authorization header value
         api_url: Full API URL (e.g., http://host:port/api/createrdf) for provenance
+        engine: "remote" or "native" RML execution, defaults to RML_ENGINE
+        prepared: Mapping already fetched and converted, e.g. by a batch request
+        provenance: Whether to add prov-o information to the joined graph
+        parsed_sources: Dict of source URL -> ParsedSource shared with other
+            steps of the request, filled with the sources parsed here
+        rule_statistics: List filled with the RuleStatistics of every rule,
+            collected from the same mapper run
 
     Returns:
-        Tuple of (filename, graph_output, num_rules_total, num_rules_applied)
+        Tuple of (filename, joined_graph, num_rules_total, num_rules_applied)
 
     Raises:
         HTTPException: If any step fails
     """
-    # Load and parse mapping file
-    mapping_data, mapping_filename = open_file(mapping_url, authorization)
-    try:
-        mapping_dict = yaml.safe_load(mapping_data)
-    except yaml.YAMLError as e:
-        raise HTTPException(
-            status_code=422,
-            detail=f"Could not read mapping file - is it valid YAML format? {str(e)}"
-        ) from e
+    filename, job, num_rules, num_applied = mapping_job(
+        mapping_url, opt_data_url, authorization, api_url, data_content, engine, prepared,
+        provenance, parsed_sources, rule_statistics is not None,
+    )
+    joined_graph = job.join()
+    metrics.observe_conversion(job.num_triples, job.input_bytes)
+    if rule_statistics is not None:
+        rule_statistics.extend(job.rule_statistics)
+    return filename, joined_graph, num_rules, num_applied
 
-    duplicate_for_table = mapping_dict.get("use_template_rowwise", False)
-    logging.info(f"use_template_rowwise: {duplicate_for_table}")
 
-    # VALIDATE: Check for unsupported iterators before processing
-    is_valid, error_msg, num_rules = validate_mapping_sources(mapping_dict)
-    if not is_valid:
-        logging.error(f"Iterator validation failed: {error_msg}")
-        raise HTTPException(
-            status_code=422,
-            detail=error_msg
+async def map_to_graph_async(
+    mapping_url: AnyUrl, opt_data_url: AnyUrl = None, authorization=None, api_url: str = None,
+    data_content: Optional[str] = None, engine: Optional[str] = None,
+    prepared: Optional[PreparedMapping] = None, provenance: bool = True,
+    parsed_sources: Optional[dict] = None, rule_statistics: Optional[list] = None,
+) -> Tuple[str, Graph, int, int]:
+    """Apply YARRRML mapping like map_to_graph without blocking the event loop.
+
+    Downloads and the calls to the YARRRML parser and the rmlmapper are
+    awaited on the event loop, the rdflib stages in between run on the cpu
+    executor, so a waiting request holds no thread.
+    """
+    async with admission.admit_async(authorization):
+        filename, job, num_rules, num_applied = await mapping_job_async(
+            mapping_url, opt_data_url, authorization, api_url, data_content, engine, prepared,
+            provenance, parsed_sources, rule_statistics is not None,
         )
-    
-    logging.info(f"✓ Iterator validation passed - all iterators are supported")
+        joined_graph = await run_cpu(job.join)
+    metrics.observe_conversion(job.num_triples, job.input_bytes)
+    if rule_statistics is not None:
+        rule_statistics.extend(job.rule_statistics)
+    return filename, joined_graph, num_rules, num_applied
+
+
+def mapping_job(
+    mapping_url: AnyUrl, opt_data_url: AnyUrl = None, authorization=None, api_url: str = None,
+    data_content: Optional[str] = None, engine: Optional[str] = None,
+    prepared: Optional[PreparedMapping] = None, provenance: bool = True,
+    parsed_sources: Optional[dict] = None, tag_rules: bool = False,
+) -> Tuple[str, GraphJob, int, int]:
+    """Run a mapping up to its output, see map_to_graph.
 
-    # PHASE 0: If opt_data_url is provided, replace the original data source URL in YARRRML
-    # This MUST happen BEFORE converting YARRRML to RML
-    sources = mapping_dict.get("sources", {})
-    if opt_data_url and sources:
-        # Get the first source URL (the one we want to replace)
-        first_source_name = next(iter(sources))
-        original_data_url = sources[first_source_name]["access"].strip("/")
+    With tag_rules, the output is kept apart per rule, so joining the job
+    fills its rule_statistics.
 
-        # Replace ALL occurrences of the original data URL with the new one in the YARRRML string
-        # This ensures the RML rules will have the correct URL from the start
-        if isinstance(mapping_data, bytes):
-            mapping_data_str = mapping_data.decode('utf-8')
-        else:
-            mapping_data_str = mapping_data
+    Returns:
+        Tuple of (filename, graph_job, num_rules_total, num_rules_applied),
+        the job holding the graph stages left to join the graph
+    """
+    if prepared is None:
+        prepared = PreparedMapping(mapping_url, authorization)
+    return run_steps(mapping_steps(
+        prepared, opt_data_url, authorization, api_url, data_content, engine, provenance,
+        parsed_sources, tag_rules,
+    ))
 
-        # Replace the data URL in the YARRRML content
-        mapping_data_str = mapping_data_str.replace(original_data_url, opt_data_url.strip("/"))
-        mapping_data = mapping_data_str.encode('utf-8') if isinstance(mapping_data, bytes) else mapping_data_str
 
-        # Re-parse the modified YAML to update mapping_dict
-        mapping_dict = yaml.safe_load(mapping_data)
-        sources = mapping_dict.get("sources", {})
+async def mapping_job_async(
+    mapping_url: AnyUrl, opt_data_url: AnyUrl = None, authorization=None, api_url: str = None,
+    data_content: Optional[str] = None, engine: Optional[str] = None,
+    prepared: Optional[PreparedMapping] = None, provenance: bool = True,
+    parsed_sources: Optional[dict] = None, tag_rules: bool = False,
+) -> Tuple[str, GraphJob, int, int]:
+    """Run a mapping up to its output like mapping_job without blocking the event loop."""
+    if prepared is None:
+        prepared = await PreparedMapping.create_async(mapping_url, authorization)
+    return await run_steps_async(
+        mapping_steps(
+            prepared, opt_data_url, authorization, api_url, data_content, engine, provenance,
+            parsed_sources, tag_rules,
+        ),
+        cpu_executor,
+    )
 
-        logging.info(f"Replaced data source URL in YARRRML: {original_data_url} -> {opt_data_url}")
+
+def mapping_steps(
+    prepared: PreparedMapping, opt_data_url: AnyUrl, authorization, api_url: str,
+    data_content: Optional[str], engine: Optional[str], provenance: bool,
+    parsed_sources: Optional[dict], tag_rules: bool = False,
+):
+    """Step generator of mapping_job, yielding its I/O as IOCall, see pipeline."""
+    mapping_url = prepared.mapping_url
+    try:
+        mapping_dict, original_data_url = prepared.bind_data_url(opt_data_url)
+    except Exception:
+        prepared.cancel()
+        raise
+
+    duplicate_for_table = mapping_dict.get("use_template_rowwise", False)
+    logging.info(f"use_template_rowwise: {duplicate_for_table}")
+    sources = mapping_dict.get("sources", {})
 
     # Override base: with {data_url}# when file content is provided directly.
     # Must happen AFTER Phase 0 re-parses mapping_dict.
@@ -1246,431 +1786,319 @@ def apply_mapping(
         mapping_dict["base"] = override_base
         logging.info(f"Overriding base URI with: {override_base}")
 
+    template_url = prepared.template_url
+
     # PHASE 1: Download all source files using helper function
     injected_bytes = data_content.encode("utf-8") if data_content is not None else None
-    url_mapping, primary_data_url, filename = download_sources(
-        sources, opt_data_url, authorization, injected_bytes
-    )
-
-    # Check if template prefix exists (optional feature)
-    template_url = mapping_dict.get("prefixes", {}).get("template", None)
+    try:
+        url_mapping, primary_data_url, filename = yield IOCall(
+            download_sources, async_download_sources,
+            sources, opt_data_url, authorization, injected_bytes,
+        )
+    except Exception:
+        prepared.cancel()
+        raise
 
     # PHASE 2: Convert YARRRML to RML and replace all source URLs with placeholders
-    rml_rules = convert_yarrrml_to_rml(mapping_data)
-    rml_graph = Graph()
-    rml_graph.parse(data=rml_rules, format="ttl")
+    rule_template, source_aliases = yield from prepared.rule_template(
+        mapping_dict, original_data_url, opt_data_url
+    )
+    # rules converted from the unmodified mapping still name the original source URLs
+    rule_sources = {
+        source_aliases.get(original_url, original_url): info
+        for original_url, info in url_mapping.items()
+    }
 
+    # Fill in the source placeholders and the @base directive, so the mapper uses
+    # the correct base for data subjects
     logging.debug(f"Replacing {len(url_mapping)} source URLs with placeholders")
-    replace_all_data_sources(rml_graph, url_mapping)
-    
-    # Serialize RML rules
-    rml_rules_new = rml_graph.serialize(format="ttl")
-    
-    # Add @base directive to RML rules so mapper uses correct base for data subjects
-    # RDFLib serialize(base=...) doesn't actually inject @base, so we do it manually
     base_uri = mapping_dict.get("base", "")
     if base_uri:
         logging.info(f"Injecting @base <{base_uri}> directive into RML rules")
-        # Inject @base after @prefix declarations
-        lines = rml_rules_new.split('\n')
-        # Find the last @prefix line
-        last_prefix_idx = -1
-        for idx, line in enumerate(lines):
-            if line.strip().startswith('@prefix'):
-                last_prefix_idx = idx
-        
-        # Insert @base after last @prefix
-        if last_prefix_idx >= 0:
-            lines.insert(last_prefix_idx + 1, f'@base <{base_uri}> .')
-            rml_rules_new = '\n'.join(lines)
-            logging.info(f"✓ @base directive injected successfully")
-        else:
-            # No @prefix found, add @base at the beginning
-            rml_rules_new = f'@base <{base_uri}> .\n\n{rml_rules_new}'
-            logging.info(f"✓ @base directive added at beginning")
     else:
         logging.warning("No base URI found in mapping, RML mapper will use default base")
+    rml_rules_new = rule_template.render(rule_sources, base_uri)
 
     # PHASE 3: Process all data sources using helper function
-    sources_for_mapper = {}
+    mapper_sources = {}
     data_graph = Graph()  # For primary data if RDF
     is_rdf_data = False
     data_namespaces = None
 
-    for original_url, info in url_mapping.items():
-        placeholder = info["placeholder"]
-        actual_url = info["actual_url"]
-        content = info["content"]
+    with timing.span("sources"):
+        for original_url, info in url_mapping.items():
+            placeholder = info["placeholder"]
+            actual_url = info["actual_url"]
+            content = info["content"]
 
-        # Use helper function to process data
-        processed_content, is_rdf, data_namespaces = process_data_to_jsonld(content, actual_url)
-        sources_for_mapper[placeholder] = processed_content
+            # Every source is parsed once, the mapper gets its JSON-LD view
+            source = parsed_source(parsed_sources, content, actual_url)
+            mapper_sources[placeholder] = source
+            data_namespaces = source.namespaces
 
-        # First source determines primary data graph and namespace
-        if placeholder == "source_1.json":
-            is_rdf_data = is_rdf
-            if is_rdf:
-                data_graph = Graph()
-                data_graph.parse(data=content, format=guess_format(actual_url))
+            # First source determines primary data graph and namespace
+            if placeholder == "source_1.json":
+                is_rdf_data = source.is_rdf
+                if is_rdf_data:
+                    data_graph = source.graph
 
     # PHASE 4: Execute RML mapper using helper function
     logging.debug("="*80)
     logging.debug("DATA BEING SENT TO RML MAPPER:")
     logging.debug(f"is_rdf_data: {is_rdf_data}")
-    logging.debug(f"Number of sources: {len(sources_for_mapper)}")
+    logging.debug(f"Number of sources: {len(mapper_sources)}")
     logging.debug("="*80)
 
-    res = execute_rml_mapper(rml_rules_new, sources_for_mapper)
+    # Load template graph if template prefix is provided (optional feature)
+    with timing.span("template"):
+        yield IOCall(None, prepared.template_ready)
+        template_graph, template_content = prepared.template()
+    if template_url:
+        # Ensure template_url ends with /
+        if not template_url.endswith("/"):
+            template_url += "/"
+    else:
+        logging.info("ℹ️  No template prefix found in mapping - skipping template graph loading")
 
-    # Parse mapping results
-    try:
-        mapping_graph = Graph()
-        mapping_graph.parse(data=res, format="ttl")
-    except Exception as e:
-        raise HTTPException(
-            status_code=422,
-            detail=f"Could not parse mapping results to result graph: {str(e)}"
-        ) from e
-    
-    # POST-PROCESS 1: Replace http://example.com URIs with base URI from mapping
-    base_uri = mapping_dict.get("base", "")
-    if base_uri:
-        mapping_graph = replace_base_uris(mapping_graph, base_uri)
-    
-    # POST-PROCESS 2: Fix string literal type declarations that should be URIRefs
-    # The RML mapper sometimes outputs type declarations as string literals instead of URIRefs
-    # We need to convert these back to proper URIRefs using our accumulated prefixes
-    yarrrml_prefixes = mapping_dict.get("prefixes", {})
-    triples_to_fix = []
-    
-    for s, p, o in mapping_graph:
-        # Check if this is a type declaration with a string literal object
-        if p == RDF.type and isinstance(o, Literal):
-            o_str = str(o)
-            # Check if it looks like a URN or URI that should be a URIRef
-            if o_str.startswith("urn:") or o_str.startswith("http"):
-                # Try to find matching prefix
-                matched_prefix = None
-                for prefix, ns_url in yarrrml_prefixes.items():
-                    if o_str.startswith(ns_url):
-                        # Extract local part and create prefixed version
-                        local_part = o_str[len(ns_url):]
-                        matched_prefix = f"{prefix}:{local_part}"
-                        new_o = URIRef(o_str)
-                        triples_to_fix.append(((s, p, o), (s, p, new_o)))
-                        logging.info(f"Converting type string literal to URIRef: '{o_str}' -> {new_o}")
-                        break
-                
-                # If no prefix matched, still convert to URIRef
-                if not matched_prefix:
-                    new_o = URIRef(o_str)
-                    triples_to_fix.append(((s, p, o), (s, p, new_o)))
-                    logging.info(f"Converting type string literal to URIRef (no prefix): '{o_str}' -> {new_o}")
-    
-    # Apply the fixes
-    for (old_triple, new_triple) in triples_to_fix:
-        mapping_graph.remove(old_triple)
-        mapping_graph.add(new_triple)
-    
-    if triples_to_fix:
-        logging.info(f"Fixed {len(triples_to_fix)} string literal type declarations")
-    
-    # Don't transform yet - join graphs first, then transform
-    # mapping_graph.serialize('mapping_result.ttl')
+    # duplicate template if needed
+    rows = list(data_graph[: RDF.type : CSVW.Row])
+    # use template to create new individuals for every row
+    # This only works with RDF/CSVW data, not plain JSON
+    rowwise = bool(duplicate_for_table and is_rdf_data and rows and template_url and template_content)
+
+    mapping_graph = None
+    mapping_namespaces = rule_template.namespaces
+    rule_graphs = rule_triples = None
+    if MappingEngine(engine or RML_ENGINE) == MappingEngine.native:
+        try:
+            # the native engine reads the decoded documents
+            rule_triples = {} if tag_rules else None
+            mapping_graph = execute_native_mapping(
+                rml_rules_new,
+                {placeholder: source.json for placeholder, source in mapper_sources.items()},
+                base_uri,
+                rule_triples,
+            )
+            mapping_namespaces = list(mapping_graph.namespaces())
+        except UnsupportedMappingError as e:
+            logging.warning(f"Native RML engine cannot run this mapping ({e}) - falling back to rmlmapper")
+            rule_triples = None
+
+    res = None
+    if mapping_graph is None:
+        if tag_rules:
+            # every rule writes to its own named graph of the N-Quads output
+            rml_rules_new, rule_graphs = tag_rule_graphs(rml_rules_new, base_uri)
+        # N-Quads output is parsed line by line by the graph stages
+        res = yield IOCall(
+            execute_rml_mapper, async_execute_rml_mapper,
+            rml_rules_new,
+            {placeholder: source.mapper_content for placeholder, source in mapper_sources.items()},
+            serialization="nquads",
+        )
 
     # Count YARRRML rules from mapping dict
     num_yarrrml_rules = len(mapping_dict.get("mappings", {}))
-    num_triples_generated = len(mapping_graph)
     
     # All YARRRML rules are "applied" - we can't tell which ones generated triples without per-rule execution
     num_mappings_applied = num_yarrrml_rules
-    num_mappings_skipped = 0
-    
-    logging.info(
-        "number of YARRRML rules: {}, triples generated: {}".format(
-            num_yarrrml_rules, num_triples_generated
-        )
+
+    used_resources = [str(mapping_url)]
+    if template_url:
+        used_resources.append(template_url)
+    job = GraphJob(
+        mapping_output=res,
+        mapping_graph=mapping_graph,
+        mapping_dict=mapping_dict,
+        mapping_namespaces=mapping_namespaces,
+        data_graph=data_graph,
+        data_namespaces=data_namespaces,
+        is_rdf_data=is_rdf_data,
+        rowwise=rowwise,
+        template_url=template_url,
+        template_graph=template_graph,
+        has_template=bool(template_content),
+        row_template=prepared.row_template() if rowwise else None,
+        primary_data_url=primary_data_url,
+        # Add provenance metadata using full API URL from request
+        api_url=api_url or "/api/createrdf",
+        used_resources=used_resources,
+        provenance=provenance,
+        rule_graphs=rule_graphs,
+        rule_triples=rule_triples,
+        input_bytes=sum(len(info["content"]) for info in url_mapping.values()),
     )
-    joined_graph = Graph()
-    
-    
-    # # Bind all custom prefixes from YARRRML mapping
-    # custom_prefixes = mapping_dict.get("prefixes", {})
-    # for prefix_name, prefix_url in custom_prefixes.items():
-    #     # Skip 'base' as it's handled separately
-    #     if prefix_name != "base":
-    #         joined_graph.namespace_manager.bind(prefix_name, Namespace(prefix_url))
-    #         logging.debug(f"Bound prefix '{prefix_name}' to '{prefix_url}'")
+    return filename, job, num_yarrrml_rules, num_mappings_applied
 
-    # replace base url with place holder, should reference the now storage position of the resulting file
-    # rdf_filename = "example.rdf"
-    # new_base_url = ""
 
-    ##add ontology entieties for reasoning
-    # joined_graph.parse(CCO_URL, format='turtle')
-    # joined_graph.parse(str(MSEO), format='xml')
+def apply_mapping(
+    mapping_url: AnyUrl, opt_data_url: AnyUrl = None, authorization=None, api_url: str = None,
+    data_content: Optional[str] = None, engine: Optional[str] = None,
+    prepared: Optional[PreparedMapping] = None, return_type: ReturnType = ReturnType.turtle,
+    parsed_sources: Optional[dict] = None,
+) -> Tuple[str, str, int, int]:
+    """Apply YARRRML mapping to data sources, see map_to_graph.
 
-    # Load template graph if template prefix is provided (optional feature)
-    template_graph = None
-    template_content = None
-    
-    if template_url:
-        logging.info(f"📄 Template prefix found - loading template graph from: {template_url}")
-        try:
-            templatedata, template_filename = open_file(template_url, authorization)
-            template_graph = Graph()
-            template_graph.parse(data=templatedata, format="ttl")
-            
-            # STEP 1: Replace template namespace if it has base namespace
-            base_namespace = None
-            for ns_prefix, namespace in template_graph.namespaces():
-                if ns_prefix in ["base", ""]:
-                    base_namespace = namespace
-            
-            # Ensure template_url ends with /
-            if not template_url.endswith("/"):
-                template_url += "/"
-            
-            if base_namespace:
-                logging.info(f"Replacing template base namespace {base_namespace} with {template_url}")
-                template_content = template_graph.serialize().replace(
-                    base_namespace, template_url
-                )
-                template_graph = Graph()
-                template_graph.parse(data=template_content)
-            else:
-                template_content = template_graph.serialize()
-            
-            logging.info(f"✓ Template graph loaded successfully ({len(template_graph)} triples)")
-        except Exception as e:
-            logging.error(f"Failed to load template graph: {str(e)}")
-            raise HTTPException(
-                status_code=422,
-                detail=f"Could not load template graph from {template_url}: {str(e)}",
-            ) from e
-    else:
-        logging.info("ℹ️  No template prefix found in mapping - skipping template graph loading")
-    
- 
-    # for subject in template_graph.subjects():
-    #     # replace the subject URI with your new template URI
-    #     new_iri=URIRef(str(subject).rsplit("/", 1)[-1].rsplit("#", 1)[-1])
-    #     replace_iris(subject,new_iri,template_graph)
-    # template_graph.serialize('template.ttl')
+    Waits for admission, see AdmissionController.
 
-    # duplicate template if needed
-    rows = list(data_graph[: RDF.type : CSVW.Row])
+    Returns:
+        Tuple of (filename, graph_output, num_rules_total, num_rules_applied),
+        the graph serialized as return_type
+    """
+    with admission.admit(authorization):
+        filename, job, num_rules, num_applied = mapping_job(
+            mapping_url, opt_data_url, authorization, api_url, data_content, engine, prepared,
+            parsed_sources=parsed_sources,
+        )
+        # Serialize the graph - all prefixes now preserved
+        if graph_pool.enabled:
+            out = graph_pool.submit(job, return_type.value).result()
+        else:
+            out = serialize_graph(job.join(), return_type.value)
+    metrics.observe_conversion(job.num_triples, job.input_bytes, metrics.text_bytes(out))
+    filename = filename.rsplit(".", 1)[0] + RETURN_TYPE_EXT.get(return_type.value, ".ttl")
+    return filename, out, num_rules, num_applied
 
-    # join and prepare for output
-    # copy data entities into joined graph only if data was RDF
-    # For plain JSON, RML mapper generates all the triples
-    if is_rdf_data:
-        joined_graph += data_graph
-    # joined_graph += mapping_graph
 
-    # use template to create new individuals for every row
-    # This only works with RDF/CSVW data, not plain JSON
-    if duplicate_for_table and is_rdf_data and rows and template_url and template_content:
-        # map_content=mapping_graph.serialize()
-        # mapping_graph.serialize("map_graph.ttl")
-        # data_graph.serialize("data_graph.ttl")
-        tablegroup = next(data_graph[: RDF.type : CSVW.TableGroup])
-        column_maps = {}
-        for column in data_graph[: RDF.type : CSVW.Column]:
-            column_maps[column] = {
-                "po": list(mapping_graph.predicate_objects(subject=column)),
-                "propertyUrl": next(
-                    data_graph.objects(subject=column, predicate=CSVW.propertyUrl),
-                    column,
-                ),
-            }
-        non_column_subjects = [
-            subject
-            for subject in mapping_graph.subjects(unique=True)
-            if subject not in column_maps.keys()
-        ]
-        note_maps = {
-            note: {"po": list(mapping_graph.predicate_objects(note))}
-            for note in non_column_subjects
-        }
-        for_row_to_set = list()
-
-        # adding tripples for columns
-        print("column_map:{}".format(column_maps))
-        for column, data in column_maps.items():
-            print(column, data)
-            property = data["propertyUrl"]
-            for predicate, object in data["po"]:
-                for_row_to_set.append(
-                    (property, predicate, strip_namespace(str(object)))
-                )
-        print("to set for row: {}".format(for_row_to_set))
-
-        # adding tripples for notes
-        for_copy_to_set = list()
-        for note, data in note_maps.items():
-            for predicate, object in data["po"]:
-                for_copy_to_set.append((note, predicate, strip_namespace(str(object))))
-
-        # print(for_copy_to_set)
-        logging.info("dublicating template graph for {} rows".format(len(rows)))
-        for row in rows:
-            data_node = data_graph.value(row, CSVW.describes)
-            if template_url and template_content:
-                joined_graph.parse(
-                    data=template_content.replace(template_url, data_node + "/")
-                )
-            row_ns = Namespace(data_node + "/")
-            joined_graph.bind("row" + str(data_node).rsplit("-", 1)[-1], row_ns)
-            # set mapping realtions on each individual row
-            for property, predicate, object in for_row_to_set:
-                subject = next(joined_graph.objects(data_node, property), None)
-                if subject:
-                    joined_graph.add((subject, predicate, row_ns[object]))
-            for subject, predicate, object in for_copy_to_set:
-                joined_graph.add((subject, predicate, row_ns[object]))
+async def apply_mapping_async(
+    mapping_url: AnyUrl, opt_data_url: AnyUrl = None, authorization=None, api_url: str = None,
+    data_content: Optional[str] = None, engine: Optional[str] = None,
+    prepared: Optional[PreparedMapping] = None, return_type: ReturnType = ReturnType.turtle,
+    parsed_sources: Optional[dict] = None,
+) -> Tuple[str, str, int, int]:
+    """Apply YARRRML mapping like apply_mapping without blocking the event loop, see map_to_graph_async."""
+    async with admission.admit_async(authorization):
+        filename, job, num_rules, num_applied = await mapping_job_async(
+            mapping_url, opt_data_url, authorization, api_url, data_content, engine, prepared,
+            parsed_sources=parsed_sources,
+        )
+        if graph_pool.enabled:
+            out = await asyncio.wrap_future(graph_pool.submit(job, return_type.value))
+        else:
+            out = await run_cpu(lambda: serialize_graph(job.join(), return_type.value))
+    metrics.observe_conversion(job.num_triples, job.input_bytes, metrics.text_bytes(out))
+    filename = filename.rsplit(".", 1)[0] + RETURN_TYPE_EXT.get(return_type.value, ".ttl")
+    return filename, out, num_rules, num_applied
 
-    else:
-        # Join graphs based on what's available
-        if template_graph and template_content:
-            # Parse template AS IS (don't replace namespace yet - it causes file:///src/ issue!)
-            temp_template_graph = Graph()
-            temp_template_graph.parse(data=template_content)
-            joined_graph += temp_template_graph
-        
-        joined_graph += mapping_graph
-        
-        # Only add data_graph if the data source was RDF
-        # For plain JSON, RML rules generate all needed triples
-        if is_rdf_data:
-            joined_graph += data_graph
-
-    # DEBUG: Serialize after joining all graphs
-    #joined_graph.serialize("debug_03_after_joining_graphs.ttl")
-    logging.info("DEBUG: Serialized joined graph to debug_03_after_joining_graphs.ttl")
-
-    # NAMESPACE ACCUMULATION STRATEGY:
-    # Collect all namespaces BEFORE binding to avoid conflicts
-    # Priority: mapping < template < @context < YARRRML (data_graph EXCLUDED - it loses @context!)
-    logging.info("Accumulating namespaces from all sources...")
-
-    accumulated_namespaces = {}
-
-    # 1. From mapping graph (lowest priority)
-    for prefix, namespace in mapping_graph.namespaces():
-        if prefix not in ['', 'base']:
-            accumulated_namespaces[prefix] = str(namespace)
-            logging.debug(f"Accumulated from mapping: {prefix} -> {namespace}")
-
-    # 2. From template graph (medium priority) - only if template was loaded
-    if template_graph:
-        for prefix, namespace in template_graph.namespaces():
-            if prefix not in ['', 'base']:
-                accumulated_namespaces[prefix] = str(namespace)
-                logging.debug(f"Accumulated from template: {prefix} -> {namespace}")
-
-    # 3. From JSON-LD @context if it was extracted (high priority for csv!)
-    # This is the ORIGINAL csv namespace before any RDFLib parsing
-    if data_namespaces:
-        for prefix, namespace in data_namespaces.items():
-            if prefix not in ['', 'base']:
-                accumulated_namespaces[prefix] = str(namespace)
-                logging.debug(f"Accumulated from @context: {prefix} -> {namespace}")
-
-    # 4. From YARRRML prefixes dictionary (HIGHEST PRIORITY - preserves user intent!)
-    # Extract prefixes directly from the mapping definition
-    yarrrml_prefixes = mapping_dict.get("prefixes", {})
-    for prefix, namespace in yarrrml_prefixes.items():
-        # Skip special prefixes that have dedicated handling
-        if prefix not in ['', 'base', 'template', 'method', 'data']:
-            accumulated_namespaces[prefix] = str(namespace)
-            logging.info(f"✓ Preserved YARRRML prefix: {prefix} -> {namespace}")
-
-    logging.debug(accumulated_namespaces)
-    logging.info(f"Total accumulated namespaces: {len(accumulated_namespaces)}")
-
-    # Transform template namespace URIs to RELATIVE URIs (no scheme) - only if template was loaded
-    if template_url:
-        logging.info(f"Transforming template URIs from {template_url} to relative URIs")
-
-        triples_to_transform = []
-        for s, p, o in joined_graph:
-            new_s = s
-            new_p = p
-            new_o = o
-            changed = False
-
-            # Transform subject if it starts with template URL
-            if isinstance(s, URIRef) and str(s).startswith(template_url):
-                local_part = str(s).replace(template_url, "")
-                # Create relative URIRef (no scheme)
-                new_s = URIRef("#" + local_part)
-                changed = True
-                logging.debug(f"Transform subject: {s} -> {new_s}")
-
-            # Transform predicate if it starts with template URL
-            if isinstance(p, URIRef) and str(p).startswith(template_url):
-                local_part = str(p).replace(template_url, "")
-                new_p = URIRef("#" + local_part)
-                changed = True
-                logging.debug(f"Transform predicate: {p} -> {new_p}")
-
-            # Transform object if it's a URIRef and starts with template URL
-            if isinstance(o, URIRef) and str(o).startswith(template_url):
-                local_part = str(o).replace(template_url, "")
-                new_o = URIRef("#" + local_part)
-                changed = True
-                logging.debug(f"Transform object: {o} -> {new_o}")
-
-            if changed:
-                triples_to_transform.append(((s, p, o), (new_s, new_p, new_o)))
-
-        # Apply transformations
-        for (old_triple, new_triple) in triples_to_transform:
-            joined_graph.remove(old_triple)
-            joined_graph.add(new_triple)
-
-        logging.info(f"Transformed {len(triples_to_transform)} triples from template namespace to relative URIs")
-
-    # Add provenance metadata using full API URL from request
-    if api_url:
-        full_api_url = api_url
-    else:
-        full_api_url = "/api/createrdf"
 
-    used_resources = [str(mapping_url)]
-    if template_url:
-        used_resources.append(template_url)
-    add_prov(joined_graph, full_api_url, primary_data_url, used_resources)
-    logging.info(f"Added provenance metadata for data: {primary_data_url}, API: {full_api_url}")
-
-    # APPLY ALL NAMESPACES ONCE - centralized binding right before serialization
-    apply_all_namespaces(
-        joined_graph,
-        accumulated_namespaces,
-        primary_data_url,
-        template_url
+def map_in_chunks(
+    mapping_url: AnyUrl, opt_data_url: AnyUrl = None, authorization=None, api_url: str = None,
+    engine: Optional[str] = None, chunk_rows: int = 1000, return_type: ReturnType = ReturnType.nt,
+):
+    """Apply YARRRML mapping to a large row-oriented data source in batches of rows.
+
+    The primary data source is read from a file and cut into batches of
+    chunk_rows rows while it is read, see source_split.iter_source_batches,
+    and each batch is mapped on its own with the prepared mapping. The joined
+    graph of a batch is written as N-Triples or N-Quads and dropped before
+    the next batch is mapped, so everything
+    derived from the data is only held for one batch at a time. Triples
+    already written by the first batch, e.g. those of the template and the
+    table columns, are not written again. The first batch is mapped before
+    returning, so errors of the mapping and the data are raised as usual.
+    The admission slot and the source file are held until the last batch
+    is written or the response ends otherwise, see ReleasingIterator.
+
+    Returns:
+        Tuple of (filename, num_rules_total, num_rules_applied, chunks),
+        chunks a ReleasingIterator yielding the utf-8 encoded document
+    """
+    if return_type.value not in LINE_FORMATS:
+        raise HTTPException(
+            status_code=422,
+            detail="Chunked mapping writes return_type nt or nquads",
+        )
+    admitted = contextlib.ExitStack()
+    admitted.enter_context(admission.admit(authorization))
+    try:
+        prepared = PreparedMapping(mapping_url, authorization)
+        admitted.callback(prepared.cancel)
+        mapping_dict, _ = prepared.bind_data_url(opt_data_url)
+        sources = list(mapping_dict.get("sources", {}).values())
+        if not sources:
+            raise HTTPException(status_code=422, detail="No sources found in mapping file")
+        data_url = str(opt_data_url or sources[0]["access"]).strip("/")
+        iterators = [
+            source["iterator"]
+            for source in sources
+            if source.get("iterator") and source["access"].strip("/") == data_url
+        ]
+        source_file = admitted.enter_context(open_source_file(data_url, authorization))
+        batches = iter_source_batches(source_file, data_url, iterators, chunk_rows)
+        admitted.callback(batches.close)
+        filename, joined_graph, num_rules, num_applied = map_to_graph(
+            mapping_url, opt_data_url, authorization, api_url, next(batches), engine, prepared
+        )
+    except Exception:
+        admitted.close()
+        raise
+    filename = filename.rsplit(".", 1)[0] + RETURN_TYPE_EXT[return_type.value]
+    chunks = ReleasingIterator(
+        iter_mapped_batches(
+            prepared, joined_graph, batches, opt_data_url, authorization, api_url, engine,
+            return_type,
+        ),
+        admitted,
     )
+    return filename, num_rules, num_applied, chunks
 
-    # Serialize the graph - all prefixes now preserved
-    out = joined_graph.serialize(format="turtle", base="")
-    
-    return filename, out, num_yarrrml_rules, num_mappings_applied
+
+def iter_mapped_batches(
+    prepared: PreparedMapping, first_graph: Graph, batches, opt_data_url, authorization,
+    api_url: str, engine, return_type: ReturnType,
+):
+    """Write the first joined graph and map and write the remaining batches, see map_in_chunks."""
+    format = return_type.value
+    name = graph_name(first_graph)
+    written = set(first_graph)
+    yield from iter_lines(deskolemize(first_graph), format, name, STREAM_CHUNK_BYTES)
+    first_graph = None
+    for number, batch in enumerate(batches, 2):
+        _, joined_graph, _, _ = map_to_graph(
+            prepared.mapping_url, opt_data_url, authorization, api_url, batch, engine,
+            prepared, provenance=False,
+        )
+        batch = None
+        new_triples = (triple for triple in joined_graph if triple not in written)
+        yield from iter_lines(deskolemize(new_triples), format, name, STREAM_CHUNK_BYTES)
+        logging.info(f"Wrote batch {number} ({len(joined_graph)} triples)")
 
 
 def shacl_validate(
     shapes_url: AnyUrl, rdf_url: AnyUrl, authorization=None
 ) -> Tuple[str, Graph]:
-    if not len(urlparse(shapes_url)) == 6:  # not a regular url might be data string
-        shapes_data = shapes_url
-    else:
-        shapes_data, filename = open_file(shapes_url, authorization)
+    with admission.admit(authorization):
+        if not len(urlparse(shapes_url)) == 6:  # not a regular url might be data string
+            shapes_data = shapes_url
+        else:
+            shapes_data, filename = open_file(shapes_url, authorization)
 
-    if not len(urlparse(rdf_url)) == 6:  # not a regular url might be data string
-        rdf_data = rdf_url
-    else:
-        rdf_data, filename = open_file(rdf_url, authorization)
+        if not len(urlparse(rdf_url)) == 6:  # not a regular url might be data string
+            rdf_data = rdf_url
+        else:
+            rdf_data, filename = open_file(rdf_url, authorization)
+        return validate_graphs(shapes_data, rdf_data)
 
+
+async def async_shacl_validate(
+    shapes_url: AnyUrl, rdf_url: AnyUrl, authorization=None
+) -> Tuple[str, Graph]:
+    """Validate like shacl_validate, downloading on the event loop and validating on the cpu executor."""
+    async with admission.admit_async(authorization):
+        if not len(urlparse(shapes_url)) == 6:  # not a regular url might be data string
+            shapes_data = shapes_url
+        else:
+            shapes_data, filename = await async_open_file(shapes_url, authorization)
+
+        if not len(urlparse(rdf_url)) == 6:  # not a regular url might be data string
+            rdf_data = rdf_url
+        else:
+            rdf_data, filename = await async_open_file(rdf_url, authorization)
+        return await run_cpu(validate_graphs, shapes_data, rdf_data)
+
+
+def validate_graphs(shapes_data, rdf_data) -> Tuple[str, Graph]:
+    """Validate RDF data against SHACL shapes, both given as documents."""
     # readin graphs
     try:
         shapes_graph = Graph()
@@ -1773,7 +2201,7 @@ async def convert(request: Request):
             # Construct full API URL for provenance
             api_url = setting.server + "/api/createrdf"
 
-            filename, out, count_rules, count_rules_applied = apply_mapping(
+            filename, out, count_rules, count_rules_applied = await apply_mapping_async(
                 mapping_url, opt_data_url, None, api_url
             )
 
@@ -1905,6 +2333,40 @@ class RDFUploadRequest(BaseModel):
         }
 
 
+class RDFBatchItem(BaseModel):
+    data_url: Optional[AnyUrl] = Field(
+        None,
+        title="Data Url",
+        description="Overrides the data source URL of the mapping. With data_content it is only used as base URI.",
+    )
+    data_content: Optional[str] = Field(
+        None, title="Data Content", description="Inline file contents to map instead of fetching data_url."
+    )
+
+
+class RDFBatchRequest(BaseModel):
+    mapping_url: AnyUrl = Field(
+        ..., title="Mapping Url", description="URL to the YARRRML mapping file applied to every item."
+    )
+    items: List[RDFBatchItem] = Field(
+        ..., title="Items", description="Data files to map, each given by URL or inline content."
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "mapping_url": "https://raw.githubusercontent.com/Mat-O-Lab/RDFConverter/refs/heads/main/examples/catenax-batch-map.yaml",
+                "items": [
+                    {"data_url": "https://edc.my-company.example.com/api/v1/assets/urn:uuid:580d3adf-1981-44a0-a214-13d6ceed9379"},
+                    {
+                        "data_url": "https://edc.my-company.example.com/api/v1/assets/urn:uuid:7f2a0c55-3b61-4bd3-9f0e-2a1d6e0f4c11",
+                        "data_content": '{"catenaXId":"7f2a0c55-3b61-4bd3-9f0e-2a1d6e0f4c11"}',
+                    },
+                ],
+            }
+        }
+
+
 class RDFResponse(BaseModel):
     filename: str = Field(
         "data-joined.ttl",
@@ -1912,7 +2374,7 @@ class RDFResponse(BaseModel):
         description="Suggested filename for the generated RDF document.",
     )
     graph: str = Field(
-        title="Graph Data", description="The generated RDF graph serialized as a string (Turtle format)."
+        title="Graph Data", description="The generated RDF graph serialized as a string in the requested return_type (Turtle by default)."
     )
     num_mappings_applied: int = Field(
         title="Number Rules Applied",
@@ -1922,6 +2384,11 @@ class RDFResponse(BaseModel):
         title="Number Rules Skipped",
         description="The total number of rules not applied once.",
     )
+    timings: Optional[Dict[str, float]] = Field(
+        None,
+        title="Stage Timings",
+        description="Seconds spent in each stage of the conversion, also sent as Server-Timing header.",
+    )
 
     class Config:
         json_schema_extra = {
@@ -1930,6 +2397,7 @@ class RDFResponse(BaseModel):
                 "graph": "graph data in turtle format as string",
                 "num_mappings_applied": 6,
                 "num_mappings_skipped": 0,
+                "timings": {"download": 0.12, "yarrrml": 0.35, "mapper": 0.8, "serialize": 0.05},
             }
         }
 
@@ -1981,7 +2449,9 @@ class TurtleResponse(StreamingResponse):
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
-    return JSONResponse(content={"message": exc.detail}, status_code=exc.status_code)
+    return JSONResponse(
+        content={"message": exc.detail}, status_code=exc.status_code, headers=exc.headers
+    )
 
 
 @app.post("/api/yarrrmltorml", response_class=TurtleResponse, summary="Convert YARRRML mapping to RML", tags=["convert"])
@@ -1997,9 +2467,9 @@ async def yarrrmltorml(
         raise HTTPException(status_code=422, detail="mapping_url is required")
     
     logging.info(f"POST /api/yarrrmltorml {final_mapping_url}")
-    filedata, filename = open_file(final_mapping_url)
+    filedata, filename = await async_open_file(final_mapping_url)
 
-    rules = requests.post(YARRRML_URL, data={"yarrrml": filedata}).text
+    rules = await async_convert_yarrrml_to_rml(filedata)
     data_bytes = BytesIO(rules.encode())
     filename = filename.rsplit(".yaml", 1)[0] + "-rml.ttl"
     headers = {
@@ -2009,13 +2479,22 @@ async def yarrrmltorml(
     return TurtleResponse(content=data_bytes, headers=headers)
 
 
-@app.post("/api/createrdf", response_model=RDFResponse, summary="Create RDF from URL-accessible data", tags=["convert"])
-def create_rdf(
+@app.post(
+    "/api/createrdf",
+    response_model=RDFResponse,
+    responses={200: {"content": {media_type: {} for media_type in STREAM_MEDIA_TYPES}}},
+    summary="Create RDF from URL-accessible data",
+    tags=["convert"],
+)
+async def create_rdf(
     req: Request,
     body: Annotated[Optional[RDFRequest], Body()] = None,
     mapping_url: Annotated[Optional[str], Query(description="URL to the YARRRML mapping file (.yaml)")] = None,
     data_url: Annotated[Optional[str], Query(description="Optional URL that overrides the data source defined in the mapping. The app must be able to fetch this URL.")] = None,
-    return_type: ReturnType = ReturnType.turtle
+    return_type: ReturnType = ReturnType.turtle,
+    engine: Annotated[Optional[MappingEngine], Query(description="RML execution engine, defaults to the RML_ENGINE setting. Mappings the native engine does not support fall back to the remote rmlmapper.")] = None,
+    stream: Annotated[bool, Query(description="Stream the graph as RDF document in return_type instead of a JSON response.")] = False,
+    chunk_rows: Annotated[Optional[int], Query(ge=1, description="Map large row-oriented data in batches of this many rows and stream the result as N-Triples or N-Quads.")] = None,
 ):
     """Convert data to RDF using a YARRRML mapping.
 
@@ -2023,8 +2502,18 @@ def create_rdf(
     and returns the generated RDF graph. All referenced URLs must be accessible by the server.
 
     Parameters can be supplied either as JSON body fields or as query parameters (not mixed).
+
+    With `Accept: text/turtle` or `Accept: application/n-triples`, or with
+    `stream=true`, the graph is streamed as RDF document instead of being embedded
+    in JSON. The filename is then sent in `Content-Disposition` and the rule
+    counts in the `X-Num-Mappings-Applied` and `X-Num-Mappings-Skipped` headers.
+
+    With `chunk_rows`, the data is mapped in batches of that many rows (CSVW
+    rows or the items of the longest array a JSON iterator selects) and the
+    result is streamed as N-Triples or N-Quads, see the README on memory use.
     """
     authorization = req.headers.get("Authorization", None)
+    stream_format = negotiate_stream_format(req.headers.get("Accept"), stream, return_type)
     
     # Use helper: all-or-nothing strategy (query OR body, never mix)
     params = resolve_parameters(body, {"mapping_url": mapping_url, "data_url": data_url})
@@ -2040,8 +2529,38 @@ def create_rdf(
     logging.info(f"POST /api/createrdf {final_mapping_url}")
     logging.info(f"SERVER_URL from settings: {setting.server}")
     logging.info(f"Constructed API URL for provenance: {api_url}")
-    filename, out, count_rules, count_rules_applied = apply_mapping(
-        final_mapping_url, final_data_url, authorization, api_url
+    if chunk_rows:
+        # batches are mapped blocking while the response is streamed
+        filename, count_rules, count_rules_applied, chunks = await run_in_threadpool(
+            map_in_chunks,
+            final_mapping_url, final_data_url, authorization, api_url, engine, chunk_rows,
+            stream_format or return_type,
+        )
+        logging.info(f"POST /api/createrdf: {count_rules=}, {count_rules_applied=}, {chunk_rows=}")
+        return RDFStreamingResponse(
+            chunks,
+            filename,
+            headers={
+                "X-Num-Mappings-Applied": str(count_rules_applied),
+                "X-Num-Mappings-Skipped": str(count_rules - count_rules_applied),
+            },
+        )
+    if stream_format:
+        filename, joined_graph, count_rules, count_rules_applied = await map_to_graph_async(
+            final_mapping_url, final_data_url, authorization, api_url, engine=engine
+        )
+        logging.info(f"POST /api/createrdf: {count_rules=}, {count_rules_applied=}, streaming {stream_format.value}")
+        return RDFStreamingResponse(
+            iter_serialized(joined_graph, stream_format.value),
+            filename.rsplit(".", 1)[0] + RETURN_TYPE_EXT[stream_format.value],
+            headers={
+                "X-Num-Mappings-Applied": str(count_rules_applied),
+                "X-Num-Mappings-Skipped": str(count_rules - count_rules_applied),
+            },
+        )
+    filename, out, count_rules, count_rules_applied = await apply_mapping_async(
+        final_mapping_url, final_data_url, authorization, api_url, engine=engine,
+        return_type=return_type,
     )
     logging.info(f"POST /api/createrdf: {count_rules=}, {count_rules_applied=}")
     return {
@@ -2049,14 +2568,24 @@ def create_rdf(
         "graph": out,
         "num_mappings_applied": count_rules_applied,
         "num_mappings_skipped": count_rules - count_rules_applied,
+        "timings": timing.stage_seconds(),
     }
 
 
+def upload_filename(data_url: str, return_type: ReturnType) -> str:
+    """Derive filename from last segment of data_url + extension for return_type."""
+    last_segment = data_url.rstrip("/").split("/")[-1]
+    stem = last_segment.rsplit(".", 1)[0] if "." in last_segment else last_segment
+    ext = RETURN_TYPE_EXT.get(return_type.value, ".ttl")
+    return stem + ext
+
+
 @app.post("/api/createrdfupload", response_model=RDFResponse, summary="Create RDF from uploaded file content", tags=["convert"])
-def create_rdf_upload(
+async def create_rdf_upload(
     req: Request,
     body: RDFUploadRequest,
     return_type: ReturnType = ReturnType.turtle,
+    engine: Annotated[Optional[MappingEngine], Query(description="RML execution engine, defaults to the RML_ENGINE setting.")] = None,
 ):
     """Convert uploaded file contents to RDF using a YARRRML mapping.
 
@@ -2073,28 +2602,138 @@ def create_rdf_upload(
 
     logging.info(f"POST /api/createrdfupload {body.mapping_url}")
 
-    _, out, count_rules, count_rules_applied = apply_mapping(
+    _, out, count_rules, count_rules_applied = await apply_mapping_async(
         str(body.mapping_url),
         str(body.data_url),
         authorization,
         api_url,
         data_content=body.data_content,
+        engine=engine,
+        return_type=return_type,
     )
 
-    # Derive filename from last segment of data_url + extension for return_type
-    last_segment = str(body.data_url).rstrip("/").split("/")[-1]
-    stem = last_segment.rsplit(".", 1)[0] if "." in last_segment else last_segment
-    ext = RETURN_TYPE_EXT.get(return_type.value, ".ttl")
-    filename = stem + ext
+    filename = upload_filename(str(body.data_url), return_type)
+
+    return {
+        "filename": filename,
+        "graph": out,
+        "num_mappings_applied": count_rules_applied,
+        "num_mappings_skipped": count_rules - count_rules_applied,
+        "timings": timing.stage_seconds(),
+    }
+
+
+def map_batch_item(
+    prepared: PreparedMapping, item: RDFBatchItem, authorization, api_url: str, engine,
+    return_type: ReturnType = ReturnType.turtle,
+) -> dict:
+    """Apply a prepared mapping to one batch item and return its result line.
 
+    Every item has timings of its own, items run concurrently in one request.
+    """
+    data_url = str(item.data_url) if item.data_url else None
+    if item.data_content is not None and not data_url:
+        raise HTTPException(status_code=422, detail="data_url is required with data_content")
+    with timing.collect() as timings:
+        filename, out, count_rules, count_rules_applied = apply_mapping(
+            prepared.mapping_url,
+            data_url,
+            authorization,
+            api_url,
+            data_content=item.data_content,
+            engine=engine,
+            prepared=prepared,
+            return_type=return_type,
+        )
+    if item.data_content is not None:
+        filename = upload_filename(data_url, return_type)
     return {
         "filename": filename,
         "graph": out,
         "num_mappings_applied": count_rules_applied,
         "num_mappings_skipped": count_rules - count_rules_applied,
+        "timings": timings.as_dict(),
     }
 
 
+def stream_batch_results(
+    prepared: PreparedMapping, items: List[RDFBatchItem], authorization, api_url: str, engine,
+    return_type: ReturnType = ReturnType.turtle,
+):
+    """Map batch items on the batch executor and yield one NDJSON line per item.
+
+    Lines are yielded in completion order and carry the item index. At most
+    twice BATCH_CONCURRENCY items are in flight, so large batches do not pile
+    up finished graphs in memory.
+    """
+    pending = {}
+    next_index = 0
+    window = 2 * BATCH_CONCURRENCY
+    try:
+        while pending or next_index < len(items):
+            while next_index < len(items) and len(pending) < window:
+                future = batch_executor.submit(
+                    map_batch_item, prepared, items[next_index], authorization, api_url, engine,
+                    return_type,
+                )
+                pending[future] = next_index
+                next_index += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                item = items[index]
+                line = {"index": index, "data_url": str(item.data_url) if item.data_url else None}
+                try:
+                    line.update(future.result())
+                except HTTPException as e:
+                    line["error"] = {"status_code": e.status_code, "message": e.detail}
+                except Exception as e:
+                    logging.error(f"Batch item {index} failed: {str(e)}", exc_info=True)
+                    line["error"] = {"status_code": 500, "message": str(e)}
+                yield json.dumps(line) + "\n"
+    finally:
+        # client went away or the batch is done
+        for future in pending:
+            future.cancel()
+        prepared.cancel()
+
+
+@app.post("/api/createrdf/batch", summary="Apply one mapping to many data files", tags=["convert"])
+def create_rdf_batch(
+    req: Request,
+    body: RDFBatchRequest,
+    return_type: ReturnType = ReturnType.turtle,
+    engine: Annotated[Optional[MappingEngine], Query(description="RML execution engine, defaults to the RML_ENGINE setting.")] = None,
+):
+    """Convert many data files to RDF with the same YARRRML mapping.
+
+    The mapping, its RML rules and the template graph are fetched and prepared
+    once, then the items are mapped concurrently. The response is streamed as
+    NDJSON (`application/x-ndjson`) with one line per item as soon as it is
+    done, in completion order. Each line holds the item `index` and either the
+    fields of `/api/createrdf` or an `error` with status code and message.
+
+    Items are given by `data_url`, or by `data_content` together with a
+    `data_url` used as base URI like in `/api/createrdfupload`.
+    """
+    authorization = req.headers.get("Authorization", None)
+    api_url = setting.server + "/api/createrdf/batch"
+    logging.info(f"POST /api/createrdf/batch {body.mapping_url} with {len(body.items)} items")
+
+    # errors of the mapping itself fail the whole request before streaming starts
+    prepared = PreparedMapping(str(body.mapping_url), authorization)
+    try:
+        prepared.rml_rules
+        prepared.template()
+    except Exception:
+        prepared.cancel()
+        raise
+    return StreamingResponse(
+        stream_batch_results(prepared, body.items, authorization, api_url, engine, return_type),
+        media_type="application/x-ndjson",
+    )
+
+
 @app.post("/api/checkmapping", response_model=CheckResponse, summary="Check how many mapping rules apply to the data", tags=["validate"])
 async def checkmapping(
     req: Request,
@@ -2118,20 +2757,20 @@ async def checkmapping(
     
     logging.info(f"POST /api/checkmapping {final_mapping_url},{final_data_url}")
     authorization = req.headers.get("Authorization", None)
-    return check_mapping(final_mapping_url, final_data_url, authorization)
+    return await run_in_threadpool(check_mapping, final_mapping_url, final_data_url, authorization)
 
 
 @app.post("/api/rdfvalidator", response_model=ValidateResponse, summary="Validate RDF against a SHACL shapes graph", tags=["validate"])
-def validate_rdf(request: ValidateRequest):
+async def validate_rdf(request: ValidateRequest):
     """Validate an RDF graph against a SHACL shapes graph.
 
     Fetches both the SHACL shapes file and the RDF data file via URL, runs
     SHACL validation, and returns the conformance report together with the
     shapes graph.
     """
-    conforms, graph = shacl_validate(str(request.shapes_url), str(request.rdf_url))
+    conforms, graph = await async_shacl_validate(str(request.shapes_url), str(request.rdf_url))
     logging.info(f"POST /api/rdfvalidator: {conforms=}")
-    return {"valid": conforms, "graph": graph.serialize(format="ttl")}
+    return {"valid": conforms, "graph": await run_cpu(graph.serialize, format="ttl")}
 
 
 @app.get("/info", response_model=settings.Setting, summary="Get application configuration and version info", tags=["info"])
@@ -2139,12 +2778,40 @@ async def info() -> dict:
     return setting
 
 
+@app.get("/api/stats", summary="Get cache statistics of this worker", tags=["info"])
+async def stats() -> dict:
+    """Report cache counters, HTTP connection pool, graph process pool and admission queue usage.
+
+    Counters are kept per uvicorn worker process.
+    """
+    return {
+        "caches": cache_stats(),
+        "http_pool": pool_stats(),
+        "http_responses": response_cache_stats(),
+        "graph_pool": graph_pool.stats(),
+        "admission": admission.stats(),
+    }
+
+
+@app.get("/metrics", summary="Get Prometheus metrics of all workers", tags=["info"])
+async def get_metrics() -> Response:
+    """Export request, conversion, remote service and cache metrics for Prometheus.
+
+    Needs the optional prometheus_client package. With PROMETHEUS_MULTIPROC_DIR
+    set, the metrics of all uvicorn workers are aggregated, see the README.
+    """
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=501, detail="Metrics need the prometheus_client package")
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
 class RuleStatistics(BaseModel):
     rule_name: str = Field(title="Rule Name", description="Name of the mapping rule from YARRRML")
     predicate: Optional[str] = Field(None, title="Predicate", description="Main predicate URI used by this rule")
     triples_generated: int = Field(title="Triples Generated", description="Number of triples generated by this rule")
     subjects_affected: int = Field(title="Subjects Affected", description="Number of unique subjects this rule applied to")
-    output: Optional[str] = Field(None, title="Rule Output", description="The RDF triples generated by this rule in Turtle format")
+    output: Optional[str] = Field(None, title="Rule Output", description="The RDF triples generated by this rule in Turtle format, at most the first 100")
 
 
 class TestMappingResult(BaseModel):
@@ -2202,6 +2869,11 @@ class TestMappingResult(BaseModel):
         title="Processing Logs",
         description="Log messages from the mapping process"
     )
+    timings: Optional[Dict[str, float]] = Field(
+        None,
+        title="Stage Timings",
+        description="Seconds spent in each stage of the test, also sent as Server-Timing header"
+    )
 
     class Config:
         json_schema_extra = {
@@ -2295,7 +2967,7 @@ async def test_mapping(
     
     try:
         # Load mapping data
-        mapping_data, _ = open_file(mapping_url, None)
+        mapping_data, _ = await async_open_file(mapping_url, None)
         mapping_source = mapping_url
             
         mapping_dict = yaml.safe_load(mapping_data)
@@ -2315,29 +2987,31 @@ async def test_mapping(
         
         test_data_url = data_url if data_url else rml_data_url
         
-        # Use apply_mapping() to get properly post-processed results
+        # Use map_to_graph() to get properly post-processed results, the
+        # sources it parses are reused by the rule check below. The mapper
+        # output is tagged per rule, so one run gives the rule statistics.
+        parsed_sources = {}
+        rule_statistics = []
         try:
-            filename, output, num_rules, num_applied = apply_mapping(
-                mapping_url, data_url, None, None
+            filename, result_graph, num_rules, num_applied = await map_to_graph_async(
+                mapping_url, data_url, None, None,
+                parsed_sources=parsed_sources, rule_statistics=rule_statistics,
             )
             logging.info(f"Mapping executed: {num_rules} rules, {num_applied} triples generated")
+
+            # Rules whose iterators and conditions match the data
+            with timing.span("check"):
+                check = await run_in_threadpool(
+                    check_mapping, mapping_url, test_data_url, parsed_sources=parsed_sources
+                )
             
         except Exception as e:
             logging.error(f"Error executing mapping: {str(e)}")
             raise
-        
-        # Parse the output to count total triples
-        num_triples = 0
-        try:
-            result_graph = Graph()
-            result_graph.parse(data=output, format="turtle")
-            num_triples = len(result_graph)
-        except Exception as e:
-            logging.error(f"Error parsing result graph: {str(e)}")
-        
-        # Per-rule statistics are not calculated as they would require executing each rule separately
-        
-        logging.info("Note: Per-rule statistics not calculated (would require executing each rule separately)")
+        filename = filename.rsplit(".", 1)[0] + RETURN_TYPE_EXT.get(ReturnType.turtle.value, ".ttl")
+        # counted in the graph in memory, not by parsing the output again
+        num_triples = len(result_graph)
+        output = await run_cpu(serialize_graph, result_graph, ReturnType.turtle.value)
         
         # Remove the log handler and restore level
         root_logger.removeHandler(log_handler)
@@ -2349,13 +3023,14 @@ async def test_mapping(
             "data_url": data_url,
             "filename": filename,
             "num_rules_total": num_rules,
-            "num_rules_applied": num_rules,  # Assume all rules generated triples
-            "num_rules_skipped": 0,
+            "num_rules_applied": check["rules_applicable"],
+            "num_rules_skipped": check["rules_skipped"],
             "num_triples_generated": num_triples,
-            "rule_statistics": [],  # Empty - requires separate execution per rule
+            "rule_statistics": rule_statistics,
             "output_preview": output[:1000] if output else None,
             "error": None,
-            "logs": log_capture
+            "logs": log_capture,
+            "timings": timing.stage_seconds(),
         }
         
     except HTTPException as e:
@@ -2418,7 +3093,7 @@ if __name__ == "__main__":
     )
 
 
-def check_mapping(mapping_url, data_url, authorization=None):
+def check_mapping(mapping_url, data_url, authorization=None, parsed_sources: Optional[dict] = None):
     """
     Check mapping compatibility with data source.
     
@@ -2428,6 +3103,8 @@ def check_mapping(mapping_url, data_url, authorization=None):
     3. Condition evaluation - checks if rules with conditions match actual data
     
     Returns accurate count of applicable vs skipped rules based on condition evaluation.
+    A data source already in parsed_sources, e.g. from apply_mapping in the same
+    request, is neither fetched nor parsed again.
     """
     import json
     
@@ -2463,28 +3140,14 @@ def check_mapping(mapping_url, data_url, authorization=None):
     
     # Load and parse data source
     try:
-        data_str, filename = open_file(str(data_url), authorization)
-        
-        # Try to parse as JSON first (most common case)
-        try:
-            data_json = json.loads(data_str)
-            logging.info("Data source parsed as JSON")
-        except (json.JSONDecodeError, ValueError):
-            # Try as RDF - convert to JSON-LD
-            format = guess_format(str(data_url))
-            if format:
-                data_graph = Graph()
-                data_graph.parse(data=data_str, format=format)
-                logging.info(f"Data source parsed as RDF ({format}), converting to JSON-LD")
-                
-                # Convert to JSON-LD for condition evaluation
-                json_ld_str = data_graph.serialize(format="json-ld")
-                data_json = json.loads(json_ld_str)
-            else:
-                raise HTTPException(
-                    status_code=422,
-                    detail=f"Could not parse data source as JSON or RDF"
-                )
+        source_url = str(data_url).strip("/")
+        source = (parsed_sources or {}).get(source_url)
+        if source is None:
+            data_str, filename = open_file(source_url, authorization)
+            source = parsed_source(parsed_sources, data_str, source_url)
+        # RDF is evaluated on the same JSON-LD view the mapper gets
+        data_json = source.json
+        logging.info(f"Data source parsed as {source.format}")
     except Exception as e:
         logging.error(f"Error loading data source: {str(e)}")
         raise HTTPException(
@@ -2500,6 +3163,9 @@ def check_mapping(mapping_url, data_url, authorization=None):
     # Evaluate each mapping rule
     rules_applicable = 0
     rules_skipped = 0
+    # items selected per (source, iterator), None for iterators that failed;
+    # rules sharing an iterator evaluate it only once
+    iterator_items = {}
     
     for rule_name, rule_def in mappings.items():
         logging.debug(f"Checking rule: {rule_name}")
@@ -2525,15 +3191,20 @@ def check_mapping(mapping_url, data_url, authorization=None):
         iterator = source_def.get("iterator", "$") if isinstance(source_def, dict) else "$"
 
         # Step 1: evaluate iterator — if it yields no results the rule can never fire
-        try:
-            jsonpath_expression = jsonpath_parse(iterator)
-            matches = jsonpath_expression.find(data_json)
-        except JsonPathParserError as e:
-            logging.error(f"  Invalid JSONPath iterator '{iterator}' for rule '{rule_name}': {e}")
-            rules_skipped += 1
-            continue
-        except Exception as e:
-            logging.error(f"  Error evaluating iterator for rule '{rule_name}': {e}")
+        if (source_url, iterator) not in iterator_items:
+            try:
+                jsonpath_expression = compile_jsonpath(iterator)
+                iterator_items[source_url, iterator] = [
+                    match.value for match in jsonpath_expression.find(data_json)
+                ]
+            except JsonPathParserError as e:
+                logging.error(f"  Invalid JSONPath iterator '{iterator}' for rule '{rule_name}': {e}")
+                iterator_items[source_url, iterator] = None
+            except Exception as e:
+                logging.error(f"  Error evaluating iterator for rule '{rule_name}': {e}")
+                iterator_items[source_url, iterator] = None
+        matches = iterator_items[source_url, iterator]
+        if matches is None:
             rules_skipped += 1
             continue
 
@@ -2547,21 +3218,24 @@ def check_mapping(mapping_url, data_url, authorization=None):
             subject = rule_def.get("s", "")
             subject_refs = re.findall(r'\$\(([^)]+)\)', subject)
             if subject_refs:
+                try:
+                    subject_fields = [field_reference(ref) for ref in subject_refs]
+                except Exception:
+                    subject_fields = None
+
                 # At least one matched row must have ALL subject fields present
-                def row_has_all_refs(row):
-                    row_data = row.value if hasattr(row, "value") else row
+                def row_has_all_refs(row_data):
                     if not isinstance(row_data, dict):
                         row_data = data_json
-                    for ref in subject_refs:
+                    for field in subject_fields:
                         try:
-                            hits = jsonpath_parse(f"$.{ref}").find(row_data)
-                            if not hits or hits[0].value is None:
+                            if field(row_data) is None:
                                 return False
                         except Exception:
                             return False
                     return True
 
-                if any(row_has_all_refs(m) for m in matches):
+                if subject_fields is not None and any(row_has_all_refs(m) for m in matches):
                     rules_applicable += 1
                     logging.debug(f"  Rule '{rule_name}' subject fields {subject_refs} found - applicable")
                 else:
@@ -2573,11 +3247,8 @@ def check_mapping(mapping_url, data_url, authorization=None):
                 logging.debug(f"  Rule '{rule_name}' iterator matched {len(matches)} item(s) - applicable")
             continue
 
-        # Step 3: condition present → evaluate it against each matched item
-        condition_met = any(
-            evaluate_condition(condition, match.value, prefixes)
-            for match in matches
-        )
+        # Step 3: condition present → evaluate it over the matched items
+        condition_met = compile_condition(condition, prefixes).any(matches)
         if condition_met:
             rules_applicable += 1
             logging.debug(f"  Rule '{rule_name}' condition met - applicable")
@@ -0,0 +1,181 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import metrics
+
+# every cache registers itself here so its counters can be reported by /api/stats
+CACHES = {}
+
+
+def content_key(*parts) -> str:
+    """Build a content-addressed cache key from bytes or string parts.
+
+    Args:
+        parts: Values that together identify the cached content
+
+    Returns:
+        str: Hex encoded sha256 digest over all parts
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            part = b""
+        elif isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU cache with an optional on-disk tier.
+
+    The in-memory tier is bounded by the summed size of its values and evicts
+    the least recently used entries first. If a directory is given, bytes values
+    are also written there, so they survive worker restarts and can be shared
+    between the uvicorn workers of one container. The disk tier is bounded by
+    max_disk_bytes and pruned by file modification time, which is refreshed on
+    every read.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_bytes: int,
+        directory: str | None = None,
+        max_disk_bytes: int | None = None,
+        sizeof=len,
+    ):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes if max_disk_bytes is not None else 8 * max_bytes
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        CACHES[name] = self
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _store(self, key: str, value) -> None:
+        # caller holds the lock
+        size = self.sizeof(value)
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.cache_lookup(self.name, "hit")
+                return entry[0]
+        if self.directory:
+            try:
+                with open(self._path(key), "rb") as f:
+                    value = f.read()
+                os.utime(self._path(key))
+            except OSError:
+                pass
+            else:
+                with self._lock:
+                    self._store(key, value)
+                    self.disk_hits += 1
+                metrics.cache_lookup(self.name, "disk_hit")
+                return value
+        with self._lock:
+            self.misses += 1
+        metrics.cache_lookup(self.name, "miss")
+        return default
+
+    def put(self, key: str, value) -> None:
+        with self._lock:
+            self._store(key, value)
+        if self.directory and isinstance(value, bytes):
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(value)
+                os.replace(tmp_path, self._path(key))
+                self._prune_disk()
+            except OSError as e:
+                logging.warning(f"Could not write {self.name} cache entry to disk: {e}")
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+        if self.directory:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _prune_disk(self) -> None:
+        files = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.startswith("."):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        if total <= self.max_disk_bytes:
+            return
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                # another worker removed it already
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "disk_tier": bool(self.directory),
+            }
+
+
+def cache_stats() -> dict:
+    """Return the counters of all registered caches keyed by cache name."""
+    return {name: cache.stats() for name, cache in CACHES.items()}
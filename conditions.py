@@ -0,0 +1,328 @@
+import itertools
+import logging
+import operator
+
+from jsonpath_cache import compile_jsonpath, field_reference
+
+try:
+    import numpy
+except ImportError:  # optional, ranges are compared in Python without it
+    numpy = None
+
+# iterator items are evaluated in blocks of this many rows, so a condition met
+# by an early item does not extract the parameters of all items
+BLOCK_ROWS = 1024
+
+# parameter names of the arguments of the FnO functions, tried in this order
+STR1 = ("str1", "grel:valueParam", "valueParam")
+STR2 = ("str2", "grel:valueParam2", "valueParam2")
+OTHER_STR = ("otherStr", "idlab-fn:_otherStr")
+DELIMITER = ("delimiter", "idlab-fn:_delimiter")
+LIST = ("list", "idlab-fn:_list")
+STR = ("str", "idlab-fn:_str")
+TEST = ("test", "idlab-fn:_test")
+FROM = ("from", "idlab-fn:_from")
+TO = ("to", "idlab-fn:_to")
+
+FUNCTIONS = (
+    "equal",
+    "notEqual",
+    "stringContainsOtherString",
+    "listContainsElement",
+    "isNull",
+    "inRange",
+)
+
+
+def normalize_function_name(function_ref: str, prefixes: dict) -> str:
+    """Normalize a function reference to its short name.
+
+    Handles three formats:
+    - Short name: "equal"
+    - Prefixed: "idlab-fn:equal"
+    - Full IRI: "https://w3id.org/imec/idlab/function#equal"
+
+    Args:
+        function_ref: Function reference from YARRRML condition
+        prefixes: Dict of prefix -> namespace mappings
+
+    Returns:
+        Normalized function name (e.g., "equal", "notEqual", etc.)
+    """
+    # If it's already a short name, return it
+    if ":" not in function_ref and "/" not in function_ref:
+        return function_ref
+
+    # Handle prefixed format (e.g., "idlab-fn:equal")
+    if ":" in function_ref and "/" not in function_ref:
+        prefix, local_name = function_ref.split(":", 1)
+        return local_name
+
+    # Handle full IRI - extract last part after # or /
+    if "#" in function_ref:
+        return function_ref.split("#")[-1]
+    elif "/" in function_ref:
+        return function_ref.split("/")[-1]
+
+    return function_ref
+
+
+class Column(list):
+    """Values of one parameter, one per item of a block."""
+
+
+def parameter_reference(value: str):
+    """Compile a "$(field)" or "$.path" parameter value into a function of an item.
+
+    Returns:
+        Function returning the first referenced value of an item, None if absent
+    """
+    try:
+        if value.startswith("$(") and value.endswith(")"):
+            return field_reference(value[2:-1])
+        expression = compile_jsonpath(value)
+    except Exception as e:
+        logging.warning(f"JSONPath parse error for '{value}': {e}")
+        return lambda item: None
+
+    def find(item):
+        try:
+            matches = expression.find(item)
+        except Exception:
+            return None
+        return matches[0].value if matches else None
+
+    return find
+
+
+def first_truthy(values: list):
+    """Evaluate `values[0] or values[1] or ...` per item over columns and scalars."""
+    result = values[-1]
+    for value in reversed(values[:-1]):
+        if not isinstance(value, Column):
+            if value:
+                result = value
+        elif isinstance(result, Column):
+            result = Column(v if v else r for v, r in zip(value, result))
+        else:
+            result = Column(v if v else result for v in value)
+    return result
+
+
+def per_item(function, *arguments):
+    """Apply function per item over columns and scalars, once if all arguments are scalars."""
+    columns = [argument for argument in arguments if isinstance(argument, Column)]
+    if not columns:
+        return function(*arguments)
+    rows = len(columns[0])
+    return Column(map(function, *(
+        argument if isinstance(argument, Column) else itertools.repeat(argument, rows)
+        for argument in arguments
+    )))
+
+
+def text(value) -> str:
+    return str(value) if value is not None else ""
+
+
+def contains_other_string(value: str, other, delimiter) -> bool:
+    if not other:
+        return False
+    return other in value.split(delimiter)
+
+
+def list_contains_element(list_param, str_param) -> bool:
+    if not list_param or not str_param:
+        return False
+    # list_param might be a string representation or actual list
+    if isinstance(list_param, str):
+        list_items = list_param.split(",")
+    elif isinstance(list_param, list):
+        list_items = list_param
+    else:
+        return False
+    return str_param in list_items
+
+
+def is_null(value) -> bool:
+    return value is None or value == "" or value == "null"
+
+
+def in_range(test, low, high) -> bool:
+    try:
+        test = float(test) if test is not None else None
+        low = float(low) if low is not None else None
+        high = float(high) if high is not None else None
+    except (ValueError, TypeError):
+        return False
+    if test is None or low is None or high is None:
+        return False
+    return low <= test <= high
+
+
+def numeric_in_range(test, low, high):
+    """Compare numeric columns with NumPy, None if a value needs the conversion of in_range."""
+    arrays = []
+    for value in (test, low, high):
+        if isinstance(value, Column):
+            if not all(v is None or type(v) in (int, float) for v in value):
+                return None
+            try:
+                # None becomes NaN, which is in no range
+                arrays.append(numpy.array(value, dtype=float))
+            except OverflowError:
+                return None
+        elif value is None:
+            return False
+        else:
+            try:
+                arrays.append(float(value))
+            except (ValueError, TypeError):
+                return False
+    test, low, high = arrays
+    return (low <= test) & (test <= high)
+
+
+class CompiledCondition:
+    """A YARRRML condition compiled once and evaluated over blocks of iterator items.
+
+    The references among the parameters are extracted from a block of items
+    into one Column each, and the function is applied to the columns. The
+    arguments of the function are resolved from the parameters in the order
+    of the parameter name tuples, an empty value falling back to the next
+    name. evaluate_fno_function evaluates one call of the same functions.
+    """
+
+    def __init__(self, function_name: str | None, constants: dict, references: dict):
+        """Collect the compiled parameters.
+
+        Args:
+            function_name: Normalized function name, None for conditions that always hold
+            constants: Parameter name -> literal value
+            references: Parameter name -> function extracting the value from an item
+        """
+        self.function_name = function_name
+        self.constants = constants
+        self.references = references
+
+    def evaluate(self, items: list):
+        """Evaluate the condition for a block of items.
+
+        Returns:
+            bool holding for all items, or a Column or NumPy array of one bool per item
+        """
+        if self.function_name is None:
+            return True
+        values = dict(self.constants)
+        for name, reference in self.references.items():
+            values[name] = Column(map(reference, items))
+
+        def argument(names, default=None):
+            return first_truthy([values.get(name) for name in names[:-1]] + [values.get(names[-1], default)])
+
+        function_name = self.function_name
+        if function_name in ("equal", "notEqual", "stringContainsOtherString", "isNull"):
+            str1 = per_item(text, argument(STR1))
+        if function_name == "equal":
+            return per_item(operator.eq, str1, per_item(text, argument(STR2)))
+        if function_name == "notEqual":
+            return per_item(operator.ne, str1, per_item(text, argument(STR2)))
+        if function_name == "stringContainsOtherString":
+            return per_item(
+                contains_other_string, str1, argument(OTHER_STR), argument(DELIMITER, ",")
+            )
+        if function_name == "listContainsElement":
+            return per_item(list_contains_element, argument(LIST), argument(STR))
+        if function_name == "isNull":
+            return per_item(is_null, first_truthy([values.get(STR[0]), values.get(STR[1]), str1]))
+        # inRange
+        test, low, high = argument(TEST), argument(FROM), argument(TO)
+        if numpy is not None and any(isinstance(v, Column) for v in (test, low, high)):
+            result = numeric_in_range(test, low, high)
+            if result is not None:
+                return result
+        return per_item(in_range, test, low, high)
+
+    def any(self, items: list) -> bool:
+        """Return whether the condition holds for at least one item.
+
+        Blocks of BLOCK_ROWS items are evaluated until one of them has an
+        item the condition holds for.
+        """
+        for start in range(0, len(items), BLOCK_ROWS):
+            result = self.evaluate(items[start:start + BLOCK_ROWS])
+            if isinstance(result, Column):
+                if any(result):
+                    return True
+            elif numpy is not None and isinstance(result, numpy.ndarray):
+                if result.any():
+                    return True
+            else:
+                # the same for every item
+                return bool(result)
+        return False
+
+
+def evaluate_fno_function(function_name: str, parameters: dict) -> bool:
+    """
+    Evaluate an FnO function with given parameters.
+
+    Args:
+        function_name: Normalized function name (e.g., "equal", "notEqual")
+        parameters: Dict of parameter name -> value
+
+    Returns:
+        Boolean result of function evaluation, True for unknown functions
+    """
+    if function_name not in FUNCTIONS:
+        logging.warning(f"Unknown FnO function '{function_name}' - assuming true")
+        return True
+    # with constants only, the condition is evaluated once as for a single item
+    return bool(CompiledCondition(function_name, parameters, {}).evaluate([]))
+
+
+def compile_condition(condition_dict: dict, prefixes: dict) -> CompiledCondition:
+    """Compile a YARRRML condition.
+
+    Args:
+        condition_dict: Condition from YARRRML mapping
+            Example: {
+                "function": "equal",
+                "parameters": [
+                    ["str1", "$(label)"],
+                    ["str2", "aktuelle Probe"]
+                ]
+            }
+        prefixes: Dict of prefix -> namespace URL mappings
+
+    Returns:
+        CompiledCondition, holding for every item if the condition is empty,
+        has no function or an unknown one
+    """
+    if not condition_dict:
+        # No condition means always applicable
+        return CompiledCondition(None, {}, {})
+
+    function_ref = condition_dict.get("function")
+    if not function_ref:
+        logging.warning("Condition missing 'function' field - assuming true")
+        return CompiledCondition(None, {}, {})
+
+    function_name = normalize_function_name(function_ref, prefixes)
+    if function_name not in FUNCTIONS:
+        logging.warning(f"Unknown FnO function '{function_name}' - assuming true")
+        return CompiledCondition(None, {}, {})
+
+    constants = {}
+    references = {}
+    for param in condition_dict.get("parameters", []):
+        if isinstance(param, list) and len(param) == 2:
+            param_name, param_value = param
+            # a later parameter of the same name replaces the earlier one
+            constants.pop(param_name, None)
+            references.pop(param_name, None)
+            if isinstance(param_value, str) and param_value.startswith("$"):
+                references[param_name] = parameter_reference(param_value)
+            else:
+                constants[param_name] = param_value
+    return CompiledCondition(function_name, constants, references)
@@ -0,0 +1,768 @@
+import logging
+import multiprocessing
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from rdflib import BNode, Graph, Literal, Namespace, URIRef
+from rdflib.namespace import CSVW, PROV, RDF, RDFS, XSD
+
+import settings
+from rdf_writer import ABSOLUTE_IRI, LINE_FORMATS, iter_lines, iter_quads, iter_triples, serialize_lines
+from rmlmapper import TripleTemplate, strip_namespace
+from timing import collect, current, record, span, timed
+from uri_rewrite import PrefixRewriter, TypeLiteralRepair
+
+setting = settings.Setting()
+
+# formats written with an empty base, so relative IRIs stay relative
+BASE_FORMATS = ("turtle", "longturtle", "n3", "trig")
+
+
+def graph_name(graph: Graph) -> Optional[URIRef]:
+    """Return the graph IRI used for N-Quads output, None for the default graph."""
+    return graph.identifier if isinstance(graph.identifier, URIRef) else None
+
+
+@timed("serialize")
+def serialize_graph(graph: Graph, format: str = "turtle") -> str:
+    """Serialize a graph in the requested format.
+
+    N-Triples and N-Quads are written line by line in linear time instead of
+    going through an rdflib serializer, with relative IRIs resolved against
+    the graph name.
+
+    Raises:
+        HTTPException: 422 if a line format has relative IRIs but the graph no name
+    """
+    if format in LINE_FORMATS:
+        try:
+            return serialize_lines(graph, format, graph_name(graph))
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    if format in BASE_FORMATS:
+        return graph.serialize(format=format, base="")
+    return graph.serialize(format=format)
+
+
+def base_uri_rewriter(base_uri: str) -> Optional[PrefixRewriter]:
+    """Return the rewriter replacing http://example.com URIs with base_uri.
+
+    Args:
+        base_uri: Base URI to use (e.g., 'http://example.org/' or '#' for relative)
+
+    Returns:
+        PrefixRewriter, None if base_uri is empty
+    """
+    if not base_uri:
+        return None
+
+    # Handle different base formats
+    # - Full URI: "http://purl.matolab.org/mseo/mappings/"
+    # - Relative: "#"
+    # Ensure trailing separator if not "#" and doesn't already have one
+    if base_uri != "#":
+        if not base_uri.endswith(("/", "#")):
+            base_uri += "/"
+
+    logging.info(f"Replacing http://example.com URIs with base: {base_uri}")
+    return PrefixRewriter({"http://example.com": base_uri})
+
+
+def apply_all_namespaces(
+    graph: Graph,
+    accumulated_namespaces: dict,
+    data_namespace: str | None,
+    method_namespace: str | None
+) -> Graph:
+    """Centralized namespace binding routine - call ONCE before serialization.
+
+    Args:
+        graph: The RDF graph to bind namespaces to
+        accumulated_namespaces: Dict of {prefix: namespace_url} from template/mapping
+        csv_namespace: CSV namespace from JSON-LD @context (highest priority)
+        data_namespace: Data namespace from primary data URL
+        method_namespace: Method namespace from YARRRML mapping prefixes
+
+    Returns:
+        The graph with all namespaces properly bound
+    """
+    logging.info("=" * 80)
+    logging.info("APPLYING ALL NAMESPACES (CENTRALIZED)")
+    logging.info("=" * 80)
+
+    # 1. Bind empty prefix for relative IRIs (e.g., :SpecimenID)
+    graph.namespace_manager.bind("", Namespace(""), override=True, replace=True)
+    logging.info("✓ Bound empty prefix '' to empty namespace")
+
+    # 2. Bind 'base' prefix to empty namespace
+    graph.namespace_manager.bind("base", Namespace(""), override=True, replace=True)
+    logging.info("✓ Bound 'base' prefix to empty namespace")
+    logging.debug(accumulated_namespaces)
+    # 3. Bind all accumulated namespaces from template/mapping graphs
+    logging.info(f"Binding {len(accumulated_namespaces)} accumulated namespaces:")
+    for prefix, namespace_str in accumulated_namespaces.items():
+        graph.namespace_manager.bind(prefix, Namespace(namespace_str), override=True)
+        logging.info(f"  ✓ {prefix}: {namespace_str}")
+
+
+    # 6. Log final namespace bindings
+    logging.info("=" * 80)
+    logging.info("FINAL NAMESPACE BINDINGS IN GRAPH:")
+    for prefix, namespace in graph.namespaces():
+        logging.info(f"  {prefix or '(empty)'}: {namespace}")
+    logging.info("=" * 80)
+
+    return graph
+
+
+def add_prov(graph: Graph, api_url: str, data_url: str, used: list = []) -> Graph:
+    """Add prov-o information to output graph
+
+    Args:
+        graph (Graph): Graph to add prov information to
+        api_url (str): the api url
+        data_url (str): the url to the rdf file that was used
+
+    Returns:
+        Graph: Input Graph with prov metadata of the api call
+    """
+    graph.bind("prov", PROV)
+
+    root = BNode()
+    api_node = URIRef(api_url)
+    graph.add((root, PROV.wasGeneratedBy, api_node))
+    graph.add((api_node, RDF.type, PROV.Activity))
+    software_node = URIRef(setting.source + "/releases/tag/" + setting.version)
+    graph.add((api_node, PROV.wasAssociatedWith, software_node))
+    graph.add((software_node, RDF.type, PROV.SoftwareAgent))
+    graph.add((software_node, RDFS.label, Literal(setting.name + setting.version)))
+    graph.add((software_node, PROV.hadPrimarySource, URIRef(setting.source)))
+    graph.add(
+        (
+            root,
+            PROV.generatedAtTime,
+            Literal(str(datetime.now().isoformat()), datatype=XSD.dateTime),
+        )
+    )
+    entity = URIRef(str(data_url))
+    graph.add((entity, RDF.type, PROV.Entity))
+    derivation = BNode()
+    graph.add((derivation, RDF.type, PROV.Derivation))
+    graph.add((derivation, PROV.entity, entity))
+    graph.add((derivation, PROV.hadActivity, api_node))
+    graph.add((root, PROV.qualifiedDerivation, derivation))
+    graph.add((root, PROV.wasDerivedFrom, entity))
+    if used:
+        [graph.add((api_node, PROV.wasInformedBy, URIRef(entry))) for entry in used]
+    return graph
+
+
+# triples of a rule shown in the output of its RuleStatistics
+RULE_OUTPUT_TRIPLES = 100
+
+
+def split_rule_graphs(quads, rule_graphs: dict, rule_triples: dict):
+    """Yield the triples of quads, collecting them per rule in rule_triples.
+
+    Args:
+        quads: (subject, predicate, object, graph) tuples, see iter_quads
+        rule_graphs: Graph IRI -> rule name, see tag_rule_graphs
+        rule_triples: Dict filled with {rule name: set of triples}
+    """
+    for s, p, o, graph in quads:
+        name = rule_graphs.get(str(graph)) if graph is not None else None
+        if name is not None:
+            rule_triples.setdefault(name, set()).add((s, p, o))
+        yield s, p, o
+
+
+def rule_statistics(rule_names: list, rule_triples: dict, namespaces: list) -> list:
+    """Summarize the triples generated by each rule.
+
+    Args:
+        rule_names: Rules to report in this order, also if they generated nothing
+        rule_triples: Rule name -> set of triples, rules missing in rule_names are appended
+        namespaces: Namespace bindings of the rule outputs
+
+    Returns:
+        List of dicts with the fields of RuleStatistics
+    """
+    statistics = []
+    for name in list(rule_names) + [name for name in rule_triples if name not in rule_names]:
+        triples = rule_triples.get(name, set())
+        predicates = Counter(p for _, p, _ in triples if p != RDF.type)
+        output = None
+        if triples:
+            graph = Graph(bind_namespaces="none")
+            for prefix, namespace in namespaces:
+                graph.bind(prefix, namespace, override=True, replace=True)
+            graph.addN((s, p, o, graph) for s, p, o in sorted(triples)[:RULE_OUTPUT_TRIPLES])
+            output = serialize_graph(graph, "turtle")
+        statistics.append({
+            "rule_name": name,
+            # the most frequent one, ties broken by IRI so both engines agree
+            "predicate": str(min(predicates, key=lambda p: (-predicates[p], p))) if predicates else None,
+            "triples_generated": len(triples),
+            "subjects_affected": len({s for s, _, _ in triples}),
+            "output": output,
+        })
+    return statistics
+
+
+# graph attributes of a GraphJob, sent to pool processes as N-Triples
+GRAPH_FIELDS = ("mapping_graph", "data_graph", "template_graph")
+# row templates compiled in a pool process, keyed by template url and N-Triples
+_row_templates = {}
+_ROW_TEMPLATES_KEPT = 8
+# N-Triples only has absolute IRIs, relative ones are sent below this prefix
+RELATIVE_IRI = "urn:rdfconverter:relative:"
+
+
+def graph_text(graph: Graph) -> str:
+    """Write a graph as N-Triples for another process, keeping relative IRIs, see text_triples."""
+
+    def absolute(term):
+        if isinstance(term, URIRef) and not ABSOLUTE_IRI.match(term):
+            return URIRef(RELATIVE_IRI + term)
+        return term
+
+    triples = ((absolute(s), absolute(p), absolute(o)) for s, p, o in graph)
+    return b"".join(iter_lines(triples, "nt")).decode("utf-8")
+
+
+def text_triples(text: str):
+    """Parse the N-Triples of graph_text, turning the IRIs below RELATIVE_IRI back into relative ones."""
+
+    def relative(term):
+        if isinstance(term, URIRef) and str.startswith(term, RELATIVE_IRI):
+            return URIRef(term[len(RELATIVE_IRI):])
+        return term
+
+    for s, p, o in iter_triples(text):
+        yield relative(s), relative(p), relative(o)
+
+
+class GraphJob:
+    """The graph stages of a mapping, from the mapper output to the joined graph.
+
+    Everything the stages need is held by the job, so they can run in
+    another process. Pickled, the graphs are N-Triples documents plus their
+    namespace bindings, parsed again by load_graphs; the remote mapper output
+    already is N-Quads text.
+    """
+
+    def __init__(
+        self,
+        mapping_output: Optional[str],
+        mapping_graph: Optional[Graph],
+        mapping_dict: dict,
+        mapping_namespaces: list,
+        data_graph: Graph,
+        data_namespaces: Optional[dict],
+        is_rdf_data: bool,
+        rowwise: bool,
+        template_url: Optional[str],
+        template_graph: Optional[Graph],
+        has_template: bool,
+        row_template: Optional[TripleTemplate],
+        primary_data_url: Optional[str],
+        api_url: str,
+        used_resources: list,
+        provenance: bool,
+        rule_graphs: Optional[dict] = None,
+        rule_triples: Optional[dict] = None,
+        input_bytes: Optional[int] = None,
+    ):
+        """Collect the inputs of the graph stages.
+
+        Args:
+            mapping_output: N-Quads output of the rmlmapper, None with mapping_graph
+            mapping_graph: Output graph of the native engine, None with mapping_output
+            mapping_dict: YARRRML mapping with the request's base
+            mapping_namespaces: Namespace bindings of the mapping output
+            data_graph: Primary data graph if the data is RDF, else empty
+            data_namespaces: Namespaces of the JSON-LD @context of the data
+            is_rdf_data: Whether the primary data is RDF
+            rowwise: Whether the template is duplicated per csvw:Row
+            template_url: Template namespace ending in "/", None without template
+            template_graph: Template graph with the template namespace
+            has_template: Whether the template graph was loaded
+            row_template: Compiled row template, built from template_graph if None
+            primary_data_url: URL of the primary data, names the joined graph
+            api_url: Full API URL for provenance
+            used_resources: Mapping and template URLs for provenance
+            provenance: Whether to add prov-o information
+            rule_graphs: Graph IRI -> rule name of the mapper output, see
+                tag_rule_graphs, collects rule_statistics if given
+            rule_triples: Rule name -> triples of the native engine output,
+                collects rule_statistics if given
+            input_bytes: Size of the data sources, for the conversion metrics
+        """
+        self.mapping_output = mapping_output
+        self.mapping_graph = mapping_graph
+        self.mapping_dict = mapping_dict
+        self.mapping_namespaces = mapping_namespaces
+        self.data_graph = data_graph
+        self.data_namespaces = data_namespaces
+        self.is_rdf_data = is_rdf_data
+        self.rowwise = rowwise
+        self.template_url = template_url
+        self.template_graph = template_graph
+        self.has_template = has_template
+        self.row_template = row_template
+        # N-Triples of the template graph once unpickled, keys the compiled row templates
+        self.template_text = None
+        self.primary_data_url = primary_data_url
+        self.api_url = api_url
+        self.used_resources = used_resources
+        self.provenance = provenance
+        self.rule_graphs = rule_graphs
+        self.rule_triples = rule_triples
+        # filled by join if rule_graphs or rule_triples are given, see rule_statistics
+        self.rule_statistics = None
+        self.input_bytes = input_bytes
+        # triples of the joined graph, set by join
+        self.num_triples = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for field in GRAPH_FIELDS:
+            graph = state[field]
+            if graph is not None:
+                state[field] = (graph_text(graph), list(graph.namespaces()))
+        # compiled again by the process, see get_row_template
+        state["row_template"] = None
+        return state
+
+    def load_graphs(self) -> None:
+        """Parse the graphs of an unpickled job, see __getstate__.
+
+        Called by the job's process rather than while unpickling, so a graph
+        that can not be parsed fails the job instead of the pool.
+
+        Raises:
+            HTTPException: 500 if a graph can not be parsed
+        """
+        for field in GRAPH_FIELDS:
+            value = getattr(self, field)
+            if isinstance(value, tuple):
+                text, namespaces = value
+                graph = Graph(bind_namespaces="none")
+                for prefix, namespace in namespaces:
+                    graph.bind(prefix, namespace)
+                try:
+                    graph.addN((s, p, o, graph) for s, p, o in text_triples(text))
+                except Exception as e:
+                    raise HTTPException(status_code=500, detail=f"Could not load {field}: {e}")
+                setattr(self, field, graph)
+                if field == "template_graph":
+                    self.template_text = text
+
+    def get_row_template(self) -> TripleTemplate:
+        if self.row_template is None:
+            template_text = self.template_text or graph_text(self.template_graph)
+            key = (self.template_url, template_text)
+            row_template = _row_templates.get(key)
+            if row_template is None:
+                if len(_row_templates) >= _ROW_TEMPLATES_KEPT:
+                    _row_templates.pop(next(iter(_row_templates)))
+                row_template = _row_templates[key] = TripleTemplate(
+                    self.template_graph, self.template_url
+                )
+            self.row_template = row_template
+        return self.row_template
+
+    def join(self) -> Graph:
+        """Run the graph stages and return the joined graph.
+
+        Raises:
+            HTTPException: 422 if the mapper output can not be parsed
+        """
+        mapping_dict = self.mapping_dict
+        data_graph = self.data_graph
+        is_rdf_data = self.is_rdf_data
+        template_url = self.template_url
+        template_graph = self.template_graph
+        primary_data_url = self.primary_data_url
+
+        # relative IRIs in the mapper output, e.g. from base '#', are resolved against it
+        base_uri = mapping_dict.get("base", "")
+
+        rule_triples = self.rule_triples
+        if self.mapping_graph is None and self.rule_graphs is not None:
+            # the graph of each quad names the rule that generated the triple
+            rule_triples = {}
+            mapping_triples = split_rule_graphs(
+                iter_quads(self.mapping_output, base_uri), self.rule_graphs, rule_triples
+            )
+        elif self.mapping_graph is None:
+            # N-Quads output is parsed line by line while the triples are rewritten
+            # and added to their final graph, without an intermediate graph
+            mapping_triples = iter_triples(self.mapping_output, base_uri)
+        else:
+            mapping_triples = self.mapping_graph
+
+        # POST-PROCESS 1: Replace http://example.com URIs with base URI from mapping
+        base_rewriter = base_uri_rewriter(base_uri)
+        if base_rewriter:
+            mapping_triples = base_rewriter.triples(mapping_triples)
+
+        # POST-PROCESS 2: Fix string literal type declarations that should be URIRefs
+        type_repair = TypeLiteralRepair(mapping_dict.get("prefixes", {}))
+        if isinstance(mapping_triples, Graph):
+            # the repair only visits the rdf:type triples of a graph
+            mapping_triples = iter(type_repair.repair_graph(mapping_triples))
+        else:
+            mapping_triples = type_repair.triples(mapping_triples)
+
+        # Transform template namespace URIs to RELATIVE URIs (no scheme) - only if template was loaded
+        template_rewriter = PrefixRewriter({template_url: "#"} if template_url else {})
+
+        # named after the primary data, which N-Quads output uses as graph name
+        joined_graph = Graph(identifier=URIRef(primary_data_url)) if primary_data_url else Graph()
+
+        with span("parse"):
+            try:
+                if self.rowwise:
+                    # the row duplication looks up mapping results, so they need a graph
+                    mapping_graph = Graph()
+                    mapping_graph.addN((s, p, o, mapping_graph) for s, p, o in mapping_triples)
+                    num_triples_generated = len(mapping_graph)
+                else:
+                    joined_graph.addN(
+                        (s, p, o, joined_graph) for s, p, o in template_rewriter.triples(mapping_triples)
+                    )
+                    num_triples_generated = len(joined_graph)
+            except Exception as e:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"Could not parse mapping results to result graph: {str(e)}"
+                ) from e
+        # the mapper output is not needed anymore
+        self.mapping_output = self.mapping_graph = mapping_triples = self.rule_triples = None
+        if base_rewriter:
+            logging.info(f"✓ Replaced {base_rewriter.rewritten_terms} terms with base URI: {base_uri}")
+
+        # Count YARRRML rules from mapping dict
+        num_yarrrml_rules = len(mapping_dict.get("mappings", {}))
+        logging.info(
+            "number of YARRRML rules: {}, triples generated: {}".format(
+                num_yarrrml_rules, num_triples_generated
+            )
+        )
+
+        # join and prepare for output
+        # copy data entities into joined graph only if data was RDF
+        # For plain JSON, RML mapper generates all the triples
+        template_start = time.perf_counter()
+        if self.rowwise:
+            rows = list(data_graph[: RDF.type : CSVW.Row])
+            if is_rdf_data:
+                joined_graph += data_graph
+            # map_content=mapping_graph.serialize()
+            # mapping_graph.serialize("map_graph.ttl")
+            # data_graph.serialize("data_graph.ttl")
+            tablegroup = next(data_graph[: RDF.type : CSVW.TableGroup])
+            column_maps = {}
+            for column in data_graph[: RDF.type : CSVW.Column]:
+                column_maps[column] = {
+                    "po": list(mapping_graph.predicate_objects(subject=column)),
+                    "propertyUrl": next(
+                        data_graph.objects(subject=column, predicate=CSVW.propertyUrl),
+                        column,
+                    ),
+                }
+            non_column_subjects = [
+                subject
+                for subject in mapping_graph.subjects(unique=True)
+                if subject not in column_maps.keys()
+            ]
+            note_maps = {
+                note: {"po": list(mapping_graph.predicate_objects(note))}
+                for note in non_column_subjects
+            }
+            for_row_to_set = list()
+
+            # adding tripples for columns
+            print("column_map:{}".format(column_maps))
+            for column, data in column_maps.items():
+                print(column, data)
+                property = data["propertyUrl"]
+                for predicate, object in data["po"]:
+                    for_row_to_set.append(
+                        (property, predicate, strip_namespace(str(object)))
+                    )
+            print("to set for row: {}".format(for_row_to_set))
+
+            # adding tripples for notes
+            for_copy_to_set = list()
+            for note, data in note_maps.items():
+                for predicate, object in data["po"]:
+                    for_copy_to_set.append((note, predicate, strip_namespace(str(object))))
+
+            # print(for_copy_to_set)
+            # the template is parsed once, rows only substitute its namespace
+            row_template = self.get_row_template()
+            for prefix, namespace in row_template.namespaces:
+                joined_graph.bind(prefix, namespace)
+            joined_graph.addN((s, p, o, joined_graph) for s, p, o in row_template.constant)
+
+            # values of the column properties for all data nodes, one pass per column
+            row_values = {property: {} for property, _, _ in for_row_to_set}
+            for property, values in row_values.items():
+                for data_node, value in joined_graph.subject_objects(property):
+                    values.setdefault(data_node, value)
+
+            logging.info("dublicating template graph for {} rows".format(len(rows)))
+            for row in rows:
+                data_node = data_graph.value(row, CSVW.describes)
+                quads = row_template.instantiate(data_node + "/", joined_graph)
+                row_ns = Namespace(data_node + "/")
+                joined_graph.bind("row" + str(data_node).rsplit("-", 1)[-1], row_ns)
+                # set mapping realtions on each individual row
+                for property, predicate, object in for_row_to_set:
+                    subject = row_values[property].get(data_node)
+                    if subject:
+                        quads.append((subject, predicate, row_ns[object], joined_graph))
+                for subject, predicate, object in for_copy_to_set:
+                    quads.append((subject, predicate, row_ns[object], joined_graph))
+                joined_graph.addN(quads)
+
+            if template_url:
+                logging.info(f"Transforming template URIs from {template_url} to relative URIs")
+                joined_graph = template_rewriter.rewrite_graph(joined_graph)
+
+        else:
+            # Join graphs based on what's available, the mapping results are
+            # already in, template URIs are made relative while adding
+            if template_graph and self.has_template:
+                joined_graph.addN(
+                    (s, p, o, joined_graph) for s, p, o in template_rewriter.triples(template_graph)
+                )
+
+            # Only add data_graph if the data source was RDF
+            # For plain JSON, RML rules generate all needed triples
+            if is_rdf_data:
+                joined_graph.addN(
+                    (s, p, o, joined_graph) for s, p, o in template_rewriter.triples(data_graph)
+                )
+            if template_url:
+                logging.info(
+                    f"Transformed {template_rewriter.rewritten_terms} terms from template namespace to relative URIs"
+                )
+        record("template", time.perf_counter() - template_start)
+
+        # NAMESPACE ACCUMULATION STRATEGY:
+        # Collect all namespaces BEFORE binding to avoid conflicts
+        # Priority: mapping < template < @context < YARRRML (data_graph EXCLUDED - it loses @context!)
+        logging.info("Accumulating namespaces from all sources...")
+
+        accumulated_namespaces = {}
+
+        # 1. From mapping graph (lowest priority)
+        for prefix, namespace in self.mapping_namespaces:
+            if prefix not in ['', 'base']:
+                accumulated_namespaces[prefix] = str(namespace)
+                logging.debug(f"Accumulated from mapping: {prefix} -> {namespace}")
+
+        # 2. From template graph (medium priority) - only if template was loaded
+        if template_graph:
+            for prefix, namespace in template_graph.namespaces():
+                if prefix not in ['', 'base']:
+                    accumulated_namespaces[prefix] = str(namespace)
+                    logging.debug(f"Accumulated from template: {prefix} -> {namespace}")
+
+        # 3. From JSON-LD @context if it was extracted (high priority for csv!)
+        # This is the ORIGINAL csv namespace before any RDFLib parsing
+        if self.data_namespaces:
+            for prefix, namespace in self.data_namespaces.items():
+                if prefix not in ['', 'base']:
+                    accumulated_namespaces[prefix] = str(namespace)
+                    logging.debug(f"Accumulated from @context: {prefix} -> {namespace}")
+
+        # 4. From YARRRML prefixes dictionary (HIGHEST PRIORITY - preserves user intent!)
+        # Extract prefixes directly from the mapping definition
+        yarrrml_prefixes = mapping_dict.get("prefixes", {})
+        for prefix, namespace in yarrrml_prefixes.items():
+            # Skip special prefixes that have dedicated handling
+            if prefix not in ['', 'base', 'template', 'method', 'data']:
+                accumulated_namespaces[prefix] = str(namespace)
+                logging.info(f"✓ Preserved YARRRML prefix: {prefix} -> {namespace}")
+
+        logging.debug(accumulated_namespaces)
+        logging.info(f"Total accumulated namespaces: {len(accumulated_namespaces)}")
+
+        if self.provenance:
+            add_prov(joined_graph, self.api_url, primary_data_url, self.used_resources)
+            logging.info(f"Added provenance metadata for data: {primary_data_url}, API: {self.api_url}")
+
+        # APPLY ALL NAMESPACES ONCE - centralized binding right before serialization
+        apply_all_namespaces(
+            joined_graph,
+            accumulated_namespaces,
+            primary_data_url,
+            template_url
+        )
+
+        if rule_triples is not None:
+            # the rules' triples as they are in the joined graph
+            def final_triples(triples):
+                for s, p, o in triples:
+                    if base_rewriter:
+                        s, p, o = base_rewriter.term(s), base_rewriter.term(p), base_rewriter.term(o)
+                    if p == RDF.type and isinstance(o, Literal):
+                        o = type_repair.term(o) or o
+                    yield template_rewriter.term(s), template_rewriter.term(p), template_rewriter.term(o)
+
+            self.rule_statistics = rule_statistics(
+                list(mapping_dict.get("mappings", {})),
+                {name: set(final_triples(triples)) for name, triples in rule_triples.items()},
+                list(joined_graph.namespaces()),
+            )
+        self.num_triples = len(joined_graph)
+        return joined_graph
+
+
+class GraphStageError(Exception):
+    """HTTPException of a pool process, which can not be unpickled as it is."""
+
+    def __init__(self, status_code: int, detail):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def render_job(job: GraphJob, format: str) -> tuple[str, float, float, dict, int]:
+    """Join and serialize the graph of a job in a pool process.
+
+    Returns:
+        Tuple of (document, wall clock time the job started, seconds it took,
+        seconds per stage for the timings of the request, triples of the graph)
+    """
+    started_at = time.time()
+    start = time.perf_counter()
+    # the stages are observed by the worker that submitted the job
+    with collect(observe=False) as timings:
+        try:
+            job.load_graphs()
+            out = serialize_graph(job.join(), format)
+        except HTTPException as e:
+            raise GraphStageError(e.status_code, e.detail) from None
+    return out, started_at, time.perf_counter() - start, timings.stages, job.num_triples
+
+
+class GraphPool:
+    """Process pool running the graph stages of mappings outside of the web worker.
+
+    Processes are started with forkserver and replaced after tasks_per_child
+    jobs, so memory rdflib does not give back is bounded. Jobs wait in the
+    queue of the pool while all processes are busy; the time waited and the
+    time run are counted separately.
+    """
+
+    def __init__(self, processes: int, tasks_per_child: int):
+        self.processes = processes
+        self.tasks_per_child = tasks_per_child
+        self._executor = None
+        self._lock = threading.Lock()
+        self._counts = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "queue_wait_seconds": 0.0,
+            "max_queue_wait_seconds": 0.0,
+            "exec_seconds": 0.0,
+            "max_exec_seconds": 0.0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.processes > 0
+
+    def _get_executor(self, replace: bool = False) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None or replace:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False, cancel_futures=True)
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload(["graph_stages"])
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=context,
+                    max_tasks_per_child=self.tasks_per_child,
+                )
+                logging.info(
+                    f"Started graph process pool: {self.processes} processes, "
+                    f"recycled after {self.tasks_per_child} jobs"
+                )
+            return self._executor
+
+    def submit(self, job: GraphJob, format: str) -> Future:
+        """Start joining and serializing a job in a pool process.
+
+        The future resolves to the serialized document and raises the errors
+        of the graph stages. The stages are added to the timings of the
+        submitting request, the triple count is set on job as by join.
+        """
+        submitted_at = time.time()
+        timings = current()
+        try:
+            future = self._get_executor().submit(render_job, job, format)
+        except BrokenProcessPool:
+            # a process died, e.g. killed for its memory, start over
+            logging.warning("Graph process pool is broken - starting a new one")
+            future = self._get_executor(replace=True).submit(render_job, job, format)
+        with self._lock:
+            self._counts["submitted"] += 1
+        result = Future()
+
+        def done(future: Future):
+            try:
+                out, started_at, seconds, stages, job.num_triples = future.result()
+            except BaseException as e:
+                with self._lock:
+                    self._counts["failed"] += 1
+                if isinstance(e, GraphStageError):
+                    e = HTTPException(status_code=e.status_code, detail=e.detail)
+                result.set_exception(e)
+                return
+            wait = max(0.0, started_at - submitted_at)
+            with self._lock:
+                counts = self._counts
+                counts["completed"] += 1
+                counts["queue_wait_seconds"] += wait
+                counts["max_queue_wait_seconds"] = max(counts["max_queue_wait_seconds"], wait)
+                counts["exec_seconds"] += seconds
+                counts["max_exec_seconds"] = max(counts["max_exec_seconds"], seconds)
+            if timings is not None:
+                timings.merge(stages)
+            result.set_result(out)
+
+        future.add_done_callback(done)
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> dict:
+        """Return the pool size and the queue wait and execution times of its jobs."""
+        with self._lock:
+            counts = dict(self._counts)
+        finished = counts["completed"] or 1
+        counts["in_flight"] = counts["submitted"] - counts["completed"] - counts["failed"]
+        counts["mean_queue_wait_seconds"] = counts["queue_wait_seconds"] / finished
+        counts["mean_exec_seconds"] = counts["exec_seconds"] / finished
+        return {
+            "processes": self.processes,
+            "tasks_per_child": self.tasks_per_child,
+            **counts,
+        }
@@ -0,0 +1,376 @@
+import asyncio
+import contextlib
+import http.cookiejar
+import json
+import logging
+import os
+import re
+import threading
+import time
+import weakref
+from collections import Counter
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache import LRUCache, content_key
+
+SSL_VERIFY = os.getenv("SSL_VERIFY", "True").lower() in ("true", "1", "t")
+
+# number of hosts to keep pools for and connections kept alive per host
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", 16))
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 10))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 10))
+# the rml mapper can take a while on large inputs
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 300))
+# connections of the async client over all hosts, requests beyond wait for one;
+# per host it keeps to HTTP_POOL_MAXSIZE concurrent requests like the session
+HTTP_ASYNC_MAX_CONNECTIONS = int(os.environ.get("HTTP_ASYNC_MAX_CONNECTIONS", 200))
+
+# conditional-request cache for downloaded mappings, data and templates
+HTTP_CACHE_BYTES = int(os.environ.get("HTTP_CACHE_BYTES", 64 * 1024 * 1024))
+HTTP_CACHE_DIR = os.environ.get("HTTP_CACHE_DIR") or None
+response_cache = LRUCache("http_responses", HTTP_CACHE_BYTES, directory=HTTP_CACHE_DIR)
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+# blocks written by download_to
+DOWNLOAD_BLOCK_BYTES = 1024 * 1024
+
+
+class PooledSession(requests.Session):
+    """Session applying a default timeout to every request."""
+
+    def __init__(self, timeout: tuple[float, float]):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+# cookie policy of the shared clients, which accepts no cookies
+NO_COOKIES = http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _create_session() -> PooledSession:
+    session = PooledSession((HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+    session.verify = SSL_VERIFY
+    # the session is shared by all callers, a cookie set for one of them
+    # must not be sent along with the requests of the others
+    session.cookies.set_policy(NO_COOKIES)
+    # pool_block keeps the number of connections per host at HTTP_POOL_MAXSIZE
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        pool_block=True,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    logging.info(
+        f"Created pooled HTTP session: {HTTP_POOL_CONNECTIONS} hosts, "
+        f"{HTTP_POOL_MAXSIZE} connections per host, "
+        f"timeouts {HTTP_CONNECT_TIMEOUT}s connect / {HTTP_READ_TIMEOUT}s read"
+    )
+    return session
+
+
+def get_session() -> PooledSession:
+    """Return the process-wide keep-alive session, creating it on first use.
+
+    Authorization must be passed per request as header, never set on the
+    shared session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def close_session() -> None:
+    """Close all pooled connections of this process."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+class AsyncPool:
+    """Async client of one event loop with a limit of concurrent requests per host."""
+
+    def __init__(self):
+        # shared by all requests of the loop like the session, so it keeps no cookies either
+        self.client = httpx.AsyncClient(
+            cookies=http.cookiejar.CookieJar(NO_COOKIES),
+            verify=SSL_VERIFY,
+            follow_redirects=True,
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT, pool=None),
+            limits=httpx.Limits(
+                max_connections=HTTP_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_POOL_CONNECTIONS * HTTP_POOL_MAXSIZE,
+            ),
+        )
+        self.hosts = {}
+        logging.info(
+            f"Created async HTTP client: {HTTP_ASYNC_MAX_CONNECTIONS} connections, "
+            f"{HTTP_POOL_MAXSIZE} concurrent requests per host, "
+            f"timeouts {HTTP_CONNECT_TIMEOUT}s connect / {HTTP_READ_TIMEOUT}s read"
+        )
+
+    def host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        semaphore = self.hosts.get(host)
+        if semaphore is None:
+            semaphore = self.hosts[host] = asyncio.Semaphore(HTTP_POOL_MAXSIZE)
+        return semaphore
+
+
+# async clients are bound to the event loop they were created in
+_async_pools = weakref.WeakKeyDictionary()
+
+
+def get_async_pool() -> AsyncPool:
+    """Return the keep-alive async pool of the running event loop, creating it on first use.
+
+    Like the session of get_session, Authorization must be passed per request.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _async_pools.get(loop)
+    if pool is None:
+        pool = _async_pools[loop] = AsyncPool()
+    return pool
+
+
+@contextlib.asynccontextmanager
+async def host_slot(url: str):
+    """Wait for one of the HTTP_POOL_MAXSIZE request slots of the host of url.
+
+    Yields the async client to send the request with. Requests beyond the
+    limit wait on the event loop, so remote services see the same number of
+    concurrent requests as from the blocking session.
+    """
+    pool = get_async_pool()
+    async with pool.host_semaphore(url):
+        yield pool.client
+
+
+async def close_async_client() -> None:
+    """Close the pooled connections of the async client of the running event loop."""
+    pool = _async_pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.client.aclose()
+
+
+def pool_stats() -> dict:
+    """Return connection pool usage per host for monitoring."""
+    hosts = []
+    if _session is not None:
+        adapter = _session.get_adapter("https://")
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts.append(
+                {
+                    "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                    "connections_opened": pool.num_connections,
+                    "requests": pool.num_requests,
+                    "idle_connections": pool.pool.qsize() if pool.pool else 0,
+                }
+            )
+    return {
+        "max_hosts": HTTP_POOL_CONNECTIONS,
+        "max_connections_per_host": HTTP_POOL_MAXSIZE,
+        "connect_timeout": HTTP_CONNECT_TIMEOUT,
+        "read_timeout": HTTP_READ_TIMEOUT,
+        "hosts": hosts,
+        "async_max_connections": HTTP_ASYNC_MAX_CONNECTIONS,
+    }
+
+
+class CachedResponse:
+    """Status, body and final url of a GET answered by cached_get."""
+
+    def __init__(self, status_code: int, content: bytes, url: str):
+        self.status_code = status_code
+        self.content = content
+        self.url = url
+
+
+_response_counts = Counter()
+_response_counts_lock = threading.Lock()
+
+
+def _count(outcome: str) -> None:
+    with _response_counts_lock:
+        _response_counts[outcome] += 1
+
+
+def _freshness(headers, now: float) -> float | None:
+    """Return until when a response may be served without revalidation.
+
+    Returns None if the response must not be stored at all.
+    """
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return now
+    max_age = MAX_AGE_PATTERN.search(cache_control)
+    if max_age:
+        return now + int(max_age.group(1))
+    return now
+
+
+def _load_entry(key: str) -> tuple[dict, bytes] | None:
+    raw = response_cache.get(key)
+    if raw is None:
+        return None
+    header, _, body = raw.partition(b"\n")
+    return json.loads(header), body
+
+
+def _store_entry(key: str, meta: dict, body: bytes) -> None:
+    response_cache.put(key, json.dumps(meta).encode("utf-8") + b"\n" + body)
+
+
+def _lookup(url: str, authorization: str | None):
+    """Return cache key, stored entry, time of the lookup and the fresh cached response if any."""
+    key = content_key(url, authorization)
+    entry = _load_entry(key)
+    now = time.time()
+    if entry is not None and entry[0]["fresh_until"] > now:
+        _count("fresh")
+        meta, body = entry
+        return key, entry, now, CachedResponse(200, body, meta["url"])
+    return key, entry, now, None
+
+
+def _request_headers(entry: tuple[dict, bytes] | None, authorization: str | None) -> dict:
+    headers = {}
+    if authorization:
+        headers["Authorization"] = authorization
+    if entry is not None:
+        meta, _ = entry
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+
+def _revalidated(key: str, entry: tuple[dict, bytes], headers, now: float) -> CachedResponse:
+    """Serve a stored entry again after a 304 answer and update its freshness."""
+    _count("revalidated")
+    meta, body = entry
+    fresh_until = _freshness(headers, now)
+    if fresh_until is None:
+        response_cache.delete(key)
+    else:
+        meta["fresh_until"] = fresh_until
+        _store_entry(key, meta, body)
+    return CachedResponse(200, body, meta["url"])
+
+
+def _downloaded(key: str, url: str, headers, content: bytes, now: float) -> CachedResponse:
+    """Store a downloaded body if it carries a validator or may be served fresh."""
+    _count("downloaded")
+    etag = headers.get("ETag")
+    last_modified = headers.get("Last-Modified")
+    fresh_until = _freshness(headers, now)
+    if fresh_until is not None and (etag or last_modified or fresh_until > now):
+        _store_entry(
+            key,
+            {
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fresh_until": fresh_until,
+            },
+            content,
+        )
+    return CachedResponse(200, content, url)
+
+
+def cached_get(url: str, authorization: str | None = None) -> CachedResponse:
+    """GET a url through the shared session, revalidating cached copies.
+
+    Responses carrying an ETag or Last-Modified validator or a Cache-Control
+    max-age are stored. Fresh entries are served without a request, stale ones
+    are revalidated with If-None-Match/If-Modified-Since and served again on a
+    304 answer. Entries are keyed by url and Authorization header, so content
+    fetched with credentials is never served to another caller.
+
+    Args:
+        url: Url to fetch
+        authorization: Authorization header value
+
+    Returns:
+        CachedResponse: status code, body and final url after redirects
+    """
+    key, entry, now, cached = _lookup(url, authorization)
+    if cached is not None:
+        return cached
+    headers = _request_headers(entry, authorization)
+    r = get_session().get(url, headers=headers or None, allow_redirects=True, stream=True)
+    if r.status_code == 304 and entry is not None:
+        # release the connection back to the pool
+        r.close()
+        return _revalidated(key, entry, r.headers, now)
+    if r.status_code != 200:
+        r.close()
+        return CachedResponse(r.status_code, b"", r.url)
+    return _downloaded(key, r.url, r.headers, r.content, now)
+
+
+async def async_cached_get(url: str, authorization: str | None = None) -> CachedResponse:
+    """GET a url through the async client of the running event loop, see cached_get.
+
+    Shares the cache and its counters with cached_get.
+    """
+    key, entry, now, cached = _lookup(url, authorization)
+    if cached is not None:
+        return cached
+    headers = _request_headers(entry, authorization)
+    async with host_slot(url) as client, client.stream("GET", url, headers=headers) as r:
+        final_url = str(r.url)
+        if r.status_code == 304 and entry is not None:
+            return _revalidated(key, entry, r.headers, now)
+        if r.status_code != 200:
+            return CachedResponse(r.status_code, b"", final_url)
+        content = await r.aread()
+    return _downloaded(key, final_url, r.headers, content, now)
+
+
+def download_to(url: str, file, authorization: str | None = None) -> CachedResponse:
+    """GET a url through the shared session into file, without the cache.
+
+    For sources too large to hold in memory, the body is written to file in
+    blocks as it arrives.
+
+    Returns:
+        CachedResponse: status code, empty body and final url after redirects
+    """
+    headers = {"Authorization": authorization} if authorization else None
+    with get_session().get(url, headers=headers, allow_redirects=True, stream=True) as r:
+        if r.status_code == 200:
+            for block in r.iter_content(DOWNLOAD_BLOCK_BYTES):
+                file.write(block)
+        return CachedResponse(r.status_code, b"", r.url)
+
+
+def response_cache_stats() -> dict:
+    """Return how downloads were answered: fresh from cache, revalidated or downloaded."""
+    with _response_counts_lock:
+        return {
+            outcome: _response_counts[outcome]
+            for outcome in ("fresh", "revalidated", "downloaded")
+        }
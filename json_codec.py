@@ -0,0 +1,49 @@
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:  # optional, the standard library is used without it
+    orjson = None
+
+BACKEND = "orjson" if orjson else "json"
+logging.debug(f"Decoding JSON with {BACKEND}")
+
+
+def loads(data: bytes | str):
+    """Decode a JSON document from bytes or str with the fastest available backend.
+
+    Documents orjson rejects but json accepts (e.g. NaN or integers beyond 64
+    bit) are decoded with json, so the result does not depend on the backend.
+
+    Raises:
+        ValueError: If data is not valid JSON
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def sniff(content: bytes | str) -> str | None:
+    """Classify a document by its leading bytes without decoding it.
+
+    Returns:
+        "json" if it starts like a JSON object or array, "xml" for XML,
+        "rdf" for other RDF syntaxes such as Turtle or N-Triples and None
+        if the start is not conclusive
+    """
+    head = content[:256]
+    if isinstance(head, bytes):
+        head = head.decode("utf-8", "ignore")
+    head = head.lstrip("\ufeff \t\r\n")
+    if head[:1] in ("{", "["):
+        # a Turtle blank node or a TriG graph can also start like this
+        return "json"
+    if head.startswith(("<?xml", "<rdf:RDF", "<!DOCTYPE")):
+        return "xml"
+    if head[:1] in ("<", "@", "#", "_") or head[:7].upper().startswith(("PREFIX ", "BASE ")):
+        return "rdf"
+    return None
@@ -0,0 +1,61 @@
+import os
+import re
+
+from jsonpath_ng.ext import parse as jsonpath_parse
+
+from cache import LRUCache
+
+# compiled JSONPath expressions shared by all requests of a worker, counted by number
+JSONPATH_CACHE_SIZE = int(os.environ.get("JSONPATH_CACHE_SIZE", 1024))
+jsonpath_cache = LRUCache("jsonpaths", JSONPATH_CACHE_SIZE, sizeof=lambda expression: 1)
+
+# references that name a field of the item, resolved without JSONPath
+SIMPLE_REFERENCE = re.compile(r"^[^.\[\]*$()]+$")
+
+
+def compile_jsonpath(expression: str):
+    """Return the compiled jsonpath-ng expression, parsing it only once per worker.
+
+    jsonpath-ng builds a PLY parser for every parse, which costs far more than
+    evaluating the expression. Compiled expressions are immutable and can be
+    evaluated by several threads at once.
+
+    Raises:
+        JsonPathParserError, JsonPathLexerError: If expression is not valid JSONPath
+    """
+    compiled = jsonpath_cache.get(expression)
+    if compiled is None:
+        compiled = jsonpath_parse(expression)
+        jsonpath_cache.put(expression, compiled)
+    return compiled
+
+
+def field_reference(field_name: str):
+    """Compile the reference of a "$(field_name)" expression.
+
+    Plain field names are looked up in the item directly, everything else is
+    evaluated as JSONPath relative to the item.
+
+    Args:
+        field_name: Reference between the parentheses, e.g. "label" or "a.b[0]"
+
+    Returns:
+        Function returning the first referenced value of an item, None if absent
+
+    Raises:
+        JsonPathParserError, JsonPathLexerError: If the reference is not valid JSONPath
+    """
+    if SIMPLE_REFERENCE.match(field_name):
+
+        def lookup(item):
+            return item.get(field_name) if isinstance(item, dict) else None
+
+        return lookup
+
+    expression = compile_jsonpath(f"$.{field_name}")
+
+    def find(item):
+        matches = expression.find(item)
+        return matches[0].value if matches else None
+
+    return find
@@ -0,0 +1,194 @@
+import contextlib
+import logging
+import os
+import time
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # optional, /metrics is not served without it
+    prometheus_client = None
+
+ENABLED = prometheus_client is not None
+if not ENABLED:
+    logging.debug("prometheus_client is not installed - /metrics is disabled")
+
+# with several uvicorn workers every process writes its metrics to this
+# directory and /metrics aggregates them, it must be emptied before the
+# workers start, see the Dockerfile
+MULTIPROCESS = ENABLED and bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+if MULTIPROCESS:
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+# stages take from milliseconds (rule templates) to minutes (large mapper runs)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+TRIPLE_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+BYTE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000, 1_000_000_000)
+
+if ENABLED:
+    stage_seconds = prometheus_client.Histogram(
+        "rdfconverter_stage_seconds",
+        "Seconds a request spent in each stage of a conversion, see timing.span",
+        ["stage"],
+        buckets=STAGE_BUCKETS,
+    )
+    http_requests = prometheus_client.Counter(
+        "rdfconverter_http_requests",
+        "HTTP requests answered, by route and status code",
+        ["method", "endpoint", "status"],
+    )
+    http_request_seconds = prometheus_client.Histogram(
+        "rdfconverter_http_request_seconds",
+        "Seconds until an HTTP request was answered completely, by route",
+        ["method", "endpoint"],
+        buckets=STAGE_BUCKETS,
+    )
+    conversion_triples = prometheus_client.Histogram(
+        "rdfconverter_conversion_triples",
+        "Triples in the joined graph of a conversion",
+        buckets=TRIPLE_BUCKETS,
+    )
+    conversion_input_bytes = prometheus_client.Histogram(
+        "rdfconverter_conversion_input_bytes",
+        "Bytes of the data sources of a conversion",
+        buckets=BYTE_BUCKETS,
+    )
+    conversion_output_bytes = prometheus_client.Histogram(
+        "rdfconverter_conversion_output_bytes",
+        "Bytes of the serialized graph of a conversion",
+        buckets=BYTE_BUCKETS,
+    )
+    remote_calls = prometheus_client.Counter(
+        "rdfconverter_remote_calls",
+        "Calls to the YARRRML parser and RML mapper services",
+        ["service"],
+    )
+    remote_errors = prometheus_client.Counter(
+        "rdfconverter_remote_errors",
+        "Failed calls to the YARRRML parser and RML mapper services",
+        ["service"],
+    )
+    # summed over the live workers, the state label keeps processes that
+    # never admit a conversion, e.g. of the graph pool, from writing files
+    conversions = prometheus_client.Gauge(
+        "rdfconverter_conversions",
+        "Conversions and validations running or waiting for admission",
+        ["state"],
+        multiprocess_mode="livesum",
+    )
+    cache_lookups = prometheus_client.Counter(
+        "rdfconverter_cache_lookups",
+        "Cache lookups by result: hit, disk_hit or miss",
+        ["cache", "result"],
+    )
+
+
+def observe_stages(stages: dict) -> None:
+    """Add the stage durations of one request to the stage histogram."""
+    if not ENABLED:
+        return
+    for stage, seconds in stages.items():
+        stage_seconds.labels(stage).observe(seconds)
+
+
+def observe_request(method: str, endpoint: str, status: int, seconds: float) -> None:
+    if not ENABLED:
+        return
+    http_requests.labels(method, endpoint, str(status)).inc()
+    http_request_seconds.labels(method, endpoint).observe(seconds)
+
+
+def observe_conversion(
+    triples: int | None = None, input_bytes: int | None = None, output_bytes: int | None = None
+) -> None:
+    """Add the sizes of one conversion to their histograms, None for sizes not known here."""
+    if not ENABLED:
+        return
+    if triples is not None:
+        conversion_triples.observe(triples)
+    if input_bytes is not None:
+        conversion_input_bytes.observe(input_bytes)
+    if output_bytes is not None:
+        conversion_output_bytes.observe(output_bytes)
+
+
+def text_bytes(text: str | bytes) -> int:
+    """Return the UTF-8 size of text, without encoding it if it is ASCII."""
+    if isinstance(text, bytes) or text.isascii():
+        return len(text)
+    return len(text.encode("utf-8"))
+
+
+@contextlib.contextmanager
+def remote_call(service: str):
+    """Count a call to a remote service, and as error if the block raises."""
+    if not ENABLED:
+        yield
+        return
+    remote_calls.labels(service).inc()
+    try:
+        yield
+    except BaseException:
+        remote_errors.labels(service).inc()
+        raise
+
+
+def add_conversions(state: str, count: int) -> None:
+    """Change the number of conversions in state, "running" or "queued"."""
+    if ENABLED:
+        conversions.labels(state).inc(count)
+
+
+def cache_lookup(cache: str, result: str) -> None:
+    if ENABLED:
+        cache_lookups.labels(cache, result).inc()
+
+
+def shutdown() -> None:
+    """Drop the live gauges of this worker, so they do not count after it exited."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def render() -> tuple[bytes, str]:
+    """Return the metrics in the Prometheus text format and its content type.
+
+    In multiprocess mode the metrics of all workers are aggregated.
+    """
+    if MULTIPROCESS:
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
+
+
+class RequestMetricsMiddleware:
+    """Count the HTTP requests and their duration per route.
+
+    Requests are labelled by the path template of their route, e.g.
+    /api/createrdf, so the label values stay bounded; requests no route
+    matched are labelled "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            observe_request(scope["method"], endpoint, status, time.perf_counter() - start)
@@ -0,0 +1,80 @@
+import asyncio
+import contextvars
+from concurrent.futures import Executor
+
+
+class IOCall:
+    """I/O a step generator waits for, with a blocking and an async implementation.
+
+    A step generator yields IOCall objects and is sent their results, so the
+    code between two yields never waits for the network. run_steps does the
+    I/O in the calling thread, run_steps_async awaits it on the event loop
+    and runs the code between the yields on an executor. Exceptions of the
+    I/O are raised at the yield.
+    """
+
+    def __init__(self, blocking, awaitable, *args, **kwargs):
+        """Describe the I/O of one step.
+
+        Args:
+            blocking: Function doing the I/O blocking, None if there is nothing to do
+            awaitable: Coroutine function doing the same I/O, None if there is nothing to do
+            args, kwargs: Arguments of both
+        """
+        self.blocking = blocking
+        self.awaitable = awaitable
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        if self.blocking is None:
+            return None
+        return self.blocking(*self.args, **self.kwargs)
+
+    async def run_async(self):
+        if self.awaitable is None:
+            return None
+        return await self.awaitable(*self.args, **self.kwargs)
+
+
+def _advance(send, value) -> tuple[bool, object]:
+    """Resume a generator, returning (True, return value) once it is exhausted.
+
+    StopIteration can not be passed through the futures of an executor.
+    """
+    try:
+        return False, send(value)
+    except StopIteration as stop:
+        return True, stop.value
+
+
+def run_steps(steps):
+    """Run a step generator to its return value, doing its I/O blocking."""
+    send, value = steps.send, None
+    while True:
+        done, value = _advance(send, value)
+        if done:
+            return value
+        try:
+            send, value = steps.send, value.run()
+        except Exception as e:
+            send, value = steps.throw, e
+
+
+async def run_steps_async(steps, executor: Executor):
+    """Run a step generator to its return value on executor, awaiting its I/O.
+
+    The steps run in a copy of the caller's context, e.g. to add their spans
+    to the timings of the request.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    send, value = steps.send, None
+    while True:
+        done, value = await loop.run_in_executor(executor, context.run, _advance, send, value)
+        if done:
+            return value
+        try:
+            send, value = steps.send, await value.run_async()
+        except Exception as e:
+            send, value = steps.throw, e
@@ -0,0 +1,193 @@
+import re
+from urllib.parse import urljoin
+
+from rdflib import Graph, Literal, URIRef
+from rdflib.plugins.parsers.ntriples import (
+    ParseError, W3CNTriplesParser, r_tail, r_wspace, r_wspaces, unquote, uriquote,
+)
+from rdflib.plugins.serializers.nt import _quoteLiteral
+
+# line based formats written by iter_lines instead of an rdflib serializer
+LINE_FORMATS = ("nt", "nquads")
+
+# IRIs starting with a scheme, all others are relative references
+ABSOLUTE_IRI = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*:")
+
+# IRI references with or without scheme
+r_any_uriref = re.compile(r'<([^\s"<>]*)>')
+
+
+class _LineParser(W3CNTriplesParser):
+    """N-Triples line parser that also accepts the graph label of N-Quads lines.
+
+    With a base, relative IRIs like <#a> are accepted and resolved against it
+    as a Turtle parser would, or kept relative if the base is relative itself;
+    without one they are a parse error.
+    """
+
+    def __init__(self, base: str | None = None):
+        super().__init__()
+        self.base = base
+
+    def uriref(self):
+        if self.base is None or not self.peek("<"):
+            return super().uriref()
+        uri = uriquote(unquote(self.eat(r_any_uriref).group(1)))
+        if ABSOLUTE_IRI.match(self.base) and not ABSOLUTE_IRI.match(uri):
+            uri = urljoin(self.base, uri)
+        return URIRef(uri)
+
+    def parse_line(self, line: str, with_graph: bool = False):
+        self.line = line
+        self.eat(r_wspace)
+        if not self.line or self.line.startswith("#"):
+            return None
+        subject = self.subject()
+        self.eat(r_wspaces)
+        predicate = self.predicate()
+        self.eat(r_wspaces)
+        object_ = self.object()
+        self.eat(r_wspace)
+        # without with_graph the graph label is dropped, all quads end up in one graph
+        graph = None
+        if self.peek("<"):
+            graph = self.uriref()
+        elif self.peek("_"):
+            graph = self.nodeid()
+        self.eat(r_tail)
+        if self.line:
+            raise ParseError(f"Trailing garbage: {self.line}")
+        if with_graph:
+            return subject, predicate, object_, graph
+        return subject, predicate, object_
+
+
+def iter_triples(text: str, base: str | None = None):
+    """Parse an N-Triples or N-Quads document line by line.
+
+    Triples are yielded as soon as their line is parsed, so they can be
+    transformed and added to their final graph without building an
+    intermediate one. Blank node labels are consistent within the document.
+
+    Args:
+        text: The document
+        base: Base to resolve relative IRIs against, e.g. the base of the
+            mapping that produced the document. A relative base such as "#"
+            keeps them relative. None only accepts absolute IRIs.
+
+    Raises:
+        ParseError: On the first line that is not valid N-Triples/N-Quads
+    """
+    return _iter_lines(text, with_graph=False, base=base)
+
+
+def iter_quads(text: str, base: str | None = None):
+    """Parse an N-Quads document line by line like iter_triples, keeping the graph labels.
+
+    Yields (subject, predicate, object, graph) with graph None for triples
+    of the default graph.
+    """
+    return _iter_lines(text, with_graph=True, base=base)
+
+
+def _iter_lines(text: str, with_graph: bool, base: str | None = None):
+    parser = _LineParser(base)
+    start = 0
+    length = len(text)
+    while start < length:
+        end = text.find("\n", start)
+        if end < 0:
+            end = length
+        line = text[start:end].rstrip("\r")
+        start = end + 1
+        try:
+            triple = parser.parse_line(line, with_graph)
+        except ParseError as e:
+            raise ParseError(f"Invalid line: {line} ({e})") from e
+        if triple is not None:
+            yield triple
+
+
+def format_term(term, base: str | None = None) -> str:
+    """Format an IRI or blank node for N-Triples, resolving a relative IRI against base.
+
+    N-Triples only allows absolute IRIs, but mappings with a relative base
+    such as "#" produce IRIs like <#Batch_1>, which Turtle keeps relative.
+
+    Raises:
+        ValueError: If term is a relative IRI and there is no base
+    """
+    if isinstance(term, URIRef) and not ABSOLUTE_IRI.match(term):
+        if not base:
+            raise ValueError(f"Relative IRI <{term}> cannot be written as N-Triples without a base")
+        term = URIRef(urljoin(base, term))
+    return term.n3()
+
+
+def format_node(term, base: str | None = None) -> str:
+    """Format any term for N-Triples, literals included, see format_term."""
+    if isinstance(term, Literal):
+        return _quoteLiteral(term)
+    return format_term(term, base)
+
+
+def iter_lines(
+    graph,
+    format: str = "nt",
+    graph_name: URIRef | None = None,
+    chunk_size: int = 64 * 1024,
+):
+    """Write a graph as N-Triples or N-Quads, yielding utf-8 encoded chunks.
+
+    Lines are emitted while iterating the graph, so time is linear in the
+    number of triples and nothing is sorted or grouped. IRIs and blank nodes
+    are formatted once and reused, which pays off as subjects and predicates
+    repeat on many lines.
+
+    Args:
+        graph: Graph or other iterable of triples to write
+        format: "nt" or "nquads"
+        graph_name: Graph IRI of N-Quads lines, the default graph if None;
+            relative IRIs are resolved against it in both formats
+        chunk_size: Approximate size of the yielded chunks in bytes
+
+    Yields:
+        bytes: Consecutive parts of the document
+
+    Raises:
+        ValueError: On a relative IRI without graph_name, see format_term
+    """
+    if format not in LINE_FORMATS:
+        raise ValueError(f"Unsupported line format: {format}")
+    end = f" {graph_name.n3()} .\n" if format == "nquads" and graph_name is not None else " .\n"
+    base = str(graph_name) if graph_name is not None else None
+    terms = {}
+    lines = []
+    size = 0
+    for s, p, o in graph:
+        subject = terms.get(s)
+        if subject is None:
+            subject = terms[s] = format_term(s, base)
+        predicate = terms.get(p)
+        if predicate is None:
+            predicate = terms[p] = format_term(p, base)
+        if isinstance(o, Literal):
+            obj = _quoteLiteral(o)
+        else:
+            obj = terms.get(o)
+            if obj is None:
+                obj = terms[o] = format_term(o, base)
+        line = f"{subject} {predicate} {obj}{end}"
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield "".join(lines).encode("utf-8")
+            lines.clear()
+            size = 0
+    if lines:
+        yield "".join(lines).encode("utf-8")
+
+
+def serialize_lines(graph: Graph, format: str = "nt", graph_name: URIRef | None = None) -> str:
+    """Return the whole N-Triples or N-Quads document of a graph, see iter_lines."""
+    return b"".join(iter_lines(graph, format, graph_name)).decode("utf-8")
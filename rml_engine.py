@@ -0,0 +1,495 @@
+import itertools
+import json
+import logging
+import re
+
+from rdflib import RDF, BNode, Graph, Literal, Namespace, URIRef
+
+import json_codec
+from jsonpath_cache import SIMPLE_REFERENCE, compile_jsonpath
+
+RR = Namespace("http://www.w3.org/ns/r2rml#")
+RML = Namespace("http://semweb.mmlab.be/ns/rml#")
+QL = Namespace("http://semweb.mmlab.be/ns/ql#")
+FNML = Namespace("http://semweb.mmlab.be/ns/fnml#")
+FNO = Namespace("https://w3id.org/function/ontology#")
+RDFS = Namespace("http://www.w3.org/2000/01/rdf-schema#")
+
+# rmlmapper-java falls back to this base if the rules do not declare one
+DEFAULT_BASE = "http://example.com/base/"
+
+# FnO functions that can be evaluated in process, see evaluate_fno_function in conditions.py
+SUPPORTED_FUNCTIONS = {
+    "trueCondition",
+    "equal",
+    "notEqual",
+    "isNull",
+    "inRange",
+    "listContainsElement",
+    "stringContainsOtherString",
+}
+# FnO parameter IRIs to the parameter names evaluate_fno_function expects
+PARAMETER_NAMES = {
+    "valueParameter": "str1",
+    "valueParameter2": "str2",
+}
+
+ABSOLUTE_IRI = re.compile(r"^[A-Za-z][A-Za-z0-9+.\-]*:")
+IRI_UNRESERVED = re.compile(r"[A-Za-z0-9\-._~]")
+
+
+class UnsupportedMappingError(Exception):
+    """Raised if RML rules use features the native engine does not implement."""
+
+
+def local_name(iri) -> str:
+    return re.split(r"[#/]", str(iri))[-1]
+
+
+def iri_safe(value: str) -> str:
+    """Percent-encode a template value for use in an IRI (R2RML IRI-safe form)."""
+    out = []
+    for char in value:
+        if ord(char) > 127 or IRI_UNRESERVED.match(char):
+            out.append(char)
+        else:
+            out.extend("%{:02X}".format(b) for b in char.encode("utf-8"))
+    return "".join(out)
+
+
+def to_string(value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def compile_reference(reference: str):
+    """Compile a JSONPath reference relative to an iterator item.
+
+    Plain field names are resolved with a dict lookup, everything else goes
+    through jsonpath-ng once compiled.
+
+    Returns:
+        Callable mapping an item to the list of referenced values
+    """
+    if SIMPLE_REFERENCE.match(reference):
+
+        def get(item):
+            if not isinstance(item, dict):
+                return []
+            value = item.get(reference)
+            if value is None:
+                return []
+            if isinstance(value, list):
+                return [v for v in value if v is not None]
+            return [value]
+
+        return get
+
+    if reference.startswith("$"):
+        expression = reference
+    elif reference.startswith((".", "[")):
+        expression = "$" + reference
+    else:
+        expression = "$." + reference
+    try:
+        compiled = compile_jsonpath(expression)
+    except Exception as e:
+        raise UnsupportedMappingError(f"invalid reference '{reference}': {e}") from e
+
+    def find(item):
+        values = []
+        for match in compiled.find(item):
+            if isinstance(match.value, list):
+                values.extend(v for v in match.value if v is not None)
+            elif match.value is not None:
+                values.append(match.value)
+        return values
+
+    return find
+
+
+def compile_template(template: str) -> list:
+    """Split an rr:template into literal text and compiled references.
+
+    Returns:
+        List of str (literal text) and callables (references)
+    """
+    parts = []
+    text = []
+    i = 0
+    while i < len(template):
+        char = template[i]
+        if char == "\\" and i + 1 < len(template):
+            text.append(template[i + 1])
+            i += 2
+            continue
+        if char == "{":
+            end = template.index("}", i)
+            if text:
+                parts.append("".join(text))
+                text = []
+            parts.append(compile_reference(template[i + 1 : end]))
+            i = end + 1
+            continue
+        text.append(char)
+        i += 1
+    if text:
+        parts.append("".join(text))
+    return parts
+
+
+class TermMap:
+    """A compiled subject, predicate, object or function parameter map."""
+
+    def __init__(self, kind: str, term_type, **kwargs):
+        self.kind = kind
+        self.term_type = term_type
+        self.constant = kwargs.get("constant")
+        self.reference = kwargs.get("reference")
+        self.template = kwargs.get("template")
+        self.function = kwargs.get("function")
+        self.parameters = kwargs.get("parameters", [])
+        self.datatype = kwargs.get("datatype")
+        self.language = kwargs.get("language")
+        self.parent = kwargs.get("parent")
+        self.joins = kwargs.get("joins", [])
+
+
+class TriplesMapPlan:
+    def __init__(self, node, name, source, iterator, subject, classes, predicate_objects):
+        self.node = node
+        self.name = name
+        self.source = source
+        self.iterator = iterator
+        self.subject = subject
+        self.classes = classes
+        self.predicate_objects = predicate_objects
+        self.iterator_expression = compile_jsonpath(iterator)
+
+
+class RMLPlan:
+    """RML rules compiled into an executable plan.
+
+    Supports JSONPath logical sources, constant/reference/template term maps,
+    rr:class, referencing object maps with and without join conditions and the
+    idlab condition functions known to evaluate_fno_function. Everything else
+    raises UnsupportedMappingError while compiling, so callers can fall back to
+    the remote rmlmapper.
+    """
+
+    def __init__(self, rml_rules: str):
+        rules = Graph()
+        rules.parse(data=rml_rules, format="ttl")
+        self.namespaces = [
+            (prefix, str(ns)) for prefix, ns in rules.namespaces() if prefix
+        ]
+        self.triples_maps = {}
+        for node in rules.subjects(RDF.type, RR.TriplesMap):
+            self.triples_maps[node] = self._compile_triples_map(rules, node)
+        self.size = len(rml_rules)
+
+    def _compile_triples_map(self, rules: Graph, node) -> TriplesMapPlan:
+        logical_source = rules.value(node, RML.logicalSource)
+        source = rules.value(logical_source, RML.source)
+        if not isinstance(source, Literal):
+            raise UnsupportedMappingError(f"logical source of {node} is not a file")
+        formulation = rules.value(logical_source, RML.referenceFormulation)
+        if formulation is not None and formulation != QL.JSONPath:
+            raise UnsupportedMappingError(f"reference formulation {formulation} is not supported")
+        iterator = str(rules.value(logical_source, RML.iterator) or "$")
+
+        subject_map = rules.value(node, RR.subjectMap)
+        if subject_map is not None:
+            subject = self._compile_term_map(rules, subject_map, RR.IRI)
+            classes = list(rules.objects(subject_map, RR["class"]))
+            if rules.value(subject_map, RR.graphMap) is not None or rules.value(subject_map, RR.graph) is not None:
+                raise UnsupportedMappingError("graph maps are not supported")
+        elif rules.value(node, RR.subject) is not None:
+            subject = TermMap("constant", RR.IRI, constant=rules.value(node, RR.subject))
+            classes = []
+        else:
+            raise UnsupportedMappingError(f"{node} has no subject map")
+
+        predicate_objects = []
+        for pom in rules.objects(node, RR.predicateObjectMap):
+            if rules.value(pom, RR.graphMap) is not None or rules.value(pom, RR.graph) is not None:
+                raise UnsupportedMappingError("graph maps are not supported")
+            predicates = [
+                self._compile_term_map(rules, pm, RR.IRI)
+                for pm in rules.objects(pom, RR.predicateMap)
+            ] + [
+                TermMap("constant", RR.IRI, constant=p)
+                for p in rules.objects(pom, RR.predicate)
+            ]
+            objects = [
+                self._compile_term_map(rules, om, RR.Literal)
+                for om in rules.objects(pom, RR.objectMap)
+            ] + [
+                TermMap("constant", None, constant=o)
+                for o in rules.objects(pom, RR.object)
+            ]
+            predicate_objects.append((predicates, objects))
+
+        return TriplesMapPlan(
+            node,
+            str(rules.value(node, RDFS.label) or node),
+            str(source),
+            iterator,
+            subject,
+            classes,
+            predicate_objects,
+        )
+
+    def _compile_term_map(self, rules: Graph, node, default_term_type) -> TermMap:
+        term_type = rules.value(node, RR.termType)
+        datatype = rules.value(node, RR.datatype)
+        language = rules.value(node, RR.language)
+        if rules.value(node, RML.languageMap) is not None:
+            raise UnsupportedMappingError("language maps are not supported")
+        kwargs = {"datatype": datatype, "language": str(language) if language else None}
+
+        constant = rules.value(node, RR.constant)
+        if constant is not None:
+            return TermMap("constant", term_type, constant=constant, **kwargs)
+        reference = rules.value(node, RML.reference)
+        if reference is not None:
+            return TermMap(
+                "reference",
+                term_type or (RR.Literal if default_term_type == RR.Literal else RR.IRI),
+                reference=compile_reference(str(reference)),
+                **kwargs,
+            )
+        template = rules.value(node, RR.template)
+        if template is not None:
+            return TermMap(
+                "template",
+                term_type or RR.IRI,
+                template=compile_template(str(template)),
+                **kwargs,
+            )
+        function = rules.value(node, FNML.functionValue)
+        if function is not None:
+            name, parameters = self._compile_function(rules, function)
+            return TermMap(
+                "function",
+                term_type or default_term_type,
+                function=name,
+                parameters=parameters,
+                **kwargs,
+            )
+        parent = rules.value(node, RR.parentTriplesMap)
+        if parent is not None:
+            joins = []
+            for join in rules.objects(node, RR.joinCondition):
+                joins.append(
+                    (
+                        compile_reference(str(rules.value(join, RR.child))),
+                        compile_reference(str(rules.value(join, RR.parent))),
+                    )
+                )
+            return TermMap("parent", RR.IRI, parent=parent, joins=joins)
+        raise UnsupportedMappingError(f"term map {node} has no supported value")
+
+    def _compile_function(self, rules: Graph, function) -> tuple[str, list]:
+        name = None
+        parameters = []
+        for pom in rules.objects(function, RR.predicateObjectMap):
+            predicate = rules.value(rules.value(pom, RR.predicateMap), RR.constant)
+            if predicate is None:
+                predicate = rules.value(pom, RR.predicate)
+            object_map = rules.value(pom, RR.objectMap)
+            if predicate == FNO.executes:
+                name = local_name(rules.value(object_map, RR.constant))
+                continue
+            parameter = local_name(predicate)
+            parameter = PARAMETER_NAMES.get(parameter, parameter.lstrip("_").removeprefix("p_"))
+            parameters.append((parameter, self._compile_term_map(rules, object_map, RR.Literal)))
+        if name not in SUPPORTED_FUNCTIONS:
+            raise UnsupportedMappingError(f"function {name} is not supported")
+        return name, parameters
+
+    def execute(
+        self,
+        sources: dict,
+        base_iri: str,
+        function_evaluator,
+        graph: Graph | None = None,
+        rule_triples: dict | None = None,
+    ) -> Graph:
+        """Run all triples maps and add the generated triples to a graph.
+
+        Args:
+            sources: Dict of {placeholder_filename: JSON content or decoded document}
+            base_iri: Base IRI for relative IRIs, DEFAULT_BASE if empty
+            function_evaluator: Callable(function_name, parameters) -> bool
+            graph: Graph to add the triples to, a new one if None
+            rule_triples: Dict filled with {triples map name: generated triples}
+
+        Returns:
+            Graph with the generated triples
+        """
+        run = _Execution(self, sources, base_iri or DEFAULT_BASE, function_evaluator)
+        if graph is None:
+            graph = Graph()
+        for prefix, namespace in self.namespaces:
+            graph.bind(prefix, namespace, override=False)
+        for triples_map in self.triples_maps.values():
+            triples = run.triples(triples_map)
+            graph.addN((s, p, o, graph) for s, p, o in triples)
+            if rule_triples is not None:
+                rule_triples.setdefault(triples_map.name, set()).update(triples)
+            logging.debug(f"Triples map {triples_map.name} generated {len(triples)} triples")
+        return graph
+
+
+class _Execution:
+    """State of one plan execution: parsed sources and cached parent subjects."""
+
+    def __init__(self, plan: RMLPlan, sources: dict, base_iri: str, function_evaluator):
+        self.plan = plan
+        self.base_iri = base_iri
+        self.function_evaluator = function_evaluator
+        self.documents = {}
+        self.sources = sources
+        self.items_cache = {}
+        self.subjects_cache = {}
+        self.join_index_cache = {}
+
+    def items(self, triples_map: TriplesMapPlan) -> list:
+        key = (triples_map.source, triples_map.iterator)
+        if key not in self.items_cache:
+            if triples_map.source not in self.documents:
+                content = self.sources.get(triples_map.source)
+                if content is None:
+                    raise UnsupportedMappingError(f"no content for source {triples_map.source}")
+                if isinstance(content, (str, bytes, bytearray)):
+                    content = json_codec.loads(content)
+                self.documents[triples_map.source] = content
+            document = self.documents[triples_map.source]
+            self.items_cache[key] = [
+                match.value for match in triples_map.iterator_expression.find(document)
+            ]
+        return self.items_cache[key]
+
+    def values(self, term_map: TermMap, item) -> list:
+        """Raw values of a term map for one iterator item."""
+        if term_map.kind == "constant":
+            return [term_map.constant]
+        if term_map.kind == "reference":
+            return term_map.reference(item)
+        if term_map.kind == "template":
+            iri = term_map.term_type == RR.IRI
+            choices = []
+            for part in term_map.template:
+                if isinstance(part, str):
+                    choices.append([part])
+                else:
+                    found = [to_string(v) for v in part(item)]
+                    if not found:
+                        return []
+                    choices.append([iri_safe(v) for v in found] if iri else found)
+            return ["".join(combination) for combination in itertools.product(*choices)]
+        if term_map.kind == "function":
+            return self.call(term_map, item)
+        return []
+
+    def call(self, term_map: TermMap, item) -> list:
+        parameters = {}
+        for name, parameter_map in term_map.parameters:
+            found = self.values(parameter_map, item)
+            if found:
+                value = found[0]
+                parameters[name] = value if isinstance(value, bool) else to_string(value)
+        if term_map.function == "trueCondition":
+            condition = parameters.get("strBoolean")
+            if condition is True or condition == "true":
+                value = parameters.get("str")
+                return [value] if value is not None else []
+            return []
+        return [bool(self.function_evaluator(term_map.function, parameters))]
+
+    def terms(self, term_map: TermMap, item) -> list:
+        """RDF terms generated by a term map for one iterator item."""
+        terms = []
+        for value in self.values(term_map, item):
+            if term_map.kind == "constant":
+                if term_map.term_type == RR.IRI and isinstance(value, Literal):
+                    value = URIRef(self.resolve(str(value)))
+                terms.append(value)
+            elif term_map.term_type == RR.IRI:
+                terms.append(URIRef(self.resolve(to_string(value))))
+            elif term_map.term_type == RR.BlankNode:
+                terms.append(BNode(iri_safe(to_string(value))))
+            elif term_map.datatype is not None:
+                terms.append(Literal(to_string(value), datatype=term_map.datatype))
+            else:
+                terms.append(Literal(to_string(value), lang=term_map.language))
+        return terms
+
+    def resolve(self, value: str) -> str:
+        if ABSOLUTE_IRI.match(value):
+            return value
+        return self.base_iri + value
+
+    def subjects(self, triples_map: TriplesMapPlan) -> list:
+        """(item, subjects) pairs of a triples map, computed once per execution."""
+        if triples_map.node not in self.subjects_cache:
+            self.subjects_cache[triples_map.node] = [
+                (item, self.terms(triples_map.subject, item))
+                for item in self.items(triples_map)
+            ]
+        return self.subjects_cache[triples_map.node]
+
+    def parent_terms(self, term_map: TermMap, child: TriplesMapPlan, item) -> list:
+        parent = self.plan.triples_maps.get(term_map.parent)
+        if parent is None:
+            return []
+        if not term_map.joins:
+            if parent.source == child.source and parent.iterator == child.iterator:
+                return self.terms(parent.subject, item)
+            # different logical sources without join condition join every parent subject
+            return [s for _, subjects in self.subjects(parent) for s in subjects]
+        key = (term_map.parent, id(term_map))
+        if key not in self.join_index_cache:
+            index = {}
+            for parent_item, subjects in self.subjects(parent):
+                values = [
+                    [to_string(v) for v in parent_ref(parent_item)]
+                    for _, parent_ref in term_map.joins
+                ]
+                for combination in itertools.product(*values):
+                    index.setdefault(combination, []).extend(subjects)
+            self.join_index_cache[key] = index
+        index = self.join_index_cache[key]
+        values = [[to_string(v) for v in child_ref(item)] for child_ref, _ in term_map.joins]
+        found = []
+        for combination in itertools.product(*values):
+            found.extend(index.get(combination, []))
+        return found
+
+    def triples(self, triples_map: TriplesMapPlan) -> set:
+        triples = set()
+        for item, subjects in self.subjects(triples_map):
+            if not subjects:
+                continue
+            for subject in subjects:
+                for rdf_class in triples_map.classes:
+                    triples.add((subject, RDF.type, rdf_class))
+            for predicate_maps, object_maps in triples_map.predicate_objects:
+                predicates = [p for pm in predicate_maps for p in self.terms(pm, item)]
+                if not predicates:
+                    continue
+                objects = []
+                for object_map in object_maps:
+                    if object_map.kind == "parent":
+                        objects.extend(self.parent_terms(object_map, triples_map, item))
+                    else:
+                        objects.extend(self.terms(object_map, item))
+                for subject in subjects:
+                    for predicate in predicates:
+                        for obj in objects:
+                            triples.add((subject, predicate, obj))
+        return triples
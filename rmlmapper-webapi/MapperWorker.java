@@ -0,0 +1,106 @@
+import java.io.BufferedReader;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.nio.charset.StandardCharsets;
+import java.security.Permission;
+
+/**
+ * Warm rmlmapper process driven by mapper_pool.py.
+ *
+ * Reads one job per line from stdin as "job_dir TAB serialization", runs the
+ * rmlmapper cli inside this JVM on job_dir/mapping.rml.ttl with job_dir as base
+ * path for the sources, and answers with one line "OK" or "ERR message" on
+ * stdout. Log output of the mapper is redirected to stderr so it cannot mix
+ * with the protocol.
+ *
+ * The cli ends failing mappings with System.exit, so while a job runs exits are
+ * turned into an ExitTrapped exception and answered with "ERR". This needs the
+ * JVM to be started with -Djava.security.manager=allow.
+ */
+public class MapperWorker {
+
+    static class ExitTrapped extends SecurityException {
+        final int status;
+
+        ExitTrapped(int status) {
+            super("rmlmapper exited with status " + status);
+            this.status = status;
+        }
+    }
+
+    static volatile boolean inJob = false;
+
+    @SuppressWarnings("removal")
+    static void trapExit() {
+        try {
+            System.setSecurityManager(new SecurityManager() {
+                @Override
+                public void checkExit(int status) {
+                    if (inJob) {
+                        throw new ExitTrapped(status);
+                    }
+                }
+
+                @Override
+                public void checkPermission(Permission perm) {
+                }
+
+                @Override
+                public void checkPermission(Permission perm, Object context) {
+                }
+            });
+        } catch (UnsupportedOperationException e) {
+            System.err.println("MapperWorker: cannot trap System.exit, failing mappings will end this worker");
+        }
+    }
+
+    public static void main(String[] args) throws Exception {
+        PrintStream protocol = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        System.setOut(System.err);
+
+        Class<?> cli = Class.forName("be.ugent.rml.cli.Main");
+        Method withBasePath = null;
+        try {
+            withBasePath = cli.getMethod("main", String[].class, String.class);
+        } catch (NoSuchMethodException e) {
+            // older releases resolve sources against the working directory only
+        }
+        Method plain = cli.getMethod("main", String[].class);
+        trapExit();
+
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        protocol.println("READY");
+        String line;
+        while ((line = in.readLine()) != null) {
+            String[] job = line.split("\t");
+            String dir = job[0];
+            String serialization = job.length > 1 ? job[1] : "turtle";
+            String[] cliArgs = {"-m", dir + "/mapping.rml.ttl", "-o", dir + "/output", "-s", serialization};
+            inJob = true;
+            try {
+                if (withBasePath != null) {
+                    withBasePath.invoke(null, cliArgs, dir);
+                } else {
+                    plain.invoke(null, (Object) cliArgs);
+                }
+                protocol.println("OK");
+            } catch (InvocationTargetException e) {
+                Throwable cause = e.getCause();
+                if (cause instanceof ExitTrapped) {
+                    ExitTrapped exit = (ExitTrapped) cause;
+                    protocol.println(exit.status == 0 ? "OK" : "ERR " + exit.getMessage());
+                } else {
+                    protocol.println("ERR " + String.valueOf(cause).replace('\n', ' '));
+                }
+            } catch (Throwable e) {
+                protocol.println("ERR " + String.valueOf(e).replace('\n', ' '));
+            } finally {
+                inJob = false;
+            }
+        }
+    }
+}
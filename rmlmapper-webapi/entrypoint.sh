@@ -1,4 +1,8 @@
 #!/bin/sh
+# with MAPPER_POOL_SIZE set, serve /execute from a pool of warm mapper JVMs
+if [ "${MAPPER_POOL_SIZE:-0}" -gt 0 ]; then
+  exec python3 /mapper_pool.py
+fi
 # add port form env to config.json
 echo $(cat config.json | jq '."baseURL" = "http://localhost:"+env.PORT') > config.json
 cat ./config.json
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""Pool of warm rmlmapper JVMs serving the /execute API of rmlmapper-webapi-js.
+
+Every job is handed to an idle MapperWorker process over its stdin, so the JVM
+start-up and class loading is paid once per worker instead of once per request.
+Requests beyond pool size plus queue depth are rejected with 503 and a
+Retry-After header, jobs running longer than the timeout get their worker killed
+and replaced, and workers are recycled after a fixed number of jobs. Workers
+whose JVM died are started again before they go back to the idle queue.
+"""
+import json
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORT = int(os.environ.get("PORT", 4000))
+MAPPER_POOL_SIZE = int(os.environ.get("MAPPER_POOL_SIZE", 2))
+# jobs allowed to wait for a worker before requests are rejected
+MAPPER_QUEUE_DEPTH = int(os.environ.get("MAPPER_QUEUE_DEPTH", 16))
+MAPPER_JOB_TIMEOUT = float(os.environ.get("MAPPER_JOB_TIMEOUT", 120))
+MAPPER_JOBS_PER_WORKER = int(os.environ.get("MAPPER_JOBS_PER_WORKER", 500))
+MAPPER_JAVA_OPTS = os.environ.get("MAPPER_JAVA_OPTS", "").split()
+MAPPER_CLASSPATH = os.environ.get("MAPPER_CLASSPATH", "/rmlmapper.jar:/mapper-worker")
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+
+class JobError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Worker:
+    """One long-lived JVM running MapperWorker."""
+
+    def __init__(self, number: int):
+        self.number = number
+        self.process = None
+        self.lines = None
+        self.jobs = 0
+        self.start()
+
+    def start(self) -> None:
+        self.process = subprocess.Popen(
+            # MapperWorker needs a security manager to turn System.exit into errors
+            ["java", "-Djava.security.manager=allow", *MAPPER_JAVA_OPTS,
+             "-cp", MAPPER_CLASSPATH, "MapperWorker"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+        )
+        self.jobs = 0
+        # a reader thread per process lets run() wait for answers with a timeout
+        self.lines = queue.Queue()
+        threading.Thread(
+            target=self._read, args=(self.process, self.lines), daemon=True
+        ).start()
+        ready = self.lines.get()
+        if ready != "READY":
+            self.kill()
+            raise RuntimeError(f"mapper worker {self.number} failed to start")
+        logging.info(f"mapper worker {self.number} started (pid {self.process.pid})")
+
+    @staticmethod
+    def _read(process, lines) -> None:
+        for line in process.stdout:
+            lines.put(line.rstrip("\n"))
+        lines.put(None)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self) -> None:
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.wait()
+
+    def run(self, job_dir: str, serialization: str) -> None:
+        """Run one job; a worker that timed out or crashed is left dead for the pool to replace."""
+        try:
+            self.process.stdin.write(f"{job_dir}\t{serialization}\n")
+            self.process.stdin.flush()
+            answer = self.lines.get(timeout=MAPPER_JOB_TIMEOUT)
+        except queue.Empty:
+            pool.count("timeouts")
+            self.kill()
+            raise JobError(504, f"mapping did not finish within {MAPPER_JOB_TIMEOUT}s")
+        except OSError:
+            answer = None
+        if answer is None:
+            pool.count("crashes")
+            self.kill()
+            raise JobError(500, "mapper worker exited while processing the mapping")
+
+        self.jobs += 1
+        if answer != "OK":
+            raise JobError(400, answer.removeprefix("ERR "))
+
+
+class Pool:
+    def __init__(self, size: int, queue_depth: int):
+        self.size = size
+        self.queue_depth = queue_depth
+        self.idle = queue.Queue()
+        self.slots = threading.BoundedSemaphore(size + queue_depth)
+        self.counts = {
+            "accepted": 0,
+            "rejected": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "crashes": 0,
+            "recycled": 0,
+        }
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        for number in range(size):
+            self.idle.put(Worker(number))
+
+    def count(self, name: str, delta: int = 1) -> None:
+        with self.lock:
+            self.counts[name] += delta
+
+    def checkout(self) -> Worker:
+        """Take an idle worker, starting its JVM again if an earlier restart failed."""
+        worker = self.idle.get()
+        if not worker.alive:
+            try:
+                worker.start()
+            except (RuntimeError, OSError) as e:
+                self.idle.put(worker)
+                raise JobError(503, f"mapper worker could not be started: {e}")
+        return worker
+
+    def checkin(self, worker: Worker) -> None:
+        """Put a worker back, replacing its JVM when it died or served its jobs."""
+        if worker.alive and worker.jobs >= MAPPER_JOBS_PER_WORKER:
+            self.count("recycled")
+            worker.stop()
+        if not worker.alive:
+            try:
+                worker.start()
+            except (RuntimeError, OSError) as e:
+                # checkout() tries again before the worker takes the next job
+                logging.error(f"mapper worker {worker.number} could not be restarted: {e}")
+        self.idle.put(worker)
+
+    def execute(self, rml: str, sources: dict, serialization: str) -> str:
+        if not self.slots.acquire(blocking=False):
+            self.count("rejected")
+            raise JobError(503, "mapper queue is full")
+        self.count("accepted")
+        with self.lock:
+            self.in_flight += 1
+        job_dir = tempfile.mkdtemp(prefix="rmlmapper-")
+        try:
+            with open(os.path.join(job_dir, "mapping.rml.ttl"), "w", encoding="utf-8") as f:
+                f.write(rml)
+            for name, content in sources.items():
+                with open(os.path.join(job_dir, os.path.basename(name)), "w", encoding="utf-8") as f:
+                    f.write(content)
+            worker = self.checkout()
+            try:
+                worker.run(job_dir, serialization)
+            finally:
+                self.checkin(worker)
+            output_path = os.path.join(job_dir, "output")
+            if not os.path.exists(output_path):
+                return ""
+            with open(output_path, encoding="utf-8") as f:
+                return f.read()
+        except JobError:
+            self.count("failed")
+            raise
+        finally:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            with self.lock:
+                self.in_flight -= 1
+            self.slots.release()
+
+    def stats(self) -> dict:
+        with self.lock:
+            busy = self.size - self.idle.qsize()
+            return {
+                "size": self.size,
+                "queue_depth": self.queue_depth,
+                "busy": busy,
+                "queued": max(self.in_flight - busy, 0),
+                "job_timeout": MAPPER_JOB_TIMEOUT,
+                "jobs_per_worker": MAPPER_JOBS_PER_WORKER,
+                **self.counts,
+            }
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status: int, body: dict, headers: dict | None = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/status":
+            self._send_json(200, pool.stats())
+        else:
+            self._send_json(404, {"message": "not found"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/execute":
+            self._send_json(404, {"message": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length))
+            rml = payload["rml"]
+        except (ValueError, KeyError, TypeError):
+            self._send_json(400, {"message": "expected a json body with rml, sources and serialization"})
+            return
+        start = time.perf_counter()
+        try:
+            output = pool.execute(
+                rml, payload.get("sources") or {}, payload.get("serialization") or "turtle"
+            )
+        except JobError as e:
+            headers = {"Retry-After": "1"} if e.status == 503 else None
+            self._send_json(e.status, {"message": e.message}, headers)
+            return
+        except Exception as e:
+            logging.exception("mapper job failed")
+            self._send_json(500, {"message": f"mapper job failed: {e}"})
+            return
+        self._send_json(200, {"output": output, "seconds": time.perf_counter() - start})
+
+    def log_message(self, format, *args):
+        logging.debug(format % args)
+
+
+if __name__ == "__main__":
+    pool = Pool(MAPPER_POOL_SIZE, MAPPER_QUEUE_DEPTH)
+    server = ThreadingHTTPServer(("", PORT), Handler)
+    logging.info(
+        f"rmlmapper pool listening on {PORT}: {MAPPER_POOL_SIZE} workers, "
+        f"queue depth {MAPPER_QUEUE_DEPTH}, timeout {MAPPER_JOB_TIMEOUT}s, "
+        f"recycling after {MAPPER_JOBS_PER_WORKER} jobs"
+    )
+    server.serve_forever()
@@ -1,11 +1,12 @@
 import json
 import logging
+import re
 from re import split as re_split
 from urllib.parse import unquote, urlparse
 from urllib.request import urlopen
 
 import requests
-from rdflib import RDF, Graph, Literal, Namespace, URIRef
+from rdflib import RDF, BNode, Graph, Literal, Namespace, URIRef
 from rdflib.plugins.sparql import prepareQuery
 from rdflib.util import guess_format
 #from reasonable import PyReasoner
@@ -93,6 +94,174 @@ def replace_all_data_sources(rules: Graph, url_mapping: dict) -> None:
             rules.set((source, RML.source, Literal(placeholder)))
 
 
+SOURCE_SLOT = "urn:rdfconverter:source-slot:"
+SOURCE_SLOT_PATTERN = re.compile(r'"{}(\d+)"'.format(re.escape(SOURCE_SLOT)))
+
+
+class RuleTemplate:
+    """RML rules serialized once, with slots for the data sources and the @base directive.
+
+    Parsing the RML Turtle, replacing the sources and serializing it again is
+    only done when the template is built. Rendering for a request then only
+    joins the prepared Turtle chunks with the per-request values.
+    """
+
+    def __init__(self, rml_rules: str):
+        rules = Graph()
+        rules.parse(data=rml_rules, format="ttl")
+        # the rmlmapper copies these prefixes into its output
+        self.namespaces = [(prefix, str(namespace)) for prefix, namespace in rules.namespaces()]
+        # one slot per distinct source literal, all logical sources sharing it use the same slot
+        self.sources = []
+        for source in sorted(set(rules.objects(None, RML.source))):
+            if not isinstance(source, Literal):
+                continue
+            slot = Literal(SOURCE_SLOT + str(len(self.sources)))
+            for logical_source in list(rules.subjects(RML.source, source)):
+                rules.set((logical_source, RML.source, slot))
+            self.sources.append(source)
+        text = rules.serialize(format="ttl")
+
+        # @base goes right after the last @prefix line
+        lines = text.split("\n")
+        last_prefix_idx = -1
+        for idx, line in enumerate(lines):
+            if line.strip().startswith("@prefix"):
+                last_prefix_idx = idx
+        if last_prefix_idx >= 0:
+            self.head = "\n".join(lines[: last_prefix_idx + 1]) + "\n"
+            body = "\n".join(lines[last_prefix_idx + 1 :])
+        else:
+            self.head = ""
+            body = text
+        # split into literal chunks and slot indices: [chunk, slot, chunk, slot, ..., chunk]
+        parts = SOURCE_SLOT_PATTERN.split(body)
+        self.chunks = parts[0::2]
+        self.slots = [int(idx) for idx in parts[1::2]]
+        self.size = len(text)
+
+    def mentions(self, text: str) -> bool:
+        """Return whether text occurs in the rules outside of the source literals."""
+        return text in self.head or any(text in chunk for chunk in self.chunks)
+
+    def render(self, url_mapping: dict, base_uri: str = "") -> str:
+        """Fill in source placeholders and the @base directive.
+
+        Args:
+            url_mapping: Dict mapping original URLs to placeholder info
+                        {url: {"placeholder": "source_1.json", ...}}
+            base_uri: Base IRI for the @base directive, omitted if empty
+
+        Returns:
+            str: RML rules in Turtle format
+        """
+        values = []
+        for source in self.sources:
+            info = url_mapping.get(str(source))
+            if info:
+                logging.debug("Replacing source {} with placeholder {}".format(source, info["placeholder"]))
+                values.append(Literal(info["placeholder"], lang=source.language, datatype=source.datatype).n3())
+            else:
+                values.append(source.n3())
+        out = [self.head]
+        if base_uri:
+            out.append("@base <{}> .\n".format(base_uri) if self.head else "@base <{}> .\n\n".format(base_uri))
+        for chunk, slot in zip(self.chunks, self.slots):
+            out.append(chunk)
+            out.append(values[slot])
+        out.append(self.chunks[-1])
+        return "".join(out)
+
+
+RULE_GRAPH = "urn:rdfconverter:rule:"
+
+
+def tag_rule_graphs(rml_rules: str, base_uri: str = "") -> tuple[str, dict]:
+    """Put the output of every TriplesMap into a named graph of its own.
+
+    TriplesMaps without graph maps get a constant graph map on their subject
+    map, so an N-Quads output of the rmlmapper tells which rule generated a
+    triple. TriplesMaps that already have graph maps are left unchanged.
+
+    Args:
+        rml_rules: RML rules in Turtle format, as rendered by RuleTemplate
+        base_uri: Base IRI of the @base directive, omitted if empty
+
+    Returns:
+        Tuple of (tagged RML rules in Turtle format, {graph IRI: rule name}),
+        the rule name being the rdfs:label of the TriplesMap
+    """
+    rules = Graph()
+    rules.parse(data=rml_rules, format="ttl")
+    rule_graphs = {}
+    for triples_map in sorted(rules.subjects(RDF.type, RR.TriplesMap)):
+        subject_map = rules.value(triples_map, RR.subjectMap)
+        if subject_map is None:
+            continue
+        poms = list(rules.objects(triples_map, RR.predicateObjectMap))
+        if any(
+            (node, RR.graphMap, None) in rules or (node, RR.graph, None) in rules
+            for node in [subject_map] + poms
+        ):
+            continue
+        graph_iri = URIRef(RULE_GRAPH + str(len(rule_graphs)))
+        graph_map = BNode()
+        rules.add((subject_map, RR.graphMap, graph_map))
+        rules.add((graph_map, RR.constant, graph_iri))
+        rule_graphs[str(graph_iri)] = str(rules.value(triples_map, RDFS.label) or triples_map)
+    return rules.serialize(format="ttl", base=base_uri or None), rule_graphs
+
+
+class TripleTemplate:
+    """Triples of a template graph with the IRIs of one namespace as a slot.
+
+    The template is split once into triples without slot terms, which are the
+    same for every instance, and triples with slot terms. Instantiating it
+    only substitutes the slot IRIs, blank nodes and literals mentioning the
+    namespace, instead of parsing the template text again for every instance.
+    """
+
+    def __init__(self, graph: Graph, namespace: str):
+        self.namespace = namespace
+        self.constant = []
+        self.triples = []
+        self.iris = {}
+        self.literals = set()
+        self.bnodes = set()
+        for triple in graph:
+            variable = False
+            for term in triple:
+                if isinstance(term, URIRef):
+                    if str.startswith(term, namespace):
+                        self.iris[term] = term[len(namespace):]
+                        variable = True
+                elif isinstance(term, BNode):
+                    # every instance gets its own blank nodes
+                    self.bnodes.add(term)
+                    variable = True
+                elif namespace in term:
+                    self.literals.add(term)
+                    variable = True
+            (self.triples if variable else self.constant).append(triple)
+        self.namespaces = [
+            (prefix, str(uri)) for prefix, uri in graph.namespaces() if str(uri) != namespace
+        ]
+
+    def instantiate(self, namespace: str, graph: Graph) -> list:
+        """Return the quads of graph for the triples with slots filled by namespace."""
+        terms = {term: URIRef(namespace + suffix) for term, suffix in self.iris.items()}
+        for bnode in self.bnodes:
+            terms[bnode] = BNode()
+        for literal in self.literals:
+            terms[literal] = Literal(
+                literal.replace(self.namespace, namespace),
+                lang=literal.language,
+                datatype=literal.datatype,
+            )
+        get = terms.get
+        return [(get(s, s), get(p, p), get(o, o), graph) for s, p, o in self.triples]
+
+
 def find_method_graph(rules: Graph):
     pass
 
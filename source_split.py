@@ -0,0 +1,508 @@
+import codecs
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+from typing import BinaryIO
+
+from jsonpath_ng.jsonpath import Root
+from rdflib import BNode, Graph, URIRef
+from rdflib.namespace import CSVW, RDF
+from rdflib.store import Store
+from rdflib.term import rdflib_skolem_genid
+from rdflib.util import guess_format
+
+from jsonpath_cache import compile_jsonpath
+from rdf_writer import format_node, iter_triples
+
+# blank nodes shared by all batches are skolemized with this prefix, so every
+# batch refers to the same node and duplicates across batches can be dropped
+SKOLEM_PREFIX = "https://rdflib.github.io" + rdflib_skolem_genid
+
+# iterators selecting the rows by field names only, e.g. $.data[*] or $['data'][*],
+# are split while reading the document, all others after decoding it as a whole
+KEY_STEP = re.compile(r"\.([^.\[\]'\"*()@?$\s]+)|\[(?:'([^']*)'|\"([^\"]*)\")\]")
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+JSON_READ_BYTES = 1024 * 1024
+
+# RDF formats whose rdflib parsers add their triples to the store one by one,
+# the others are parsed into a Graph first
+SINK_FORMATS = ("turtle", "nt", "nt11", "xml", "json-ld")
+# formats N-Triples lines are valid documents of, batches of other formats are serialized
+LINE_SYNTAX_FORMATS = ("turtle", "nt", "nt11")
+# triples written to the SQLite database at once
+INSERT_ROWS = 10_000
+
+
+def iter_source_batches(file: BinaryIO, url: str, iterators: list[str], chunk_rows: int):
+    """Cut a row-oriented source document into documents of at most chunk_rows rows.
+
+    JSON is cut along the longest array selected by one of the iterators, RDF
+    along its csvw:Row resources. Every batch repeats everything that is not
+    part of a row, e.g. the table schema, columns and notes of a CSVW table.
+    Sources that can not be cut are yielded once as they are.
+
+    The document is read from file incrementally: JSON rows one at a time,
+    RDF triples into a temporary SQLite database the batches are queried
+    from, so neither the document nor its parsed form is held in memory.
+
+    Args:
+        file: Seekable binary file holding the source document
+        url: Source URL, used to guess the RDF format and to resolve relative IRIs
+        iterators: JSONPath iterators of the mapping sources reading the document
+        chunk_rows: Maximum number of rows per batch
+
+    Yields:
+        str: Batch documents in the format of the source
+    """
+    if _first_byte(file) in (b"{", b"["):
+        batches = split_json_file(file, iterators, chunk_rows)
+    else:
+        batches = None
+        format = guess_format(url)
+        if format:
+            batches = split_csvw_file(file, url, format, chunk_rows)
+    if batches is None:
+        logging.info(f"Found no rows to split {url} into batches of {chunk_rows}")
+        file.seek(0)
+        yield file.read().decode("utf-8")
+        return
+    yield from batches
+
+
+def _first_byte(file: BinaryIO) -> bytes:
+    file.seek(0)
+    while True:
+        block = file.read(4096)
+        if not block:
+            return b""
+        block = block.lstrip()
+        if block:
+            return block[:1]
+
+
+def key_path(iterator: str) -> tuple | None:
+    """Return the field names of an iterator like $.data.rows[*], None for other iterators."""
+    if not iterator.startswith("$") or not iterator.endswith("[*]"):
+        return None
+    body = iterator[:-3]
+    path = []
+    position = 1
+    while position < len(body):
+        match = KEY_STEP.match(body, position)
+        if not match:
+            return None
+        path.append(next(group for group in match.groups() if group is not None))
+        position = match.end()
+    return tuple(path)
+
+
+def split_json_file(file: BinaryIO, iterators: list[str], chunk_rows: int):
+    """Return an iterator of JSON documents with the rows array cut to chunk_rows, None if there is none.
+
+    The rows are the longest array selected by one of the iterators ending in
+    [*]. If all of these iterators select by field names, the document is read
+    twice, once to find the arrays and once to copy the rows of each batch,
+    holding one row at a time. Other iterators need the decoded document, see
+    split_json.
+    """
+    paths = [key_path(iterator) for iterator in iterators if iterator.endswith("[*]")]
+    if None in paths:
+        file.seek(0)
+        try:
+            data = json.load(file)
+        except ValueError:
+            return None
+        return split_json(data, iterators, chunk_rows)
+    if not paths:
+        return None
+    try:
+        arrays = _find_arrays(_JSONReader(file), set(paths))
+    except ValueError:
+        # not JSON after all, or not UTF-8
+        return None
+    rows = None
+    for path in paths:
+        if path in arrays and (rows is None or arrays[path][2] > rows[2]):
+            rows = arrays[path]
+    if rows is None or rows[2] <= chunk_rows:
+        return None
+    start, end, count = rows
+    logging.info(f"Splitting {count} rows at byte {start} into batches of {chunk_rows}")
+    return _iter_json_file_batches(file, start, end, chunk_rows)
+
+
+class _JSONReader:
+    """Read JSON values one at a time from a binary file, holding about one value in memory."""
+
+    decoder = json.JSONDecoder()
+
+    def __init__(self, file: BinaryIO, offset: int = 0):
+        file.seek(offset)
+        self.file = file
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.position = 0
+        # bytes of the file before self.text
+        self.offset = offset
+        self.eof = False
+
+    def _fill(self) -> None:
+        consumed = self.text[:self.position]
+        self.offset += len(consumed.encode("utf-8"))
+        # double the read size while a value does not fit, so it is decoded a few times only
+        block = self.file.read(max(JSON_READ_BYTES, len(self.text) - self.position))
+        self.eof = not block
+        self.text = self.text[self.position:] + self.utf8.decode(block, final=self.eof)
+        self.position = 0
+
+    def tell(self) -> int:
+        """Return the byte offset of the reading position in the file."""
+        return self.offset + len(self.text[:self.position].encode("utf-8"))
+
+    def peek(self) -> str | None:
+        """Skip whitespace and return the next character, None at the end of the file."""
+        while True:
+            self.position = JSON_WHITESPACE.match(self.text, self.position).end()
+            if self.position < len(self.text):
+                return self.text[self.position]
+            if self.eof:
+                return None
+            self._fill()
+
+    def take(self, *characters: str) -> str:
+        """Consume the next character, which must be one of characters."""
+        character = self.peek()
+        if character not in characters:
+            raise ValueError(f"Expected one of {characters} at byte {self.tell()}, found {character!r}")
+        self.position += 1
+        return character
+
+    def value(self):
+        """Decode the next value, returning it and its JSON text."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.text, self.position)
+                # a number at the end of the text may continue in the next block
+                if end < len(self.text) or self.eof:
+                    break
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+        text = self.text[self.position:end]
+        self.position = end
+        return value, text
+
+
+def _find_arrays(reader: _JSONReader, paths: set) -> dict:
+    """Return path -> (start byte, end byte, number of items) of the arrays found at paths."""
+    prefixes = {path[:length] for path in paths for length in range(len(path))}
+    arrays = {}
+
+    def walk(path):
+        character = reader.peek()
+        if character == "[" and path in paths:
+            start = reader.tell()
+            reader.take("[")
+            count = 0
+            if reader.peek() == "]":
+                reader.take("]")
+            else:
+                while True:
+                    reader.value()
+                    count += 1
+                    if reader.take(",", "]") == "]":
+                        break
+            arrays[path] = (start, reader.tell(), count)
+        elif character == "{" and path in prefixes:
+            reader.take("{")
+            if reader.peek() == "}":
+                reader.take("}")
+                return
+            while True:
+                key, _ = reader.value()
+                if not isinstance(key, str):
+                    raise ValueError(f"Expected an object key at byte {reader.tell()}")
+                reader.take(":")
+                walk(path + (key,))
+                if reader.take(",", "}") == "}":
+                    break
+        else:
+            reader.value()
+
+    walk(())
+    if reader.peek() is not None:
+        raise ValueError(f"Extra data at byte {reader.tell()}")
+    return arrays
+
+
+def _iter_json_file_batches(file: BinaryIO, start: int, end: int, chunk_rows: int):
+    file.seek(0)
+    prefix = file.read(start).decode("utf-8")
+    file.seek(end)
+    suffix = file.read().decode("utf-8")
+    reader = _JSONReader(file, start)
+    reader.take("[")
+    rows = []
+    if reader.peek() != "]":
+        while True:
+            rows.append(reader.value()[1])
+            last = reader.take(",", "]") == "]"
+            if len(rows) == chunk_rows or last:
+                yield f"{prefix}[{','.join(rows)}]{suffix}"
+                rows.clear()
+            if last:
+                break
+
+
+def split_json(data, iterators: list[str], chunk_rows: int):
+    """Return an iterator of JSON documents with the rows array cut to chunk_rows, None if there is none.
+
+    The rows are the longest array selected by one of the iterators ending in [*].
+    """
+    rows = None
+    for iterator in iterators:
+        if not iterator.endswith("[*]"):
+            continue
+        try:
+            expression = compile_jsonpath(iterator[:-3])
+        except Exception:
+            # iterators with filters are not used for splitting
+            continue
+        for match in expression.find(data):
+            if isinstance(match.value, list) and (rows is None or len(match.value) > len(rows.value)):
+                rows = match
+    if rows is None or len(rows.value) <= chunk_rows:
+        return None
+    logging.info(f"Splitting {len(rows.value)} rows at {rows.full_path} into batches of {chunk_rows}")
+    return _iter_json_batches(data, rows, chunk_rows)
+
+
+def _iter_json_batches(data, rows, chunk_rows: int):
+    values = rows.value
+    if isinstance(rows.full_path, Root):
+        for start in range(0, len(values), chunk_rows):
+            yield json.dumps(values[start:start + chunk_rows])
+        return
+    try:
+        for start in range(0, len(values), chunk_rows):
+            rows.full_path.update(data, values[start:start + chunk_rows])
+            yield json.dumps(data)
+    finally:
+        rows.full_path.update(data, values)
+
+
+class TripleTable(Store):
+    """Write-only rdflib store keeping the parsed triples in a temporary SQLite database.
+
+    rdflib parsers add the triples of a large document to it without a Graph
+    in memory. Terms are stored in N-Triples syntax and looked up by subject
+    and object while the batches are cut, see split_csvw_file. The database
+    is deleted on close, or once the table is garbage collected.
+    """
+
+    context_aware = True
+
+    def __init__(self, base: str):
+        super().__init__()
+        self.base = base
+        self.directory = tempfile.TemporaryDirectory(prefix="rdfconverter-")
+        # batches are cut by whichever thread iterates the response
+        self.db = sqlite3.connect(os.path.join(self.directory.name, "triples.db"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode = OFF")
+        self.db.execute("PRAGMA synchronous = OFF")
+        self.db.execute("CREATE TABLE triples (s TEXT, p TEXT, o TEXT)")
+        self.pending = []
+        self.prefixes = {}
+
+    def add(self, triple, context=None, quoted=False):
+        self.pending.append(tuple(format_node(term, self.base) for term in triple))
+        if len(self.pending) >= INSERT_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        self.db.executemany("INSERT INTO triples VALUES (?, ?, ?)", self.pending)
+        self.pending.clear()
+
+    def bind(self, prefix, namespace, override=True):
+        if override or prefix not in self.prefixes:
+            self.prefixes[prefix] = namespace
+
+    def namespace(self, prefix):
+        return self.prefixes.get(prefix)
+
+    def prefix(self, namespace):
+        for prefix, bound in self.prefixes.items():
+            if bound == namespace:
+                return prefix
+        return None
+
+    def namespaces(self):
+        yield from self.prefixes.items()
+
+    def triples(self, triple_pattern, context=None):
+        # parsers only add triples
+        return iter(())
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    def __len__(self, context=None):
+        return self.db.execute("SELECT count(*) FROM triples").fetchone()[0]
+
+    def index(self) -> None:
+        """Index the triples by subject and object once all are added."""
+        self.flush()
+        self.db.execute("CREATE INDEX triples_s ON triples (s)")
+        self.db.execute("CREATE INDEX triples_o ON triples (o, p)")
+        self.db.commit()
+
+    def query(self, sql: str, *parameters):
+        return self.db.execute(sql, parameters)
+
+    def close(self) -> None:
+        self.db.close()
+        self.directory.cleanup()
+
+
+def split_csvw_file(file: BinaryIO, url: str, format: str, chunk_rows: int):
+    """Return an iterator of documents with the csvw:Row resources cut to chunk_rows, None if there are not more.
+
+    A row takes along the resources it describes and the blank nodes reachable
+    from them, as well as the triples pointing at the row. Blank nodes outside
+    of rows are skolemized below SKOLEM_PREFIX. The triples are parsed into a
+    TripleTable, see SINK_FORMATS for the formats parsed without a Graph.
+    """
+    table = TripleTable(url)
+    file.seek(0)
+    try:
+        if format in SINK_FORMATS:
+            Graph(store=table).parse(source=file, format=format, publicID=url)
+        else:
+            graph = Graph()
+            graph.parse(source=file, format=format, publicID=url)
+            for prefix, namespace in graph.namespaces():
+                table.bind(prefix, namespace)
+            for triple in graph:
+                table.add(triple)
+            graph = None
+        table.index()
+        count = _index_rows(table)
+        if count <= chunk_rows:
+            table.close()
+            return None
+    except Exception:
+        table.close()
+        raise
+    logging.info(f"Splitting {count} csvw:Row resources into batches of {chunk_rows}")
+    return _iter_csvw_batches(table, format, chunk_rows)
+
+
+def _index_rows(table: TripleTable) -> int:
+    """Collect the rows with their rownum and the subjects of every row, returning the number of rows."""
+    table.db.create_function("rownum", 1, _rownum, deterministic=True)
+    table.query(
+        "CREATE TABLE rows AS SELECT DISTINCT t.s AS term, "
+        "coalesce((SELECT rownum(n.o) FROM triples n WHERE n.s = t.s AND n.p = ? LIMIT 1), 0) AS rownum "
+        "FROM triples t WHERE t.p = ? AND t.o = ?",
+        format_node(CSVW.rownum), format_node(RDF.type), format_node(CSVW.Row),
+    )
+    table.query("CREATE UNIQUE INDEX rows_term ON rows (term)")
+    table.query("CREATE TABLE row_subjects (row TEXT, term TEXT)")
+    pending = []
+    for (row,) in table.query("SELECT term FROM rows"):
+        pending.extend((row, subject) for subject in _row_subjects(table, row))
+        if len(pending) >= INSERT_ROWS:
+            table.db.executemany("INSERT INTO row_subjects VALUES (?, ?)", pending)
+            pending.clear()
+    table.db.executemany("INSERT INTO row_subjects VALUES (?, ?)", pending)
+    table.query("CREATE INDEX row_subjects_row ON row_subjects (row)")
+    table.query("CREATE INDEX row_subjects_term ON row_subjects (term)")
+    table.db.commit()
+    return table.query("SELECT count(*) FROM rows").fetchone()[0]
+
+
+def _iter_csvw_batches(table: TripleTable, format: str, chunk_rows: int):
+    try:
+
+        def shared(term):
+            if term.startswith("_:") and not table.query(
+                "SELECT 1 FROM row_subjects WHERE term = ? LIMIT 1", term
+            ).fetchone():
+                return f"<{SKOLEM_PREFIX}{term[2:]}>"
+            return term
+
+        shared_lines = [
+            f"{shared(s)} {p} {shared(o)} .\n"
+            for s, p, o in table.query(
+                "SELECT s, p, o FROM triples "
+                "WHERE s NOT IN (SELECT term FROM row_subjects) AND o NOT IN (SELECT term FROM rows)"
+            )
+        ]
+        rows = table.query("SELECT term FROM rows ORDER BY rownum, term")
+        while True:
+            batch_rows = rows.fetchmany(chunk_rows)
+            if not batch_rows:
+                break
+            lines = list(shared_lines)
+            for (row,) in batch_rows:
+                for (subject,) in table.query("SELECT term FROM row_subjects WHERE row = ?", row):
+                    lines.extend(
+                        f"{s} {p} {shared(o)} .\n"
+                        for s, p, o in table.query("SELECT s, p, o FROM triples WHERE s = ?", subject)
+                    )
+                lines.extend(
+                    f"{shared(s)} {p} {o} .\n"
+                    for s, p, o in table.query("SELECT s, p, o FROM triples WHERE o = ?", row)
+                )
+            if format in LINE_SYNTAX_FORMATS:
+                yield "".join(lines)
+                continue
+            batch = Graph(bind_namespaces="none")
+            for prefix, namespace in table.namespaces():
+                batch.bind(prefix, namespace)
+            batch.addN((s, p, o, batch) for s, p, o in iter_triples("".join(lines)))
+            lines = None
+            yield batch.serialize(format=format)
+    finally:
+        table.close()
+
+
+ROWNUM = re.compile(r'^"\s*([+-]?\d+)\s*"')
+
+
+def _rownum(term: str) -> int:
+    match = ROWNUM.match(term)
+    return int(match.group(1)) if match else 0
+
+
+def _row_subjects(table: TripleTable, row: str) -> list:
+    """Return the row, the resources it describes and blank nodes reachable from them."""
+    subjects = [row]
+    subjects.extend(
+        o for (o,) in table.query("SELECT o FROM triples WHERE s = ? AND p = ?", row, format_node(CSVW.describes))
+    )
+    seen = set(subjects)
+    for subject in subjects:
+        for (o,) in table.query("SELECT o FROM triples WHERE s = ? AND o LIKE '\\_:%' ESCAPE '\\'", subject):
+            if o not in seen:
+                seen.add(o)
+                subjects.append(o)
+    return subjects
+
+
+def deskolemize(triples):
+    """Yield the triples with the IRIs below SKOLEM_PREFIX turned back into blank nodes."""
+    for triple in triples:
+        if any(isinstance(term, URIRef) and str.startswith(term, SKOLEM_PREFIX) for term in triple):
+            triple = tuple(
+                BNode(term[len(SKOLEM_PREFIX):])
+                if isinstance(term, URIRef) and str.startswith(term, SKOLEM_PREFIX)
+                else term
+                for term in triple
+            )
+        yield triple
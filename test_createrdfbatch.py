@@ -0,0 +1,92 @@
+"""Integration tests for the /api/createrdf/batch endpoint.
+
+Run against a live service by setting TEST_BASE_URL:
+    TEST_BASE_URL=http://localhost:6003 pytest test_createrdfbatch.py -v
+"""
+
+import json
+import os
+import httpx
+from rdflib import Graph, Namespace
+
+BASE_URL = os.environ.get("TEST_BASE_URL", "http://localhost:6003")
+
+MAPPING_URL = (
+    "https://raw.githubusercontent.com/Mat-O-Lab/RDFConverter/"
+    "refs/heads/main/examples/catenax-batch-map.yaml"
+)
+
+# The canonical source URL used in the mapping
+BATCH_JSON_URL = (
+    "https://raw.githubusercontent.com/eclipse-tractusx/sldt-semantic-models"
+    "/refs/heads/main/io.catenax.batch/3.0.1/gen/Batch.json"
+)
+
+ASSET_URL = "https://edc.my-company.example.com/api/v1/assets/urn:uuid:{}"
+
+CX = Namespace("urn:samm:io.catenax.batch:3.0.1#")
+
+
+def batch_json(catenax_id: str) -> str:
+    return json.dumps({
+        "localIdentifiers": [{"value": "BID12345678", "key": "batchId"}],
+        "catenaXId": catenax_id,
+        "partTypeInformation": {"manufacturerPartId": "123-0.740-3434-A"},
+    })
+
+
+def post_batch(items):
+    response = httpx.post(
+        f"{BASE_URL}/api/createrdf/batch",
+        json={"mapping_url": MAPPING_URL, "items": items},
+        timeout=120,
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return {line["index"]: line for line in map(json.loads, response.text.splitlines())}
+
+
+def test_batch_returns_one_line_per_item():
+    """Every item gets exactly one result line, identified by its index."""
+    ids = ["580d3adf-1981-44a0-a214-13d6ceed9379", "7f2a0c55-3b61-4bd3-9f0e-2a1d6e0f4c11"]
+    items = [
+        {"data_url": ASSET_URL.format(catenax_id), "data_content": batch_json(catenax_id)}
+        for catenax_id in ids
+    ]
+    lines = post_batch(items)
+    assert sorted(lines) == [0, 1]
+    for index, catenax_id in enumerate(ids):
+        line = lines[index]
+        assert "error" not in line, line
+        assert line["filename"] == f"urn:uuid:{catenax_id}.ttl"
+        g = Graph().parse(data=line["graph"], format="turtle")
+        assert catenax_id in {str(o) for o in g.objects(None, CX.catenaXId)}
+
+
+def test_batch_accepts_data_urls():
+    """Items given by URL are fetched like in /api/createrdf."""
+    lines = post_batch([{"data_url": BATCH_JSON_URL}])
+    assert "error" not in lines[0], lines[0]
+    assert len(Graph().parse(data=lines[0]["graph"], format="turtle")) > 0
+
+
+def test_batch_reports_item_errors_inline():
+    """A failing item produces an error line without failing the other items."""
+    lines = post_batch([
+        {"data_url": BATCH_JSON_URL + "-does-not-exist"},
+        {"data_url": ASSET_URL.format("1"), "data_content": batch_json("1")},
+        {"data_content": batch_json("2")},
+    ])
+    assert lines[0]["error"]["status_code"] >= 400
+    assert "error" not in lines[1], lines[1]
+    assert lines[2]["error"]["status_code"] == 422
+
+
+def test_batch_invalid_mapping_fails_whole_request():
+    """Errors of the shared mapping are returned as a regular error response."""
+    response = httpx.post(
+        f"{BASE_URL}/api/createrdf/batch",
+        json={"mapping_url": MAPPING_URL + "-does-not-exist", "items": [{"data_url": BATCH_JSON_URL}]},
+        timeout=120,
+    )
+    assert response.status_code >= 400
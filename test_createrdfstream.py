@@ -0,0 +1,100 @@
+"""Integration tests for the streaming mode of the /api/createrdf endpoint.
+
+Run against a live service by setting TEST_BASE_URL:
+    TEST_BASE_URL=http://localhost:6003 pytest test_createrdfstream.py -v
+"""
+
+import os
+import httpx
+from rdflib import Graph
+
+BASE_URL = os.environ.get("TEST_BASE_URL", "http://localhost:6003")
+
+MAPPING_URL = (
+    "https://raw.githubusercontent.com/Mat-O-Lab/RDFConverter/"
+    "refs/heads/main/examples/catenax-batch-map.yaml"
+)
+
+
+def post(path, **kwargs):
+    return httpx.post(f"{BASE_URL}{path}", timeout=120, **kwargs)
+
+
+def json_graph() -> Graph:
+    response = post("/api/createrdf", json={"mapping_url": MAPPING_URL})
+    assert response.status_code == 200, response.text
+    return Graph().parse(data=response.json()["graph"], format="turtle")
+
+
+def test_accept_turtle_streams_turtle():
+    """Accept: text/turtle returns the graph as Turtle document with metadata headers."""
+    response = post(
+        "/api/createrdf", json={"mapping_url": MAPPING_URL}, headers={"Accept": "text/turtle"}
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/turtle")
+    assert response.headers["content-disposition"].endswith(".ttl")
+    assert int(response.headers["x-num-mappings-applied"]) > 0
+    assert int(response.headers["x-num-mappings-skipped"]) >= 0
+    g = Graph().parse(data=response.text, format="turtle")
+    assert len(g) == len(json_graph())
+
+
+def test_accept_ntriples_streams_ntriples():
+    """Accept: application/n-triples returns an N-Triples document."""
+    response = post(
+        "/api/createrdf",
+        json={"mapping_url": MAPPING_URL},
+        headers={"Accept": "application/n-triples"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/n-triples")
+    assert response.headers["content-disposition"].endswith(".nt")
+    g = Graph().parse(data=response.text, format="nt")
+    assert len(g) == len(json_graph())
+
+
+def test_stream_flag_uses_return_type():
+    """stream=true streams in the requested return_type."""
+    response = post(
+        "/api/createrdf?stream=true&return_type=nt", json={"mapping_url": MAPPING_URL}
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/n-triples")
+
+
+def test_json_stays_default():
+    """Without Accept header or stream flag the response is JSON."""
+    response = post("/api/createrdf", json={"mapping_url": MAPPING_URL})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/json")
+
+
+def test_chunk_rows_streams_same_triples():
+    """chunk_rows maps the data in batches and streams the same triples as N-Triples."""
+    response = post(
+        "/api/createrdf?chunk_rows=1&return_type=nt", json={"mapping_url": MAPPING_URL}
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/n-triples")
+    g = Graph().parse(data=response.text, format="nt")
+    assert len(g) == len(json_graph())
+
+
+def test_chunk_rows_needs_line_format():
+    """Chunked results can only be appended as N-Triples or N-Quads."""
+    response = post("/api/createrdf?chunk_rows=1", json={"mapping_url": MAPPING_URL})
+    assert response.status_code == 422
+
+
+def test_remote_engine_keeps_relative_base():
+    """The mapping's base '#' gives relative IRIs in the rmlmapper output, kept relative in the result."""
+    response = post(
+        "/api/createrdf?engine=remote",
+        json={"mapping_url": MAPPING_URL},
+        headers={"Accept": "text/turtle"},
+    )
+    assert response.status_code == 200, response.text
+    assert "<#Batch_" in response.text
+    g = Graph().parse(data=response.text, format="turtle")
+    assert len(g) == len(json_graph())
@@ -4,6 +4,7 @@ Run against a live service by setting TEST_BASE_URL:
     TEST_BASE_URL=http://localhost:6003 pytest test_createrdfupload.py -v
 """
 
+import asyncio
 import json
 import os
 import pytest
@@ -177,3 +178,31 @@ def test_createrdf_and_createrdfupload_produce_equivalent_graphs():
         f"  only in createrdf:       {po_url - po_upload}\n"
         f"  only in createrdfupload: {po_upload - po_url}"
     )
+
+
+def test_concurrent_uploads_map_independently():
+    """Uploads in flight at the same time each get the graph of their own content."""
+    ids = [f"580d3adf-1981-44a0-a214-{index:012d}" for index in range(20)]
+
+    async def upload_all():
+        async with httpx.AsyncClient(base_url=BASE_URL, timeout=120) as client:
+            return await asyncio.gather(*(
+                client.post(
+                    "/api/createrdfupload",
+                    json={
+                        "mapping_url": MAPPING_URL,
+                        "data_url": DATA_URL,
+                        "data_content": BATCH_JSON.replace(
+                            "580d3adf-1981-44a0-a214-13d6ceed9379", catenax_id
+                        ),
+                    },
+                )
+                for catenax_id in ids
+            ))
+
+    responses = asyncio.run(upload_all())
+    for catenax_id, response in zip(ids, responses):
+        assert response.status_code == 200, response.text
+        graph = response.json()["graph"]
+        assert catenax_id in graph
+        assert not any(other in graph for other in ids if other != catenax_id)
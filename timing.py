@@ -0,0 +1,146 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+
+import metrics
+
+_current = contextvars.ContextVar("timings", default=None)
+
+
+class Timings:
+    """Seconds one request spent per stage, in the order the stages started.
+
+    A stage entered several times, e.g. a download per source, is summed.
+    Spans may end in other threads than the request, so adding is locked.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def merge(self, stages: dict) -> None:
+        """Add the stages of another Timings, e.g. from a pool process."""
+        for stage, seconds in stages.items():
+            self.add(stage, seconds)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {stage: round(seconds, 6) for stage, seconds in self.stages.items()}
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        """Format the stages as Server-Timing header value, durations in milliseconds."""
+        entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.as_dict().items()]
+        if total is not None:
+            entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+def current() -> Optional[Timings]:
+    """Return the Timings of the running request, None outside of collect."""
+    return _current.get()
+
+
+def stage_seconds() -> Optional[dict]:
+    """Return the seconds per stage of the running request so far, None outside of collect."""
+    timings = _current.get()
+    return timings.as_dict() if timings is not None else None
+
+
+@contextlib.contextmanager
+def collect(observe: bool = True):
+    """Collect the spans of the block, run in this context or copies of it, into a new Timings.
+
+    Args:
+        observe: Whether to add the stages to the stage histogram at the end,
+            False where the stages are passed on to another Timings
+
+    Yields:
+        The Timings
+    """
+    timings = Timings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+        if observe:
+            metrics.observe_stages(timings.stages)
+
+
+@contextlib.contextmanager
+def span(stage: str):
+    """Add the duration of the block to stage of the running request, if any."""
+    timings = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.add(stage, time.perf_counter() - start)
+
+
+def record(stage: str, seconds: float) -> None:
+    """Add seconds measured outside of a span to stage of the running request, if any."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+def timed(stage: str):
+    """Decorate a function or coroutine function to run in a span of stage."""
+
+    def decorate(function):
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                with span(stage):
+                    return await function(*args, **kwargs)
+
+        else:
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with span(stage):
+                    return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+class ServerTimingMiddleware:
+    """Collect the stage timings of every HTTP request and send them as Server-Timing header.
+
+    The header holds the stages finished before the response starts, plus
+    the total time until then. Streamed responses start before their
+    serialization, which is only in the stage histogram.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        with collect() as timings:
+
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start" and timings.stages:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", timings.server_timing(time.perf_counter() - start))
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
@@ -0,0 +1,180 @@
+import logging
+import time
+
+from rdflib import RDF, Graph, Literal, URIRef
+
+_UNSEEN = object()
+
+
+class PrefixRewriter:
+    """Rewrite IRIs starting with one of several prefixes in a single pass.
+
+    Each rule maps a prefix to its replacement, an IRI matching several rules
+    is rewritten by the longest prefix. Rewritten terms are memoized, so an
+    IRI occurring in many triples is only looked up once. Graphs are rebuilt
+    with one bulk addN into a fresh store instead of removing and adding every
+    changed triple, which would update all indexes of the store per triple.
+
+    Counters of the last rewrite are kept in rewritten_terms, distinct_terms
+    and seconds.
+    """
+
+    def __init__(self, rules: dict[str, str]):
+        # longest prefix first, so the first match is the most specific one
+        self.rules = sorted(rules.items(), key=lambda rule: len(rule[0]), reverse=True)
+        self.prefixes = tuple(prefix for prefix, _ in self.rules)
+        self._memo = {}
+        self.rewritten_terms = 0
+        self.distinct_terms = 0
+        self.seconds = 0.0
+
+    def term(self, term):
+        """Return the rewritten term, terms not matching any rule unchanged."""
+        if not isinstance(term, URIRef):
+            return term
+        new_term = self._memo.get(term, _UNSEEN)
+        if new_term is _UNSEEN:
+            # None marks terms that stay unchanged
+            new_term = None
+            # str.startswith checks all prefixes at once and rejects most terms,
+            # URIRef.startswith would not accept a tuple
+            if str.startswith(term, self.prefixes):
+                for prefix, replacement in self.rules:
+                    if str.startswith(term, prefix):
+                        new_term = URIRef(replacement + term[len(prefix):])
+                        self.distinct_terms += 1
+                        break
+            self._memo[term] = new_term
+        if new_term is None:
+            return term
+        self.rewritten_terms += 1
+        return new_term
+
+    def triples(self, triples):
+        """Yield the triples with all their terms rewritten."""
+        term = self.term
+        for s, p, o in triples:
+            yield term(s), term(p), term(o)
+
+    def rewrite_graph(self, graph: Graph) -> Graph:
+        """Return a new graph with all terms of graph rewritten.
+
+        The new graph keeps identifier and namespace bindings of graph.
+        """
+        start = time.perf_counter()
+        self.rewritten_terms = 0
+        self.distinct_terms = 0
+        if not self.rules:
+            self.seconds = time.perf_counter() - start
+            return graph
+        rewritten = Graph(identifier=graph.identifier, bind_namespaces="none")
+        for prefix, namespace in graph.namespaces():
+            rewritten.bind(prefix, namespace, override=True, replace=True)
+        rewritten.addN((s, p, o, rewritten) for s, p, o in self.triples(graph))
+        self.seconds = time.perf_counter() - start
+        logging.info(
+            f"Rewrote {self.rewritten_terms} terms ({self.distinct_terms} distinct) "
+            f"in {len(graph)} triples in {self.seconds:.3f}s"
+        )
+        return rewritten
+
+    def stats(self) -> dict:
+        return {
+            "rewritten_terms": self.rewritten_terms,
+            "distinct_terms": self.distinct_terms,
+            "seconds": self.seconds,
+        }
+
+
+class TypeLiteralRepair:
+    """Turn rdf:type string literals holding an IRI into URIRefs.
+
+    The RML mapper sometimes outputs type declarations as string literals
+    instead of URIRefs. Graphs are repaired through their predicate index, so
+    only rdf:type triples are visited. Triple streams only compare the
+    predicate of each triple. Repaired literals are memoized, and their
+    prefixed names for logging come from namespaces sorted once, longest first.
+
+    Counters of all repairs are kept in checked_triples and repaired_triples,
+    the time spent repairing graphs in seconds.
+    """
+
+    IRI_STARTS = ("urn:", "http")
+
+    def __init__(self, prefixes: dict[str, str] | None = None):
+        self.namespaces = sorted(
+            ((str(namespace), prefix) for prefix, namespace in (prefixes or {}).items()),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        self._memo = {}
+        self.checked_triples = 0
+        self.repaired_triples = 0
+        self.seconds = 0.0
+
+    def qname(self, iri: str) -> str:
+        """Return iri shortened by the longest matching prefix, for logging."""
+        for namespace, prefix in self.namespaces:
+            if iri.startswith(namespace):
+                return f"{prefix}:{iri[len(namespace):]}"
+        return iri
+
+    def term(self, literal: Literal):
+        """Return the URIRef for an IRI-like type literal, None for other literals."""
+        new_term = self._memo.get(literal, _UNSEEN)
+        if new_term is _UNSEEN:
+            new_term = None
+            if str.startswith(literal, self.IRI_STARTS):
+                new_term = URIRef(str(literal))
+                logging.debug(
+                    f"Converting type string literal to URIRef: '{literal}' -> {self.qname(new_term)}"
+                )
+            self._memo[literal] = new_term
+        return new_term
+
+    def triples(self, triples):
+        """Yield the triples with IRI-like rdf:type literals repaired."""
+        type_ = RDF.type
+        term = self.term
+        for s, p, o in triples:
+            if p == type_:
+                self.checked_triples += 1
+                if isinstance(o, Literal):
+                    new_o = term(o)
+                    if new_o is not None:
+                        o = new_o
+                        self.repaired_triples += 1
+            yield s, p, o
+        self._log()
+
+    def repair_graph(self, graph: Graph) -> Graph:
+        """Repair graph in place using its predicate index and return it."""
+        start = time.perf_counter()
+        repairs = []
+        for s, p, o in graph.triples((None, RDF.type, None)):
+            self.checked_triples += 1
+            if isinstance(o, Literal):
+                new_o = self.term(o)
+                if new_o is not None:
+                    repairs.append((s, o, new_o))
+        for s, o, new_o in repairs:
+            graph.remove((s, RDF.type, o))
+            graph.add((s, RDF.type, new_o))
+        self.repaired_triples += len(repairs)
+        self.seconds += time.perf_counter() - start
+        self._log()
+        return graph
+
+    def _log(self) -> None:
+        if self.repaired_triples:
+            logging.info(
+                f"Fixed {self.repaired_triples} string literal type declarations "
+                f"of {self.checked_triples} type triples"
+            )
+
+    def stats(self) -> dict:
+        return {
+            "checked_triples": self.checked_triples,
+            "repaired_triples": self.repaired_triples,
+            "seconds": self.seconds,
+        }